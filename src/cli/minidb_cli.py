@@ -10,18 +10,26 @@ import argparse
 import sys
 import os
 import json
+import mmap
+import operator
+import re
 import time
+from collections import OrderedDict
+from functools import cached_property
 from pathlib import Path
-from tabulate import tabulate
 import traceback  # ★ 新增：打印完整堆栈
 
 # 添加src目录到路径
-src_dir = Path(__file__).parent.parent
-sys.path.insert(0, str(src_dir))
+# ★ 修改：同时加入项目根目录（engine 模块使用 src.xxx 形式导入），且只在缺失时插入，
+#   避免重复条目让每次导入多扫描一遍 sys.path
+src_dir = Path(__file__).resolve().parent.parent
+for _path in (str(src_dir), str(src_dir.parent)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
 
 # A阶段：SQL编译器
 try:
-    from sql.lexer import Lexer, format_tokens, SqlError
+    from sql.lexer import Lexer, format_tokens, format_tokens_to, SqlError, TokenType
     from sql.parser import Parser, format_ast, ParseError
     from sql.semantic import SemanticAnalyzer, Catalog, SemanticError, format_semantic_result
     from sql.planner import Planner, ExecutionPlan, PlanError, format_execution_plan
@@ -43,40 +51,177 @@ except ImportError as e:
     traceback.print_exc()  # ★ 新增：输出完整堆栈，精确到文件与行号
     STORAGE_ENGINE_AVAILABLE = False
 
-# 测试模块
-try:
-    from tests.test_sql import TestSQLCompiler, run_comprehensive_tests
-    from tests.bad_cases import BadCaseTester, demo_four_views_with_errors
+# ★ 新增：计划缓存容量（按规范化SQL缓存 AST + 执行计划）
+_PLAN_CACHE_MAXSIZE = 256
+
+# ★ 新增：结果展示时最多保留的数据行数，其余行只计数不驻留内存
+_MAX_DISPLAY_ROWS = 1000
+
+# ★ 新增：识别DDL语句（表结构变化会使缓存的计划过期）
+_DDL_RE = re.compile(r'^\s*(CREATE|DROP|ALTER)\b', re.IGNORECASE)
+
+# ★ 新增：执行后更新目录用 —— 提取目标表名
+_CREATE_NAME_RE = re.compile(r'CREATE\s+TABLE\s+([A-Za-z_]\w*)', re.IGNORECASE)
+_INSERT_NAME_RE = re.compile(r'INSERT\s+INTO\s+([A-Za-z_]\w*)', re.IGNORECASE)
+_DELETE_NAME_RE = re.compile(r'DELETE\s+FROM\s+([A-Za-z_]\w*)', re.IGNORECASE)
+
+# ★ 新增：简化执行路径（A阶段不可用时）的语句解析
+_CREATE_RE = re.compile(r'CREATE\s+TABLE\s+(\w+)\s*\((.*)\)', re.IGNORECASE)
+_INSERT_RE = re.compile(r'INSERT\s+INTO\s+(\w+)\s+VALUES\s*\((.*)\)', re.IGNORECASE)
+_SELECT_RE = re.compile(r'SELECT\s+(.*?)\s+FROM\s+(\w+)(?:\s+WHERE\s+(.*))?', re.IGNORECASE | re.DOTALL)
+_DELETE_RE = re.compile(r'DELETE\s+FROM\s+(\w+)(?:\s+WHERE\s+(.*))?', re.IGNORECASE)
+_WHERE_RE = re.compile(r'(\w+)\s*([><=!]+)\s*(.+)', re.IGNORECASE)
+_SIMPLE_WHERE_OPS = {
+    '=': operator.eq, '>': operator.gt, '<': operator.lt,
+    '>=': operator.ge, '<=': operator.le, '!=': operator.ne, '<>': operator.ne,
+}
+
+# ★ 新增：语句完整性判断用 —— 注释、闭合的引号段（支持反斜杠转义）、单个括号；
+#   无法闭合的引号/注释只匹配起始符号（open 分组），表示其后内容都在字面量/注释内
+_QUOTE_OR_PAREN_RE = re.compile(
+    r"--[^\n]*\n|/\*.*?\*/|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|(?P<open>['\"]|/\*|--)|[()]",
+    re.DOTALL)
+
+# ★ 新增：计划缓存键用 —— 注释与字符串字面量原样保留，其余连续空白合并为一个空格
+_PLAN_KEY_RE = re.compile(r"--[^\n]*|/\*.*?\*/|'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"|(\s+)", re.DOTALL)
+
+# ★ 新增：显示模式（元组保持展示顺序，frozenset 用于O(1)成员判断）
+_SHOW_MODE_NAMES = ('result', 'token', 'ast', 'semantic', 'plan', 'all')
+_SHOW_MODES = frozenset(_SHOW_MODE_NAMES)
+# ★ 新增：各编译/执行阶段在哪些显示模式下输出
+_TOKEN_STAGE_MODES = frozenset(('token', 'all'))
+_AST_STAGE_MODES = frozenset(('ast', 'all'))
+_SEMANTIC_STAGE_MODES = frozenset(('semantic', 'all'))
+_PLAN_STAGE_MODES = frozenset(('plan', 'all'))
+_RESULT_STAGE_MODES = frozenset(('result', 'all'))
+
+def _emit(*parts: str):
+    """★ 新增：拼接后一次写出并换行（替代多次print，大段AST/计划输出只写一次）"""
+    sys.stdout.write(''.join(parts) + '\n')
+
+
+# ★ 新增：按列元组缓存的行构造函数（运行时生成代码，省去逐行的逐列循环）
+_ROW_BUILDER_CACHE = {}
+_ROW_BUILDER_CACHE_MAXSIZE = 256
+
+
+def _row_builder(columns: tuple, as_list: bool = False):
+    """
+    返回把行字典投影到 columns 的函数，按 (列元组, 形式) 缓存
+
+    as_list=False: 生成 {'a': r['a'], ...}（调用方保证列都存在）
+    as_list=True:  生成 [r.get('a', ''), ...]（表格展示用，缺失列填空串）
+    """
+    key = (columns, as_list)
+    fn = _ROW_BUILDER_CACHE.get(key)
+    if fn is None:
+        if as_list:
+            body = '[' + ', '.join(f"r.get({c!r}, '')" for c in columns) + ']'
+        else:
+            body = '{' + ', '.join(f"{c!r}: r[{c!r}]" for c in columns) + '}'
+        namespace = {}
+        exec(f"def _build(r): return {body}", namespace)
+        if len(_ROW_BUILDER_CACHE) >= _ROW_BUILDER_CACHE_MAXSIZE:
+            _ROW_BUILDER_CACHE.clear()
+        fn = _ROW_BUILDER_CACHE[key] = namespace['_build']
+    return fn
+
+
+# ★ 新增：详细帮助文本（整块写出，避免逐行print）
+_HELP_TEXT = """
+=== MiniDB 完整集成版帮助 ===
+
+   系统概述:
+   这是一个完整的SQL数据库系统，集成了：
+   - A阶段: SQL编译器 (词法/语法/语义/计划)
+   - B阶段: 存储引擎 (页面/文件/缓冲/持久化)  
+   - C阶段: 执行引擎 (算子/目录)
+
+   系统命令:
+   .help              - 显示此帮助
+   .exit              - 退出系统
+   .tables            - 列出所有表
+   .schema <table>    - 显示表结构
+   .stats             - 显示系统统计
+
+    调试命令:
+   .show <mode>       - 设置显示模式
+   .fourview          - 四视图演示
+   .demo              - 完整功能演示
+
+    显示模式:
+   result   - 显示执行结果 (默认)
+   token    - 显示词法分析
+   ast      - 显示语法分析
+   semantic - 显示语义分析  
+   plan     - 显示执行计划
+   all      - 显示所有阶段
+
+    支持的SQL:
+   CREATE TABLE table_name(col1 INT, col2 VARCHAR(n));
+   INSERT INTO table_name VALUES(val1, val2);
+   SELECT col1,col2 FROM table_name WHERE condition;
+   DELETE FROM table_name WHERE condition;
 
-    TESTS_AVAILABLE = True
-except ImportError:
-    TESTS_AVAILABLE = False
+    使用建议:
+   1. 先用 .demo 查看完整功能演示
+   2. 用 .show all 切换到四视图模式
+   3. 输入SQL查看完整编译和执行过程
+   4. 用 .tables 和 .schema 查看数据库状态
+
+"""
 
 
 class IntegratedMiniDBCLI:
     """完整集成的MiniDB CLI"""
 
-    def __init__(self, data_dir: str = "minidb_data"):
+    def __init__(self, data_dir: str = "minidb_data", verbose_ast: bool = False):
         self.data_dir = data_dir
         self.show_mode = "result"  # 默认显示执行结果
+        # ★ 新增：AST的JSON形式仅在 --verbose-ast 时输出，编码器复用且不做循环引用检查
+        self.verbose_ast = verbose_ast
+        self._json_encoder = json.JSONEncoder(ensure_ascii=False, separators=(',', ':'),
+                                              check_circular=False)
+        # ★ 新增：计划缓存 规范化SQL -> ExecutionPlan，按LRU淘汰
+        self._plan_cache = OrderedDict()
+        # ★ 新增：系统命令分发表（字典查找替代 if/elif 链），处理函数接收参数列表
+        self._cmds = {
+            '.exit': self._cmd_exit,
+            '.help': lambda args: self._show_detailed_help(),
+            '.tables': lambda args: self._show_tables(),
+            '.schema': self._cmd_schema,
+            '.stats': lambda args: self._show_stats(),
+            '.show': self._cmd_show,
+            '.fourview': lambda args: self._demo_four_views(),
+            '.demo': lambda args: self._run_demo(),
+        }
+        # ★ 新增：简化执行路径的分发表 首关键字 -> (要求的语句前缀, 处理函数)
+        self._simple_dispatch = {
+            'CREATE': ('CREATE TABLE', self._execute_simple_create),
+            'INSERT': ('INSERT INTO', self._execute_simple_insert),
+            'SELECT': ('SELECT', self._execute_simple_select),
+            'DELETE': ('DELETE', self._execute_simple_delete),
+        }
         self._init_readline()
         # 初始化A阶段组件（如果可用）
         if SQL_COMPILER_AVAILABLE:
             self.lexer = Lexer()
+            self.parser = Parser()  # ★ 新增：Parser只创建一次，各阶段复用
             self.a_stage_catalog = Catalog()  # A阶段的内存catalog
             self.semantic_analyzer = SemanticAnalyzer(self.a_stage_catalog)
-            self.a_stage_planner = Planner(self.a_stage_catalog)
+            self.a_stage_planner = Planner(self.a_stage_catalog, self.parser)
+            # ★ 新增：已同步到A阶段的目录版本，以及按 (表名, table_id) 缓存的列定义
+            self._synced_catalog_version = -1
+            self._a_stage_col_defs = {}
             print("✓ A阶段SQL编译器已加载")
         else:
             print("⚠ A阶段SQL编译器不可用，将使用简化解析")
 
         # 初始化B+C阶段组件（如果可用）
+        # ★ 修改：存储引擎/目录/执行器改为首次使用时才创建（见下方 cached_property），
+        #   只做词法/语法/计划展示时不触碰数据目录
         if STORAGE_ENGINE_AVAILABLE:
-            print("正在初始化存储引擎...")
-            self.storage_engine = StorageEngine(data_dir, buffer_capacity=32, buffer_policy="LRU")
-            self.catalog_manager = CatalogManager(self.storage_engine)
-            self.executor = Executor(self.storage_engine, self.catalog_manager)  # ✓ 正确传递catalog_mgr
-            print("✓ B+C阶段存储引擎已加载")
+            print("✓ B+C阶段存储引擎可用（首次访问数据时初始化）")
         else:
             print("❌ B+C阶段存储引擎不可用")
 
@@ -89,6 +234,21 @@ class IntegratedMiniDBCLI:
         else:
             print("⚠ 部分组件不可用，功能受限")
 
+    @cached_property
+    def storage_engine(self) -> 'StorageEngine':
+        print("正在初始化存储引擎...")
+        return StorageEngine(self.data_dir, buffer_capacity=32, buffer_policy="LRU2")
+
+    @cached_property
+    def catalog_manager(self) -> 'CatalogManager':
+        catalog_manager = CatalogManager(self.storage_engine)
+        print("✓ B+C阶段存储引擎已加载")
+        return catalog_manager
+
+    @cached_property
+    def executor(self) -> 'Executor':
+        return Executor(self.storage_engine, self.catalog_manager)  # ✓ 正确传递catalog_mgr
+
     def run_interactive(self):
         """启动交互模式（★ 支持多行输入与历史）"""
         self._show_banner()
@@ -100,8 +260,8 @@ class IntegratedMiniDBCLI:
                 if not sql_or_cmd:
                     continue
 
-                # 系统命令以.开头仍按单条处理
-                if sql_or_cmd.startswith('.'):
+                # 系统命令以.开头仍按单条处理（★ 只看首字符分流：SQL 不会以 . 开头）
+                if sql_or_cmd[0] == '.':
                     self._handle_system_command(sql_or_cmd)
                 else:
                     self._process_sql_statement(sql_or_cmd)
@@ -115,46 +275,47 @@ class IntegratedMiniDBCLI:
         self._cleanup()
 
     def _show_banner(self):
-        """显示启动横幅"""
-        print("\n" + "=" * 80)
-        print("   MiniDB - 完整集成版 SQL 数据库系统")
-        print("=" * 80)
+        """显示启动横幅（★ 先拼接再一次性写出）"""
+        lines = ["\n" + "=" * 80,
+                 "   MiniDB - 完整集成版 SQL 数据库系统",
+                 "=" * 80]
 
         if self.fully_integrated:
-            print("🎯 功能状态: 完整集成 (A+B+C阶段)")
-            print("   ✓ SQL编译器 (词法/语法/语义/计划)")
-            print("   ✓ 存储引擎 (页面/文件/缓冲/持久化)")
-            print("   ✓ 执行引擎 (五大算子/系统目录)")
-            print("   ✓ 真正的SQL执行和数据存储")
+            lines += ["🎯 功能状态: 完整集成 (A+B+C阶段)",
+                      "   ✓ SQL编译器 (词法/语法/语义/计划)",
+                      "   ✓ 存储引擎 (页面/文件/缓冲/持久化)",
+                      "   ✓ 执行引擎 (五大算子/系统目录)",
+                      "   ✓ 真正的SQL执行和数据存储"]
         else:
-            print("⚠ 功能状态: 部分可用")
+            lines.append("⚠ 功能状态: 部分可用")
 
-        print("\n📋 系统命令:")
-        print("   .help     - 显示完整帮助")
-        print("   .exit     - 退出系统")
-        print("   .tables   - 列出所有表")
-        print("   .schema <table> - 显示表结构")
-        print("   .stats    - 显示系统统计")
+        lines += ["\n📋 系统命令:",
+                  "   .help     - 显示完整帮助",
+                  "   .exit     - 退出系统",
+                  "   .tables   - 列出所有表",
+                  "   .schema <table> - 显示表结构",
+                  "   .stats    - 显示系统统计"]
 
         if self.fully_integrated:
-            print("\n🔧 调试命令:")
-            print("   .show <mode> - 设置显示模式")
-            print("   .fourview    - 四视图演示")
-            print("   .demo        - 演示完整SQL功能")
-            print("\n📊 显示模式:")
-            print("   result   - 显示执行结果 (默认)")
-            print("   token    - 显示词法分析")
-            print("   ast      - 显示语法分析")
-            print("   semantic - 显示语义分析")
-            print("   plan     - 显示执行计划")
-            print("   all      - 显示所有阶段")
+            lines += ["\n🔧 调试命令:",
+                      "   .show <mode> - 设置显示模式",
+                      "   .fourview    - 四视图演示",
+                      "   .demo        - 演示完整SQL功能",
+                      "\n📊 显示模式:",
+                      "   result   - 显示执行结果 (默认)",
+                      "   token    - 显示词法分析",
+                      "   ast      - 显示语法分析",
+                      "   semantic - 显示语义分析",
+                      "   plan     - 显示执行计划",
+                      "   all      - 显示所有阶段"]
 
-        print("\n📚 SQL示例:")
-        print("   CREATE TABLE users(id INT, name VARCHAR(50), age INT);")
-        print("   INSERT INTO users VALUES(1, 'Alice', 25);")
-        print("   SELECT id,name FROM users WHERE age > 20;")
-        print("   DELETE FROM users WHERE id = 1;")
-        print()
+        lines += ["\n📚 SQL示例:",
+                  "   CREATE TABLE users(id INT, name VARCHAR(50), age INT);",
+                  "   INSERT INTO users VALUES(1, 'Alice', 25);",
+                  "   SELECT id,name FROM users WHERE age > 20;",
+                  "   DELETE FROM users WHERE id = 1;",
+                  ""]
+        sys.stdout.write("\n".join(lines) + "\n")
 
 
 
@@ -163,36 +324,32 @@ class IntegratedMiniDBCLI:
         """处理系统命令"""
         cmd = command.lower().split()
 
-        if cmd[0] == '.exit':
-            print("再见!")
-            self._cleanup()
-            sys.exit(0)
-        elif cmd[0] == '.help':
-            self._show_detailed_help()
-        elif cmd[0] == '.tables':
-            self._show_tables()
-        elif cmd[0] == '.schema':
-            if len(cmd) > 1:
-                self._show_schema(cmd[1])
-            else:
-                print("用法: .schema <table_name>")
-        elif cmd[0] == '.stats':
-            self._show_stats()
-        elif cmd[0] == '.show':
-            if len(cmd) > 1:
-                self._set_show_mode(cmd[1])
-            else:
-                print(f"当前显示模式: {self.show_mode}")
-        elif cmd[0] == '.fourview':
-            self._demo_four_views()
-        elif cmd[0] == '.demo':
-            self._run_demo()
-        else:
+        handler = self._cmds.get(cmd[0])
+        if handler is None:
             print(f"未知命令: {command}")
             print("输入 .help 查看所有命令")
+            return
+        handler(cmd[1:])
+
+    def _cmd_exit(self, args: list):
+        print("再见!")
+        self._cleanup()
+        sys.exit(0)
+
+    def _cmd_schema(self, args: list):
+        if args:
+            self._show_schema(args[0])
+        else:
+            print("用法: .schema <table_name>")
 
-    def _process_sql_statement(self, sql: str):
-        """处理SQL语句 - 完整集成版本"""
+    def _cmd_show(self, args: list):
+        if args:
+            self._set_show_mode(args[0])
+        else:
+            print(f"当前显示模式: {self.show_mode}")
+
+    def _process_sql_statement(self, sql: str, tokens: list = None):
+        """处理SQL语句 - 完整集成版本（tokens: 可选，已完成词法分析的Token列表）"""
         if not sql.endswith(';'):
             sql += ';'
 
@@ -203,7 +360,7 @@ class IntegratedMiniDBCLI:
 
         try:
             if self.fully_integrated:
-                self._process_with_full_integration(sql)
+                self._process_with_full_integration(sql, tokens)
             else:
                 self._process_with_partial_integration(sql)
 
@@ -214,81 +371,190 @@ class IntegratedMiniDBCLI:
         print(f"\n⏱ 总耗时: {(end_time - start_time) * 1000:.2f}ms")
         print("=" * 60)
 
-    def _process_with_full_integration(self, sql: str):
+    def _process_with_full_integration(self, sql: str, tokens: list = None):
         """完整集成处理：A阶段编译 + B+C阶段执行"""
+        try:
+            self._run_integration_stages(sql, tokens)
+        finally:
+            # ★ 修改：DDL 会改变表结构（语义分析也会向A阶段catalog登记新表），
+            #   无论执行到哪个阶段都使缓存的计划和A阶段catalog镜像过期
+            self._invalidate_plan_cache(sql)
+
+    def _run_integration_stages(self, sql: str, tokens: list = None):
+        """
+        按显示模式依次执行各阶段
+
+        ★ 修改：词法/语法分析结果在各阶段间复用 —— Token 只生成一次，AST 只解析一次，
+        计划直接由 AST 生成；按显示模式只计算需要的中间产物。
+        """
+        mode = self.show_mode
+        ast = None
+        plan = None
 
         # 阶段1: 词法分析
-        if self.show_mode in ['token', 'all']:
-            print("\n【阶段1: 词法分析】")
+        if mode in _TOKEN_STAGE_MODES:
+            _emit("\n【阶段1: 词法分析】")
             try:
-                tokens = self.lexer.tokenize(sql)
-                print(format_tokens(tokens))
+                if tokens is None and mode == 'token':
+                    # ★ 仅看词法时直接流式输出，不物化Token列表
+                    format_tokens_to(sys.stdout, self.lexer.iter_tokens(sql))
+                    return
+                if tokens is None:
+                    tokens = self.lexer.tokenize(sql)
+                _emit(format_tokens(tokens))
             except SqlError as e:
-                print(f"❌ 词法错误: {e}")
+                _emit(f"❌ 词法错误: {e}")
                 return
 
         # 阶段2: 语法分析
-        if self.show_mode in ['ast', 'all']:
-            print("\n【阶段2: 语法分析】")
+        if mode in _AST_STAGE_MODES:
+            _emit("\n【阶段2: 语法分析】")
             try:
-                parser = Parser()
-                ast = parser.parse(sql)
-                print("✓ 语法分析成功")
-                print(format_ast(ast))
+                ast = self._parse(sql, tokens)
+                _emit("✓ 语法分析成功\n", format_ast(ast))
+                if self.verbose_ast:
+                    _emit(f"\nJSON格式:\n{self._json_encoder.encode(ast.to_dict())}")
             except ParseError as e:
-                print(f"❌ 语法错误: {e}")
+                _emit(f"❌ 语法错误: {e}")
                 return
 
         # 阶段3: 语义分析（使用A阶段的语义分析器做检查）
-        if self.show_mode in ['semantic', 'all']:
-            print("\n【阶段3: 语义分析】")
+        if mode in _SEMANTIC_STAGE_MODES:
+            _emit("\n【阶段3: 语义分析】")
             try:
                 # 同步B+C阶段的表信息到A阶段catalog
                 self._sync_catalog_to_a_stage()
 
-                parser = Parser()
-                ast = parser.parse(sql)
+                if ast is None:
+                    ast = self._parse(sql, tokens)
                 result = self.semantic_analyzer.analyze(ast)
-                print("✓ 语义分析成功")
-                print(format_semantic_result(result))
+                _emit("✓ 语义分析成功\n", format_semantic_result(result))
             except (ParseError, SemanticError) as e:
-                print(f"❌ 语义错误: {e}")
+                _emit(f"❌ 语义错误: {e}")
                 return
 
         # 阶段4: 计划生成（使用A阶段的计划生成器）
-        if self.show_mode in ['plan', 'all']:
-            print("\n【阶段4: 计划生成】")
+        if mode in _PLAN_STAGE_MODES:
+            _emit("\n【阶段4: 计划生成】")
             try:
-                self._sync_catalog_to_a_stage()
-                plan = self.a_stage_planner.plan(sql)
-                print("✓ 计划生成成功")
-                print(format_execution_plan(plan))
-                print(f"\nJSON格式:\n{plan.to_json()}")
+                plan = self._get_execution_plan(sql, tokens, ast)
+                _emit("✓ 计划生成成功\n", format_execution_plan(plan),
+                      "\n\nJSON格式:\n", plan.to_json())
             except (PlanError, ParseError, SemanticError) as e:
-                print(f"❌ 计划生成错误: {e}")
+                _emit(f"❌ 计划生成错误: {e}")
                 return
 
         # 阶段5: 真正执行（使用B+C阶段的执行器）
-        if self.show_mode in ['result', 'all']:
-            print("\n【阶段5: 执行结果】")
+        if mode in _RESULT_STAGE_MODES:
+            _emit("\n【阶段5: 执行结果】")
             try:
-                # 生成执行计划
-                self._sync_catalog_to_a_stage()
-                execution_plan = self.a_stage_planner.plan(sql)
+                # 生成执行计划（★ 复用阶段4的计划，否则优先命中计划缓存）
+                execution_plan = plan if plan is not None else self._get_execution_plan(sql, tokens, ast)
 
                 # 转换为执行器可理解的格式
                 plan_dict = self._convert_plan_to_executor_format(execution_plan)
 
-                # 执行
-                results = list(self.executor.execute(plan_dict))
-
-                self._display_execution_results(results)
+                # 执行（★ 修改：直接消费执行器生成器，不再先整体物化为列表）
+                status_results = self._display_execution_results(self.executor.execute(plan_dict))
 
-                # 更新B+C阶段的系统目录
-                self._update_catalog_after_execution(sql, results)
+                # 更新B+C阶段的系统目录（影响行数只来自状态消息）
+                self._update_catalog_after_execution(sql, status_results)
 
             except Exception as e:
-                print(f"❌ 执行失败: {e}")
+                _emit(f"❌ 执行失败: {e}")
+
+    # ★ 新增：计划缓存 —— 相同SQL（空白规范化后）直接复用执行计划
+    # ★ 修复：只合并引号/注释之外的空白，字面量内空白不同的语句不能共用计划
+    @staticmethod
+    def _plan_cache_key(sql: str) -> str:
+        return _PLAN_KEY_RE.sub(lambda m: ' ' if m.group(1) else m.group(), sql.strip().rstrip(';').rstrip())
+
+    def _parse(self, sql: str, tokens: list = None):
+        """★ 新增：有现成Token时直接解析Token，避免重复词法分析"""
+        if tokens is not None:
+            return self.parser.parse_tokens(tokens)
+        return self.parser.parse(sql)
+
+    def _get_execution_plan(self, sql: str, tokens: list = None, ast=None) -> 'ExecutionPlan':
+        """获取执行计划：命中缓存直接返回，否则同步catalog后由AST生成并缓存"""
+        key = self._plan_cache_key(sql)
+        plan = self._plan_cache.get(key)
+        if plan is not None:
+            self._plan_cache.move_to_end(key)
+            return plan
+
+        self._sync_catalog_to_a_stage()
+        if ast is None and tokens is not None:
+            ast = self.parser.parse_tokens(tokens)
+        if ast is not None:
+            plan = self.a_stage_planner.plan_from_ast(ast)
+        else:
+            plan = self.a_stage_planner.plan(sql)
+
+        self._plan_cache[key] = plan
+        if len(self._plan_cache) > _PLAN_CACHE_MAXSIZE:
+            self._plan_cache.popitem(last=False)
+        return plan
+
+    def _invalidate_plan_cache(self, sql: str):
+        """CREATE/DROP/ALTER 后清空计划缓存并标记A阶段catalog需重新同步（数据变化不影响计划）"""
+        if _DDL_RE.match(sql):
+            self._plan_cache.clear()
+            self._synced_catalog_version = -1
+
+    # ★ 新增：文件模式 —— 整个脚本只做一次词法分析，逐条语句直接从Token执行
+    def run_file(self, path: str):
+        """执行SQL脚本文件（★ mmap 逐条切分，内存占用与单条语句相当，而非整个文件）"""
+        for line, chunk in self._iter_script_statements(path):
+            try:
+                for tokens in self.lexer.tokenize_stream(chunk, line):
+                    self.run_single_from_tokens(tokens)
+            except SqlError as e:
+                print(f"❌ 词法错误: {e}")
+
+    def _iter_script_statements(self, path: str):
+        """
+        在mmap上用find定位 ';'，仅当引号/括号配平时才视为语句结束
+
+        ★ 修改：产出 (起始行号, 语句文本)，逐段词法分析时错误仍报告文件中的真实行号
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                start = pos = 0
+                line = 1
+                while True:
+                    i = mm.find(b';', pos)
+                    if i == -1:
+                        break
+                    pos = i + 1
+                    chunk = mm[start:pos].decode('utf-8')
+                    if self._is_complete_statement(chunk):
+                        yield line, chunk
+                        line += chunk.count('\n')
+                        start = pos
+
+                tail = mm[start:].decode('utf-8')
+                if tail.strip():
+                    yield line, tail
+
+    def run_single_from_tokens(self, tokens: list):
+        """执行一条已完成词法分析的语句"""
+        self._process_sql_statement(self._tokens_to_sql(tokens), tokens)
+
+    @staticmethod
+    def _tokens_to_sql(tokens: list) -> str:
+        """由Token还原SQL文本（用于显示、计划缓存键与目录更新）"""
+        parts = []
+        for tok in tokens:
+            if tok.type == TokenType.EOF:
+                break
+            if tok.type == TokenType.STRING:
+                parts.append("'" + tok.lexeme.replace('\\', '\\\\').replace("'", "\\'") + "'")
+            else:
+                parts.append(tok.lexeme)
+        return ' '.join(parts)
 
     def _process_with_partial_integration(self, sql: str):
         """部分集成处理：仅使用可用组件"""
@@ -307,60 +573,86 @@ class IntegratedMiniDBCLI:
         if not (SQL_COMPILER_AVAILABLE and STORAGE_ENGINE_AVAILABLE):
             return
 
-        # 获取B+C阶段的所有表
-        tables = self.catalog_manager.list_all_tables()
-
-        # 清空A阶段catalog并重新同步
-        self.a_stage_catalog = Catalog()
-        self.semantic_analyzer = SemanticAnalyzer(self.a_stage_catalog)
-        self.a_stage_planner = Planner(self.a_stage_catalog)
+        # ★ 新增：B+C阶段目录版本未变化时，A阶段catalog已是最新，直接返回
+        catalog_manager = self.catalog_manager
+        if catalog_manager.version == self._synced_catalog_version:
+            return
 
-        for table_name in tables:
-            columns = self.catalog_manager.get_table_columns(table_name)
-            col_defs = []
-            for col in columns:
-                col_def = {"name": col.column_name, "type": col.column_type}
-                if col.max_length:
-                    col_def["max_length"] = col.max_length
-                col_defs.append(col_def)
+        # 获取B+C阶段的所有表及其列（★ 修改：一次批量获取）
+        tables = catalog_manager.list_all_tables_with_columns()
+
+        # 清空A阶段catalog并重新同步（★ 修改：原地清空，语义分析器/计划生成器继续引用同一catalog）
+        self.a_stage_catalog.clear()
+
+        col_defs_cache = {}
+        for table_name, columns in tables.items():
+            # ★ 新增：按 (表名, table_id) 复用列定义，未变化的表不再逐列重建
+            key = (table_name, catalog_manager.get_table_metadata(table_name).table_id)
+            col_defs = self._a_stage_col_defs.get(key)
+            if col_defs is None:
+                col_defs = []
+                for col in columns:
+                    col_def = {"name": col.column_name, "type": col.column_type}
+                    if col.max_length:
+                        col_def["max_length"] = col.max_length
+                    col_defs.append(col_def)
+            col_defs_cache[key] = col_defs
 
             try:
                 self.a_stage_catalog.create_table(table_name, col_defs)
             except:
                 pass  # 忽略重复创建错误
 
+        self._a_stage_col_defs = col_defs_cache
+        self._synced_catalog_version = catalog_manager.version
+
     def _convert_plan_to_executor_format(self, execution_plan: 'ExecutionPlan') -> dict:
         """将A阶段的ExecutionPlan转换为C阶段Executor可理解的格式"""
         plan_dict = execution_plan.to_dict()
 
-        # 递归转换计划树结构
+        # ★ 修改：不再逐节点复制字典，只沿 child 链下行，遇到嵌套的 ExecutionPlan 对象才替换为字典
         def convert_node(node):
+            if hasattr(node, 'to_dict'):
+                node = node.to_dict()
             if isinstance(node, dict):
-                # 已经是字典格式
-                converted = {}
-                for key, value in node.items():
-                    if key == 'child' and value:
-                        converted[key] = convert_node(value)
-                    else:
-                        converted[key] = value
-                return converted
-            else:
-                # 可能是ExecutionPlan对象
-                return node.to_dict() if hasattr(node, 'to_dict') else node
+                child = node.get('child')
+                if child:
+                    converted = convert_node(child)
+                    if converted is not child:
+                        node['child'] = converted
+            return node
 
         return convert_node(plan_dict)
 
-    def _display_execution_results(self, results: list):
-        """显示执行结果"""
-        if not results:
-            print("✓ 执行成功，无返回结果")
-            return
+    def _display_execution_results(self, results) -> list:
+        """
+        显示执行结果
+
+        ★ 修改：接受任意可迭代对象（如执行器生成器），边迭代边划分状态消息与数据行；
+        数据行最多保留 _MAX_DISPLAY_ROWS 条，其余只计数。返回状态消息列表。
+        """
+        # 区分状态消息和数据结果（单次遍历完成划分）
+        status_results = []
+        data_results = []
+        data_count = 0
+        all_dicts = True
+        for r in results:
+            if isinstance(r, dict):
+                if 'status' in r:
+                    status_results.append(r)
+                    continue
+            else:
+                all_dicts = False
+            data_count += 1
+            if data_count <= _MAX_DISPLAY_ROWS:
+                data_results.append(r)
 
-        print(f"✓ 执行成功，返回 {len(results)} 条结果")
+        total = len(status_results) + data_count
+        if not total:
+            print("✓ 执行成功，无返回结果")
+            return status_results
 
-        # 区分状态消息和数据结果
-        status_results = [r for r in results if isinstance(r, dict) and 'status' in r]
-        data_results = [r for r in results if r not in status_results]
+        print(f"✓ 执行成功，返回 {total} 条结果")
 
         # 显示状态消息
         for status in status_results:
@@ -371,11 +663,13 @@ class IntegratedMiniDBCLI:
 
         # 显示数据结果
         if data_results:
-            if len(data_results) <= 20 and all(isinstance(r, dict) for r in data_results):
+            if data_count <= 20 and all_dicts:
                 # 表格显示
                 if data_results:
+                    from tabulate import tabulate  # ★ 修改：按需导入，缩短CLI启动时间
                     headers = list(data_results[0].keys())
-                    table_data = [[row.get(h, '') for h in headers] for row in data_results]
+                    to_list = _row_builder(tuple(headers), as_list=True)
+                    table_data = [to_list(row) for row in data_results]
                     print("\n📊 查询结果:")
                     print(tabulate(table_data, headers=headers, tablefmt='grid'))
             else:
@@ -383,18 +677,20 @@ class IntegratedMiniDBCLI:
                 print("\n📋 数据结果:")
                 for i, result in enumerate(data_results[:10]):
                     print(f"   [{i + 1}] {result}")
-                if len(data_results) > 10:
-                    print(f"   ... 还有 {len(data_results) - 10} 条结果")
+                if data_count > 10:
+                    print(f"   ... 还有 {data_count - 10} 条结果")
+
+        return status_results
 
     def _update_catalog_after_execution(self, sql: str, results: list):
         """执行后更新系统目录统计"""
-        sql_upper = sql.strip().upper()
+        # ★ 修改：只大写语句开头（最长前缀 'CREATE TABLE' 为12个字符），不复制整条SQL
+        sql_upper = sql.lstrip()[:12].upper()
 
         # === 1) CREATE TABLE：保留原逻辑 ===
         if sql_upper.startswith('CREATE TABLE'):
             try:
-                import re
-                m = re.match(r'CREATE\s+TABLE\s+([A-Za-z_]\w*)', sql, re.IGNORECASE)
+                m = _CREATE_NAME_RE.match(sql)
                 if m:
                     tbl = m.group(1)
                     info = self.storage_engine.get_table_info(tbl)
@@ -409,8 +705,7 @@ class IntegratedMiniDBCLI:
         # === ★ 新增：2) INSERT INTO <table> ... ===
         if sql_upper.startswith('INSERT INTO'):
             try:
-                import re
-                m = re.match(r'INSERT\s+INTO\s+([A-Za-z_]\w*)', sql, re.IGNORECASE)
+                m = _INSERT_NAME_RE.match(sql)
                 if m:
                     tbl = m.group(1)
                     # executor 的 InsertOperator 会返回 {"affected_rows": 1}
@@ -428,8 +723,7 @@ class IntegratedMiniDBCLI:
         # === ★ 新增：3) DELETE FROM <table> WHERE ... ===
         if sql_upper.startswith('DELETE FROM'):
             try:
-                import re
-                m = re.match(r'DELETE\s+FROM\s+([A-Za-z_]\w*)', sql, re.IGNORECASE)
+                m = _DELETE_NAME_RE.match(sql)
                 if m:
                     tbl = m.group(1)
                     affected = 0
@@ -445,17 +739,13 @@ class IntegratedMiniDBCLI:
     def _simple_sql_execution(self, sql: str):
         """简化的SQL执行（当A阶段不可用时）"""
         # 基于关键字的简单SQL识别和执行
-        sql_upper = sql.upper().strip()
+        # ★ 修改：只对语句开头做大写转换，按首个关键字查表分发，再校验完整前缀
+        head = sql.lstrip()[:12].upper()
+        entry = self._simple_dispatch.get(head[:6])
 
         try:
-            if sql_upper.startswith('CREATE TABLE'):
-                self._execute_simple_create(sql)
-            elif sql_upper.startswith('INSERT INTO'):
-                self._execute_simple_insert(sql)
-            elif sql_upper.startswith('SELECT'):
-                self._execute_simple_select(sql)
-            elif sql_upper.startswith('DELETE'):
-                self._execute_simple_delete(sql)
+            if entry is not None and head.startswith(entry[0]):
+                entry[1](sql)
             else:
                 print(f"不支持的SQL类型: {sql}")
         except Exception as e:
@@ -464,8 +754,7 @@ class IntegratedMiniDBCLI:
     def _execute_simple_create(self, sql: str):
         """简化的CREATE TABLE执行"""
         # 简单解析CREATE TABLE语句
-        import re
-        match = re.match(r'CREATE\s+TABLE\s+(\w+)\s*\((.*)\)', sql, re.IGNORECASE)
+        match = _CREATE_RE.match(sql)
         if not match:
             raise ValueError("CREATE TABLE语法错误")
 
@@ -498,8 +787,7 @@ class IntegratedMiniDBCLI:
 
     def _execute_simple_insert(self, sql: str):
         """简化的INSERT执行"""
-        import re
-        match = re.match(r'INSERT\s+INTO\s+(\w+)\s+VALUES\s*\((.*)\)', sql, re.IGNORECASE)
+        match = _INSERT_RE.match(sql)
         if not match:
             raise ValueError("INSERT语法错误")
 
@@ -539,10 +827,8 @@ class IntegratedMiniDBCLI:
 
     def _execute_simple_select(self, sql: str):
         """简化的SELECT执行"""
-        import re
-
         # 基本SELECT解析
-        match = re.match(r'SELECT\s+(.*?)\s+FROM\s+(\w+)(?:\s+WHERE\s+(.*))?', sql, re.IGNORECASE | re.DOTALL)
+        match = _SELECT_RE.match(sql)
         if not match:
             raise ValueError("SELECT语法错误")
 
@@ -554,46 +840,47 @@ class IntegratedMiniDBCLI:
         if not self.catalog_manager.table_exists(table_name):
             raise ValueError(f"表不存在: {table_name}")
 
-        # 获取数据
-        results = []
-        for row in self.storage_engine.seq_scan(table_name):
-            # 简化的WHERE处理
-            if where_clause:
-                if not self._simple_where_eval(row, where_clause):
-                    continue
+        # ★ 修改：先过滤出存活行，再只为存活行构造投影字典；投影列只解析一次
+        rows = self.storage_engine.seq_scan(table_name)
+        if where_clause:
+            predicate = self._compile_simple_where(where_clause)
+            rows = [row for row in rows if predicate(row)]
 
-            # 列投影
-            if columns_str == '*':
-                results.append(row)
-            else:
-                projected = {}
-                for col in columns_str.split(','):
-                    col = col.strip()
-                    if col in row:
-                        projected[col] = row[col]
-                results.append(projected)
+        if columns_str == '*':
+            results = list(rows)
+        else:
+            rows = list(rows)
+            # 同一张表的行列集合相同，按首行过滤掉不存在的列后生成投影函数
+            columns = [col.strip() for col in columns_str.split(',')]
+            if rows:
+                columns = [col for col in columns if col in rows[0]]
+            project = _row_builder(tuple(columns))
+            results = [project(row) for row in rows]
 
         # 显示结果
         self._display_execution_results(results)
 
     def _simple_where_eval(self, row: dict, where_clause: str) -> bool:
         """简化的WHERE条件评估"""
-        # 非常简化的实现，仅支持基本比较
-        import re
+        return self._compile_simple_where(where_clause)(row)
 
-        # 支持格式: column op value
-        match = re.match(r'(\w+)\s*([><=!]+)\s*(.+)', where_clause.strip(), re.IGNORECASE)
+    @staticmethod
+    def _compile_simple_where(where_clause: str):
+        """
+        ★ 新增：把简化WHERE（column op value）解析一次，编译成逐行调用的谓词
+
+        扫描时不再对每一行重复做正则匹配、比较值解析和运算符分支判断。
+        """
+        # 非常简化的实现，仅支持基本比较
+        match = _WHERE_RE.match(where_clause.strip())
         if not match:
-            return True  # 无法解析就返回True
+            return lambda row: True  # 无法解析就返回True
 
         column = match.group(1)
-        operator = match.group(2)
+        op = _SIMPLE_WHERE_OPS.get(match.group(2))
         value_str = match.group(3).strip()
-
-        if column not in row:
-            return False
-
-        row_value = row[column]
+        if op is None:
+            return lambda row: False
 
         # 解析比较值
         if value_str.startswith("'") and value_str.endswith("'"):
@@ -604,30 +891,19 @@ class IntegratedMiniDBCLI:
             except ValueError:
                 compare_value = value_str
 
-        # 执行比较
-        try:
-            if operator == '=':
-                return row_value == compare_value
-            elif operator == '>':
-                return row_value > compare_value
-            elif operator == '<':
-                return row_value < compare_value
-            elif operator == '>=':
-                return row_value >= compare_value
-            elif operator == '<=':
-                return row_value <= compare_value
-            elif operator in ['!=', '<>']:
-                return row_value != compare_value
-        except TypeError:
-            return False
+        def predicate(row: dict) -> bool:
+            if column not in row:
+                return False
+            try:
+                return op(row[column], compare_value)
+            except TypeError:
+                return False
 
-        return False
+        return predicate
 
     def _execute_simple_delete(self, sql: str):
         """简化的DELETE执行"""
-        import re
-
-        match = re.match(r'DELETE\s+FROM\s+(\w+)(?:\s+WHERE\s+(.*))?', sql, re.IGNORECASE)
+        match = _DELETE_RE.match(sql)
         if not match:
             raise ValueError("DELETE语法错误")
 
@@ -638,9 +914,9 @@ class IntegratedMiniDBCLI:
         if not self.catalog_manager.table_exists(table_name):
             raise ValueError(f"表不存在: {table_name}")
 
-        # 构造删除条件
+        # 构造删除条件（★ 修改：WHERE只解析一次）
         if where_clause:
-            predicate = lambda row: self._simple_where_eval(row, where_clause)
+            predicate = self._compile_simple_where(where_clause)
         else:
             predicate = lambda row: True
 
@@ -664,8 +940,7 @@ class IntegratedMiniDBCLI:
 
             # 语法分析
             print("\n【语法分析】")
-            parser = Parser()
-            ast = parser.parse(sql)
+            ast = self.parser.parse(sql)
             print(format_ast(ast))
 
             # 语义分析
@@ -683,13 +958,12 @@ class IntegratedMiniDBCLI:
 
     def _set_show_mode(self, mode: str):
         """设置显示模式"""
-        valid_modes = ['result', 'token', 'ast', 'semantic', 'plan', 'all']
-        if mode in valid_modes:
+        if mode in _SHOW_MODES:
             self.show_mode = mode
             print(f"显示模式已设置为: {mode}")
         else:
             print(f"无效模式: {mode}")
-            print(f"可用模式: {', '.join(valid_modes)}")
+            print(f"可用模式: {', '.join(_SHOW_MODE_NAMES)}")
 
     def _demo_four_views(self):
         """四视图演示"""
@@ -754,6 +1028,7 @@ class IntegratedMiniDBCLI:
                 return
 
             print(f"\n📋 用户表列表 ({len(tables)}个):")
+            from tabulate import tabulate
 
             table_info = []
             for table_name in tables:
@@ -766,7 +1041,7 @@ class IntegratedMiniDBCLI:
                     len(cols),
                     meta.row_count if meta else 0,
                     len(idxs),
-                    time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(meta.created_time)) if meta else "N/A"
+                    meta.created_time_str if meta else "N/A"
                 ])
 
             headers = ['表名', '列数', '行数', '索引数', '创建时间']
@@ -786,10 +1061,12 @@ class IntegratedMiniDBCLI:
             print(f"表不存在: {table_name}")
             return
 
+        from tabulate import tabulate
+
         print(f"\n📊 表结构: {table_name}")
         print(f"表ID: {schema['table_id']}")
         print(f"行数: {schema['row_count']}")
-        print(f"创建时间: {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(schema['created_time']))}")
+        print(f"创建时间: {schema['created_time_str']}")
 
         # 显示列信息
         print(f"\n📝 列信息 ({len(schema['columns'])}列):")
@@ -814,89 +1091,51 @@ class IntegratedMiniDBCLI:
             print(tabulate(idx_data, headers=['索引名', '列名', '类型'], tablefmt='grid'))
 
     def _show_stats(self):
-        """显示系统统计"""
-        print("\n📈 系统统计信息:")
+        """显示系统统计（★ 先拼接再一次性写出）"""
+        lines = ["\n📈 系统统计信息:"]
 
         if STORAGE_ENGINE_AVAILABLE:
             # 数据库统计
             db_stats = self.catalog_manager.get_database_stats()
             storage_stats = self.storage_engine.get_stats()
 
-            print(f"\n📊 数据库统计:")
-            print(f"   用户表数: {db_stats['total_tables']}")
-            print(f"   总行数: {db_stats['total_rows']}")
-            print(f"   总索引数: {db_stats['total_indexes']}")
-            print(f"   系统表数: {db_stats['system_tables']}")
+            lines.append(f"\n📊 数据库统计:")
+            lines.append(f"   用户表数: {db_stats['total_tables']}")
+            lines.append(f"   总行数: {db_stats['total_rows']}")
+            lines.append(f"   总索引数: {db_stats['total_indexes']}")
+            lines.append(f"   系统表数: {db_stats['system_tables']}")
 
-            print(f"\n💾 存储引擎统计:")
-            print(f"   数据目录: {storage_stats['data_directory']}")
+            lines.append(f"\n💾 存储引擎统计:")
+            lines.append(f"   数据目录: {storage_stats['data_directory']}")
 
             buffer_stats = storage_stats['buffer_pool']
-            print(f"\n🔧 缓冲池统计:")
-            print(f"   策略: {buffer_stats['policy']}")
-            print(f"   容量: {buffer_stats['capacity']} 页")
-            print(f"   已缓存: {buffer_stats['cached_pages']} 页")
-            print(f"   脏页数: {buffer_stats['dirty_pages']} 页")
-            print(f"   命中率: {buffer_stats['hit_ratio_pct']}%")
-            print(f"   总请求: {buffer_stats['total_requests']} 次")
-            print(f"   淘汰次数: {buffer_stats['evictions']} 次")
+            lines.append(f"\n🔧 缓冲池统计:")
+            lines.append(f"   策略: {buffer_stats['policy']}")
+            lines.append(f"   容量: {buffer_stats['capacity']} 页")
+            lines.append(f"   已缓存: {buffer_stats['cached_pages']} 页")
+            lines.append(f"   脏页数: {buffer_stats['dirty_pages']} 页")
+            lines.append(f"   命中率: {buffer_stats['hit_ratio_pct']}%")
+            lines.append(f"   总请求: {buffer_stats['total_requests']} 次")
+            lines.append(f"   淘汰次数: {buffer_stats['evictions']} 次")
         else:
-            print("   存储引擎不可用")
+            lines.append("   存储引擎不可用")
 
         # 组件状态
-        print(f"\n🔧 组件状态:")
-        print(f"   A阶段SQL编译器: {'✓' if SQL_COMPILER_AVAILABLE else '❌'}")
-        print(f"   B+C阶段存储引擎: {'✓' if STORAGE_ENGINE_AVAILABLE else '❌'}")
-        print(f"   完整集成: {'✓' if self.fully_integrated else '❌'}")
-        print(f"   当前显示模式: {self.show_mode}")
+        lines.append(f"\n🔧 组件状态:")
+        lines.append(f"   A阶段SQL编译器: {'✓' if SQL_COMPILER_AVAILABLE else '❌'}")
+        lines.append(f"   B+C阶段存储引擎: {'✓' if STORAGE_ENGINE_AVAILABLE else '❌'}")
+        lines.append(f"   完整集成: {'✓' if self.fully_integrated else '❌'}")
+        lines.append(f"   当前显示模式: {self.show_mode}")
+
+        sys.stdout.write("\n".join(lines) + "\n")
 
     def _show_detailed_help(self):
         """显示详细帮助"""
-        print("""
-=== MiniDB 完整集成版帮助 ===
-
-   系统概述:
-   这是一个完整的SQL数据库系统，集成了：
-   - A阶段: SQL编译器 (词法/语法/语义/计划)
-   - B阶段: 存储引擎 (页面/文件/缓冲/持久化)  
-   - C阶段: 执行引擎 (算子/目录)
-
-   系统命令:
-   .help              - 显示此帮助
-   .exit              - 退出系统
-   .tables            - 列出所有表
-   .schema <table>    - 显示表结构
-   .stats             - 显示系统统计
-
-    调试命令:
-   .show <mode>       - 设置显示模式
-   .fourview          - 四视图演示
-   .demo              - 完整功能演示
-
-    显示模式:
-   result   - 显示执行结果 (默认)
-   token    - 显示词法分析
-   ast      - 显示语法分析
-   semantic - 显示语义分析  
-   plan     - 显示执行计划
-   all      - 显示所有阶段
-
-    支持的SQL:
-   CREATE TABLE table_name(col1 INT, col2 VARCHAR(n));
-   INSERT INTO table_name VALUES(val1, val2);
-   SELECT col1,col2 FROM table_name WHERE condition;
-   DELETE FROM table_name WHERE condition;
-
-    使用建议:
-   1. 先用 .demo 查看完整功能演示
-   2. 用 .show all 切换到四视图模式
-   3. 输入SQL查看完整编译和执行过程
-   4. 用 .tables 和 .schema 查看数据库状态
-""")
+        sys.stdout.write(_HELP_TEXT)
 
     def _cleanup(self):
         """清理资源"""
-        if STORAGE_ENGINE_AVAILABLE and hasattr(self, 'storage_engine'):
+        if STORAGE_ENGINE_AVAILABLE and 'storage_engine' in self.__dict__:
             print("正在保存数据...")
             self.storage_engine.close()
             print("数据已保存")
@@ -910,15 +1149,42 @@ class IntegratedMiniDBCLI:
                 readline.read_history_file(hist_file)
             except Exception:
                 pass
+            # ★ 新增：Tab补全（点命令 + SQL关键字）
+            readline.set_completer(self._complete)
+            if 'libedit' in (readline.__doc__ or ''):
+                readline.parse_and_bind('bind ^I rl_complete')
+            else:
+                readline.parse_and_bind('tab: complete')
             try:
                 import atexit
-                atexit.register(lambda: readline.write_history_file(hist_file))
+                atexit.register(self._save_history, readline, hist_file)
             except Exception:
                 pass
         except Exception:
             # 没有 readline 也不报错，功能降级
             pass
 
+    def _complete(self, text: str, state: int):
+        """readline补全回调：state 从0递增取第state个候选，无更多候选时返回None"""
+        if state == 0:
+            if text.startswith('.'):
+                candidates = self._cmds
+            else:
+                text = text.upper()
+                candidates = Lexer.KEYWORDS if SQL_COMPILER_AVAILABLE else ()
+            self._completion_matches = sorted(c for c in candidates if c.startswith(text))
+        if state < len(self._completion_matches):
+            return self._completion_matches[state]
+        return None
+
+    @staticmethod
+    def _save_history(readline, hist_file: str):
+        """退出时保存历史；数据目录未创建（存储引擎从未使用）时静默跳过"""
+        try:
+            readline.write_history_file(hist_file)
+        except OSError:
+            pass
+
     # ★ 新增：去除不可见空白、NBSP、零宽字符等
     def _normalize_sql(self, s: str) -> str:
         bad = [
@@ -936,24 +1202,26 @@ class IntegratedMiniDBCLI:
     def _is_complete_statement(self, buf: str) -> bool:
         if ';' not in buf:
             return False
-        # 括号配平（不考虑引号内复杂情况，够用）
+        # 括号配平
+        # ★ 修改：由正则一次扫出引号段与括号（引号段、注释整体跳过），不再逐字符循环
+        # ★ 修复：引号或注释未闭合时，末尾的 ';' 在字面量/注释内，语句尚未结束
         depth = 0
-        in_single = False
-        in_double = False
-        i = 0
-        while i < len(buf):
-            c = buf[i]
-            if c == "'" and not in_double:
-                in_single = not in_single
-            elif c == '"' and not in_single:
-                in_double = not in_double
-            elif not in_single and not in_double:
-                if c == '(':
-                    depth += 1
-                elif c == ')':
-                    depth -= 1
-            i += 1
-        return depth == 0 and buf.strip().endswith(';')
+        for m in _QUOTE_OR_PAREN_RE.finditer(buf):
+            if m.lastgroup == 'open':
+                return False
+            part = m.group()
+            if part == '(':
+                depth += 1
+            elif part == ')':
+                depth -= 1
+        # ★ 修复：语句末尾的注释（如 "SELECT 1; -- note"）不影响以 ';' 结尾的判断
+        return depth == 0 and self._strip_comments(buf).rstrip().endswith(';')
+
+    # ★ 新增：去掉注释（引号段原样保留，其中的 -- 或 /* 不当作注释）
+    @staticmethod
+    def _strip_comments(buf: str) -> str:
+        return _QUOTE_OR_PAREN_RE.sub(
+            lambda m: ' ' if m.group()[:2] in ('--', '/*') else m.group(), buf)
 
         # ★ 新增：读取一条（可能跨多行的）SQL
 
@@ -967,16 +1235,19 @@ class IntegratedMiniDBCLI:
                 line = ""
 
             # ★ 新增：首行就是点命令，直接返回，不要求分号
-            if not buf and line.strip().startswith('.'):
-                return line.strip()
+            if not buf:
+                stripped = line.strip()
+                if stripped[:1] == '.':
+                    return stripped
 
             # 累加原始文本（保留换行以便括号判断）
             buf = (buf + "\n" + line) if buf else line
 
-            # 先做一次轻度归一化做判断，但执行前再做一遍
-            check = self._normalize_sql(buf)
-            if self._is_complete_statement(check):
-                return self._normalize_sql(buf)
+            # ★ 修复：在保留换行的原始文本上判断（归一化会合并换行，使 -- 注释吞掉后续内容）；
+            #   当前行已输入完毕，补上换行使行尾的 -- 注释闭合
+            if self._is_complete_statement(buf + "\n"):
+                # 注释不参与执行，去掉后再归一化
+                return self._normalize_sql(self._strip_comments(buf + "\n"))
             # 否则继续读下一行
 
 
@@ -989,17 +1260,26 @@ def main():
 
     parser.add_argument('--data-dir', '-d', default='minidb_data',
                         help='数据目录 (默认: minidb_data)')
-    parser.add_argument('--show', choices=['result', 'token', 'ast', 'semantic', 'plan', 'all'],
+    parser.add_argument('--show', choices=_SHOW_MODE_NAMES,
                         default='result', help='显示模式')
+    parser.add_argument('--file', '-f', help='执行SQL脚本文件后退出')
+    parser.add_argument('--verbose-ast', action='store_true', help='语法分析阶段额外输出AST的JSON')
     parser.add_argument('--version', action='version',
                         version='MiniDB 完整集成版 v1.0 (A+B+C阶段)')
 
     args = parser.parse_args()
 
     try:
-        cli = IntegratedMiniDBCLI(args.data_dir)
+        cli = IntegratedMiniDBCLI(args.data_dir, verbose_ast=args.verbose_ast)
         cli.show_mode = args.show
-        cli.run_interactive()
+        if args.file:
+            if cli.fully_integrated:
+                cli.run_file(args.file)
+            else:
+                print("文件模式需要完整集成")
+            cli._cleanup()
+        else:
+            cli.run_interactive()
 
     except KeyboardInterrupt:
         print("\n程序被用户中断")
@@ -24,7 +24,8 @@ GROUP BY分组聚合算子 - S6核心组件
     {"func": "COUNT", "column": "*", "alias": "cnt"},
     {"func": "AVG", "column": "salary", "alias": "avg_sal"}
   ],
-  "having": {"type": "compare", "left": "cnt", "op": ">", "right": 5}  # 可选
+  "having": {"type": "compare", "left": "cnt", "op": ">", "right": 5},  # 可选
+  "pre_sorted": true  # ★ 可选：输入已按分组键排序时走流式聚合
 }
 
 【聚合函数语义】
@@ -40,17 +41,39 @@ GROUP BY分组聚合算子 - S6核心组件
 
 from typing import Dict, List, Any, Iterator, Optional, Union
 from abc import ABC, abstractmethod
+from itertools import chain, groupby, islice
+import operator
+from operator import itemgetter
 
 from src.sql.expressions import ExpressionEvaluator, ExpressionError
 
+# ★ 新增：分组聚合每批处理的行数（批内先按分组收集值，再整批累加）
+_BATCH_SIZE = 1024
+
+# ★ 新增：可编译为直接比较的 HAVING 比较运算符（与 ExpressionEvaluator 支持的写法一致）
+_HAVING_OPS = {
+    '=': operator.eq, '==': operator.eq,
+    '!=': operator.ne, '<>': operator.ne, '≠': operator.ne,
+    '<': operator.lt, '<=': operator.le,
+    '>': operator.gt, '>=': operator.ge,
+}
+
 
 class AggregateFunction:
     """聚合函数计算器"""
 
+    # ★ 新增：每个分组的每个聚合函数各一个实例，用 __slots__ 去掉实例字典，减少内存
+    __slots__ = ('func_name', 'column', 'alias', '_kind', '_batch_kernel',
+                 'count', 'count_all', 'sum_value', 'min_value', 'max_value', 'has_values')
+
     def __init__(self, func_name: str, column: str, alias: str = None):
         self.func_name = func_name.upper()
         self.column = column
         self.alias = alias or f"{func_name.lower()}_{column}"
+        # ★ 新增：累加方式在构造时确定一次（count_star / count / sum / min_max，见 _kernel_kind）
+        self._kind = _kernel_kind(self.func_name, column)
+        # ★ 新增：批量累加内核（普通函数，调用时显式传入 self）
+        self._batch_kernel = _resolve_batch_kernel(self.func_name, column)
         self.reset()
 
     def reset(self):
@@ -65,9 +88,10 @@ class AggregateFunction:
     def accumulate(self, value: Any):
         """累加一个值"""
         self.count_all += 1
+        kind = self._kind
 
         # ★ COUNT(*) 特殊处理：统计所有行包括NULL
-        if self.func_name == "COUNT" and self.column == "*":
+        if kind == "count_star":
             self.count += 1
             self.has_values = True
             return
@@ -76,22 +100,19 @@ class AggregateFunction:
         if value is None:
             return
 
+        if kind == "sum":
+            # ★ 修改：SUM/AVG 的求和与计数放在同一段直线代码里；数值直接相加，其他类型才转换
+            self.sum_value += value if isinstance(value, (int, float)) else _to_number(value, self.func_name)
+            self.count += 1
+            self.has_values = True
+            return
+
+        # COUNT(col)只需要计数非NULL值（未知函数名同样只计数）
         self.has_values = True
         self.count += 1
 
-        if self.func_name == "COUNT":
-            pass  # COUNT(col)只需要计数非NULL值
-
-        elif self.func_name in ["SUM", "AVG"]:
-            # ★ 数值类型转换和累加
-            try:
-                numeric_value = float(value) if not isinstance(value, (int, float)) else value
-                self.sum_value += numeric_value
-            except (ValueError, TypeError):
-                raise ValueError(f"Cannot apply {self.func_name} to non-numeric value: {value}")
-
-        elif self.func_name in ["MIN", "MAX"]:
-            # ★ 最值比较（支持数值和字符串）
+        if kind == "min_max":
+            # ★ MIN/MAX 最值比较（支持数值和字符串）
             if self.min_value is None:
                 self.min_value = value
                 self.max_value = value
@@ -111,6 +132,15 @@ class AggregateFunction:
                     if str_value > str_max:
                         self.max_value = value
 
+    def accumulate_batch(self, values: List[Any]):
+        """
+        ★ 新增：批量累加一组值，结果与逐个调用 accumulate 相同
+
+        具体内核在构造时按函数名选定一次（见 _resolve_batch_kernel），批内不再逐值判断函数名。
+        """
+        if values:
+            self._batch_kernel(self, _ColumnBatch(values))
+
     def get_result(self) -> Any:
         """获取聚合结果"""
         if self.func_name == "COUNT":
@@ -139,6 +169,264 @@ class AggregateFunction:
             raise ValueError(f"Unsupported aggregate function: {self.func_name}")
 
 
+# ========== ★ 新增：批量累加内核 ==========
+# 每个内核对一个分组的一批值做一次紧凑循环，计数取列表长度，求和交给内置 sum()，
+# 结果与对同一批值逐个调用 AggregateFunction.accumulate 相同。
+
+_UNSET = object()
+
+# 按 SUM/AVG 规则无需转换、原样参与求和的类型
+_NUMERIC_TYPES = frozenset((int, float, bool))
+
+
+class _ColumnBatch:
+    """
+    一个分组在一批内某一列的取值
+
+    非NULL值、数值化结果和求和都在首次用到时计算一次，
+    同一列上的 COUNT/SUM/AVG 共享这些中间结果，不再各自扫描一遍。
+    """
+
+    __slots__ = ('values', '_non_null', '_numeric', '_sum_start', '_sum_result')
+
+    def __init__(self, values: List[Any]):
+        self.values = values
+        self._non_null = None
+        self._numeric = None
+        self._sum_start = _UNSET
+        self._sum_result = None
+
+    def non_null(self) -> List[Any]:
+        """非NULL值"""
+        if self._non_null is None:
+            self._non_null = [v for v in self.values if v is not None]
+        return self._non_null
+
+    def non_null_count(self) -> int:
+        """非NULL值个数"""
+        if self._non_null is not None:
+            return len(self._non_null)
+        return len(self.values) - self.values.count(None)
+
+    def numeric(self, func_name: str) -> List[Any]:
+        """
+        非NULL值按 SUM/AVG 规则转换后的数值
+
+        ★ 修改：先在C层检查整批值的类型，全是数值时原样使用，不再逐值判断和转换；
+        只有含字符串等其他类型时才整批转换一次。
+        """
+        if self._numeric is None:
+            non_null = self.non_null()
+            if _NUMERIC_TYPES.issuperset(map(type, non_null)):
+                self._numeric = non_null
+            else:
+                try:
+                    self._numeric = [v if isinstance(v, (int, float)) else float(v) for v in non_null]
+                except (ValueError, TypeError):
+                    bad = next(v for v in non_null if not _is_numeric_like(v))
+                    raise ValueError(f"Cannot apply {func_name} to non-numeric value: {bad}")
+        return self._numeric
+
+    def sum_from(self, start: Any, func_name: str) -> Any:
+        """
+        从 start 起累加本批数值
+
+        同列的 SUM/AVG 状态同步推进，起点是同一个对象时直接复用上一次的结果，
+        保证与各自求和的结果（包括浮点舍入）完全一致。
+        """
+        if start is not self._sum_start:
+            self._sum_result = sum(self.numeric(func_name), start)
+            self._sum_start = start
+        return self._sum_result
+
+
+def _batch_count_star(agg: AggregateFunction, batch: _ColumnBatch):
+    """COUNT(*)：统计所有行包括NULL"""
+    n = len(batch.values)
+    agg.count_all += n
+    agg.count += n
+    agg.has_values = True
+
+
+def _batch_count(agg: AggregateFunction, batch: _ColumnBatch):
+    """COUNT(col)：只统计非NULL值（未知函数名在累加阶段同样只计数）"""
+    agg.count_all += len(batch.values)
+    non_null = batch.non_null_count()
+    if non_null:
+        agg.has_values = True
+        agg.count += non_null
+
+
+def _batch_sum(agg: AggregateFunction, batch: _ColumnBatch):
+    """SUM/AVG：过滤NULL、统一转换为数值后用内置 sum() 累加"""
+    agg.count_all += len(batch.values)
+    non_null = len(batch.non_null())
+    if not non_null:
+        return
+
+    agg.has_values = True
+    agg.count += non_null
+    agg.sum_value = batch.sum_from(agg.sum_value, agg.func_name)
+
+
+def _batch_min_max(agg: AggregateFunction, batch: _ColumnBatch):
+    """
+    MIN/MAX：用内置 min()/max() 在C层折叠整批值
+
+    折叠时把当前最值放在最前面，比较顺序与逐个累加完全相同；只要出现类型不可比较
+    （TypeError），本批就退回逐个累加，由 accumulate 按原语义做字符串比较回退。
+    """
+    non_null = batch.non_null()
+    if not non_null:
+        agg.count_all += len(batch.values)
+        return
+
+    try:
+        if agg.min_value is None:
+            new_min = min(non_null)
+            new_max = max(non_null)
+        else:
+            new_min = min(chain((agg.min_value,), non_null))
+            new_max = max(chain((agg.max_value,), non_null))
+    except TypeError:
+        for value in batch.values:
+            agg.accumulate(value)
+        return
+
+    agg.count_all += len(batch.values)
+    agg.count += len(non_null)
+    agg.has_values = True
+    agg.min_value = new_min
+    agg.max_value = new_max
+
+
+_BATCH_KERNELS = {
+    "COUNT": _batch_count,
+    "SUM": _batch_sum,
+    "AVG": _batch_sum,
+    "MIN": _batch_min_max,
+    "MAX": _batch_min_max,
+}
+
+
+def _resolve_batch_kernel(func_name: str, column: str):
+    """按函数名（已大写）和列选择批量累加内核"""
+    if func_name == "COUNT" and column == "*":
+        return _batch_count_star
+    return _BATCH_KERNELS.get(func_name, _batch_count)
+
+
+# ========== ★ 新增：融合的逐行累加函数（运行时生成） ==========
+# 一个计划的聚合函数组合在构造时就已确定：按组合生成一个函数，把每行对所有聚合函数的更新
+# 直接展开成语句（COUNT/SUM/AVG 内联，MIN/MAX 调用 accumulate 保留字符串回退语义），
+# 每列每行只取一次值。生成的语句与 AggregateFunction.accumulate 的对应分支逐句一致。
+
+_ROW_KERNEL_CACHE = {}
+_ROW_KERNEL_CACHE_MAXSIZE = 256
+
+
+def _kernel_kind(func_name: str, column: str) -> str:
+    """聚合函数的累加方式（accumulate 的分支和融合逐行函数的展开都按它选择）"""
+    if func_name == "COUNT" and column == "*":
+        return "count_star"
+    if func_name in ("SUM", "AVG"):
+        return "sum"
+    if func_name in ("MIN", "MAX"):
+        return "min_max"
+    return "count"  # COUNT(col)，以及累加阶段只计数的未知函数名
+
+
+def _row_kernel(kinds: tuple):
+    """
+    返回融合的逐行累加函数 _fold(keys, columns, groups, new_group)，按聚合函数组合缓存
+
+    kinds: 每个聚合函数的 (展开方式, 列槽位)，列槽位是 columns 中的下标，* 列为 None
+    """
+    fn = _ROW_KERNEL_CACHE.get(kinds)
+    if fn is None:
+        slots = sorted({slot for _, slot in kinds if slot is not None})
+        lines = ["def _fold(keys, columns, groups, new_group):"]
+        if slots:
+            lines.append("    " + "".join(f"c{j}, " for j in range(slots[-1] + 1)) + "= columns")
+        lines += [
+            "    for i, key in enumerate(keys):",
+            "        aggs = groups.get(key)",
+            "        if aggs is None:",
+            "            aggs = groups[key] = new_group()",
+            "        " + "".join(f"a{k}, " for k in range(len(kinds))) + "= aggs",
+        ]
+
+        loaded = set()
+        for k, (kind, slot) in enumerate(kinds):
+            a = f"a{k}"
+            if slot is not None and slot not in loaded:
+                lines.append(f"        v{slot} = c{slot}[i]")
+                loaded.add(slot)
+            value = "1" if slot is None else f"v{slot}"  # * 列每行传入非NULL值1
+
+            if kind == "min_max":
+                lines.append(f"        {a}.accumulate({value})")
+                continue
+
+            lines.append(f"        {a}.count_all += 1")
+            if kind == "count_star" or slot is None:
+                indent = "        "
+            else:
+                lines.append(f"        if {value} is not None:")
+                indent = "            "
+            lines += [f"{indent}{a}.has_values = True", f"{indent}{a}.count += 1"]
+            if kind == "sum" and slot is None:
+                lines.append(f"{indent}{a}.sum_value += 1")
+            elif kind == "sum":
+                lines.append(f"{indent}{a}.sum_value += {value} if isinstance({value}, (int, float)) "
+                             f"else _to_number({value}, {a}.func_name)")
+
+        namespace = {"_to_number": _to_number}
+        exec("\n".join(lines), namespace)
+        if len(_ROW_KERNEL_CACHE) >= _ROW_KERNEL_CACHE_MAXSIZE:
+            _ROW_KERNEL_CACHE.clear()
+        fn = _ROW_KERNEL_CACHE[kinds] = namespace["_fold"]
+    return fn
+
+
+def _to_number(value: Any, func_name: str) -> float:
+    """按 SUM/AVG 规则把非数值类型的值转换为浮点数"""
+    try:
+        return float(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Cannot apply {func_name} to non-numeric value: {value}")
+
+
+def _take_column(chunk: List[Dict[str, Any]], column: str, getter) -> List[Any]:
+    """取出一批行的某一列（行中缺少该列时按 row.get 语义补 NULL）"""
+    try:
+        return list(map(getter, chunk))
+    except KeyError:
+        return [row.get(column) for row in chunk]
+
+
+def _gather(values: List[Any], positions: List[int]) -> List[Any]:
+    """按行号从列向量中取出一个分组的值（整批同属一组时直接复用列向量，连续行号直接切片）"""
+    if len(positions) == len(values):
+        return values
+    if isinstance(positions, range):
+        return values[positions.start:positions.stop]
+    if len(positions) == 1:
+        return [values[positions[0]]]
+    return list(itemgetter(*positions)(values))
+
+
+def _is_numeric_like(value: Any) -> bool:
+    """值能否按 SUM/AVG 的规则转换为数值"""
+    if isinstance(value, (int, float)):
+        return True
+    try:
+        float(value)
+        return True
+    except (ValueError, TypeError):
+        return False
+
+
 class GroupAggregateOperator:
     """GROUP BY分组聚合算子"""
 
@@ -157,71 +445,318 @@ class GroupAggregateOperator:
         # 初始化表达式求值器（用于HAVING）
         self.expression_evaluator = ExpressionEvaluator()
 
-        # 分组存储：{group_key_tuple: {agg_alias: AggregateFunction}}
+        # ★ 新增：按别名归一化的聚合规格 [(alias, func, column)]，构造时解析一次
+        # 与按别名建字典的语义一致：同名别名以最后一个定义为准，位置保留在首次出现处
+        specs = {}
+        for agg_spec in self.aggregates:
+            func_name = agg_spec['func']
+            column = agg_spec['column']
+            alias = agg_spec.get('alias', f"{func_name.lower()}_{column}")
+            specs[alias] = (func_name, column)
+        self._agg_specs = [(alias, func_name, column) for alias, (func_name, column) in specs.items()]
+        self._aliases = list(specs)
+        self._spec_columns = [column for _, column in specs.values()]
+
+        # 分组存储：{group_key: [AggregateFunction, ...]}
+        # ★ 修改：单列分组时键直接是列值（不再每行包一层1元组），多列时为元组，全局聚合为 ()
+        # ★ 修改：每组的聚合函数按 _agg_specs 顺序存成列表，累加时不再按别名查字典
         self.groups = {}
 
+        # ★ 新增：聚合函数引用的输入列（去重，不含 *），每批各取一次组成列向量
+        self._agg_columns = [col for col in dict.fromkeys(self._spec_columns) if col != "*"]
+
+        # ★ 新增：列取值器只构造一次，批内用 map 在C层取列，不再逐行按列名 row.get
+        self._column_getters = {col: itemgetter(col) for col in self._agg_columns}
+        self._group_key_getter = itemgetter(*self.group_keys) if self.group_keys else None
+
+        # ★ 新增：HAVING 判定函数（简单比较在构造时编译，其余交给表达式求值器）
+        self._having = self._compile_having()
+
+        # ★ 新增：每个聚合函数的累加方式；COUNT(*) 在批量路径中直接按行数计数
+        self._spec_kinds = [_kernel_kind(func_name.upper(), column) for _, func_name, column in self._agg_specs]
+
+        # ★ 新增：按聚合函数组合生成的融合逐行累加函数（高基数分组的批次使用）
+        slots = {col: j for j, col in enumerate(self._agg_columns)}
+        self._row_kernel = _row_kernel(tuple(
+            (kind, slots.get(column)) for kind, column in zip(self._spec_kinds, self._spec_columns)
+        ))
+
     def execute(self, child_results: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
         """执行分组聚合"""
+        # ★ 新增：输入已按分组键有序时走流式聚合，不建分组哈希表
+        if self.plan.get('pre_sorted'):
+            yield from self._execute_pre_sorted(child_results)
+            return
+
+        # ★ 新增：无GROUP BY的全局聚合只有一组，不必逐行计算分组键和查分组表
+        if not self.group_keys:
+            yield from self._execute_global(child_results)
+            return
+
         # ★ 第一阶段：分组和聚合计算
         self._perform_grouping_and_aggregation(child_results)
 
         # ★ 第二阶段：生成结果并应用HAVING过滤
         for result_row in self._generate_results():
-            # HAVING过滤
-            if self.having_condition:
-                try:
-                    if not self.expression_evaluator.evaluate(self.having_condition, result_row):
-                        continue
-                except ExpressionError:
-                    continue  # HAVING条件失败，跳过该组
+            if self._passes_having(result_row):
+                yield result_row
 
-            yield result_row
+    def _passes_having(self, result_row: Dict[str, Any]) -> bool:
+        """HAVING过滤"""
+        if self.having_condition:
+            try:
+                if not self._having(result_row):
+                    return False
+            except ExpressionError:
+                return False  # HAVING条件失败，跳过该组
+        return True
+
+    def _compile_having(self):
+        """
+        ★ 新增：把 HAVING 条件编译为判定函数
+
+        形如 {"type": "compare", "left": <聚合别名>, "op": ">", "right": <数值常量>} 的条件
+        编译为直接比较：聚合结果是普通 int/float 时直接用 operator 比较，
+        其他情况（NULL、字符串等需要类型规范化的值）仍交给 ExpressionEvaluator，语义不变。
+        """
+        condition = self.having_condition
+        evaluate = self.expression_evaluator.evaluate
+
+        if (isinstance(condition, dict) and condition.get("type") == "compare"
+                and condition.get("op") in _HAVING_OPS
+                and type(condition.get("right")) in (int, float)
+                and condition.get("left") in self._aliases):
+            alias = condition["left"]
+            constant = condition["right"]
+            compare = _HAVING_OPS[condition["op"]]
+
+            def having(result_row):
+                value = result_row[alias]
+                if type(value) in (int, float):
+                    return compare(value, constant)
+                return evaluate(condition, result_row)
+
+            return having
+
+        return lambda result_row: evaluate(condition, result_row)
+
+    def _execute_global(self, rows: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        ★ 新增：全局聚合（无GROUP BY）
+
+        唯一的一组聚合函数直接持有，每批整列交给聚合函数累加，没有逐行的分组键和哈希查找。
+        与分组路径一样，没有输入行时不输出结果。
+        """
+        agg_funcs = self.groups.get(())
+
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, _BATCH_SIZE))
+            if not chunk:
+                break
+
+            if agg_funcs is None:
+                agg_funcs = self.groups[()] = self._new_group_aggregates()
+
+            col_values = {col: _take_column(chunk, col, getter)
+                          for col, getter in self._column_getters.items()}
+            try:
+                self._accumulate_group(agg_funcs, col_values, range(len(chunk)))
+            except ValueError:
+                self._replay_rows(chunk)
+                raise
+
+        if agg_funcs is not None:
+            result_row = self._result_row((), agg_funcs)
+            if self._passes_having(result_row):
+                yield result_row
+
+    def _execute_pre_sorted(self, rows: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        ★ 新增：流式分组聚合（计划带 pre_sorted 提示）
+
+        输入已按分组键排序，相同分组键的行连续出现：分组键变化时立即输出上一组的结果，
+        只保留当前一组的聚合状态，内存占用与分组数无关。输入实际无序时同一分组会被输出多次。
+        """
+        current_key = _UNSET
+        current_aggs = None
+
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, _BATCH_SIZE))
+            if not chunk:
+                break
+
+            col_values = {col: _take_column(chunk, col, getter)
+                          for col, getter in self._column_getters.items()}
+
+            start = 0
+            try:
+                for group_key, run in groupby(self._group_keys_of(chunk)):
+                    stop = start + sum(1 for _ in run)
+                    if current_aggs is None or group_key != current_key:
+                        if current_aggs is not None:
+                            result_row = self._result_row(current_key, current_aggs)
+                            if self._passes_having(result_row):
+                                yield result_row
+                        current_key = group_key
+                        current_aggs = self._new_group_aggregates()
+                    self._accumulate_group(current_aggs, col_values, range(start, stop))
+                    start = stop
+            except ValueError:
+                self._replay_rows(chunk)
+                raise
+
+        if current_aggs is not None:
+            result_row = self._result_row(current_key, current_aggs)
+            if self._passes_having(result_row):
+                yield result_row
 
     def _perform_grouping_and_aggregation(self, rows: Iterator[Dict[str, Any]]):
-        """执行分组和聚合计算"""
-        for row in rows:
-            # ★ 计算分组键
-            if self.group_keys:
-                # 有GROUP BY列：提取分组键值
-                group_key = tuple(row.get(col) for col in self.group_keys)
-            else:
-                # ★ 无GROUP BY：全局聚合，使用空元组作为唯一分组
-                group_key = ()
-
-            # 为该分组初始化聚合函数
-            if group_key not in self.groups:
-                self.groups[group_key] = {}
-                for agg_spec in self.aggregates:
-                    func_name = agg_spec['func']
-                    column = agg_spec['column']
-                    alias = agg_spec.get('alias', f"{func_name.lower()}_{column}")
-                    self.groups[group_key][alias] = AggregateFunction(func_name, column, alias)
-
-            # 对该行应用所有聚合函数
-            for alias, agg_func in self.groups[group_key].items():
-                if agg_func.column == "*":
-                    # COUNT(*) 特殊处理
-                    agg_func.accumulate(1)  # 传入非NULL值让其计数
+        """
+        执行分组和聚合计算
+
+        ★ 修改：按批处理 —— 每批 _BATCH_SIZE 行先按分组键收集，再对每个分组的每个聚合函数
+        整批调用 accumulate_batch，把逐行逐函数的方法调用换成C层的列表推导/内置函数循环。
+        """
+        rows = iter(rows)
+        while True:
+            chunk = list(islice(rows, _BATCH_SIZE))
+            if not chunk:
+                break
+
+            # ★ 列式（SoA）取值：每个输入列在本批只取一次，之后按行号访问
+            col_values = {col: _take_column(chunk, col, getter)
+                          for col, getter in self._column_getters.items()}
+
+            keys = self._group_keys_of(chunk)
+
+            try:
+                # ★ 两级聚合：先在批内局部表中按分组收集行号，再整批并入全局分组表。
+                # 批内分组数超过行数一半时局部收集几乎不减少工作量，直接逐行并入全局表。
+                if len(set(keys)) * 2 > len(keys):
+                    self._accumulate_rows(keys, col_values)
+                    continue
+
+                # 批内按分组收集行号（新分组按首次出现顺序登记，与逐行处理一致）
+                # ★ 修改：分组在批内首次出现时查一次全局表（get 未命中才插入），
+                # 把该组的聚合函数和行号一起记下，之后不再按分组键查全局表
+                groups = self.groups
+                chunk_groups = {}
+                for i, group_key in enumerate(keys):
+                    entry = chunk_groups.get(group_key)
+                    if entry is None:
+                        agg_funcs = groups.get(group_key)
+                        if agg_funcs is None:
+                            agg_funcs = groups[group_key] = self._new_group_aggregates()
+                        chunk_groups[group_key] = (agg_funcs, [i])
+                    else:
+                        entry[1].append(i)
+
+                for agg_funcs, positions in chunk_groups.values():
+                    self._accumulate_group(agg_funcs, col_values, positions)
+            except ValueError:
+                # 批内有无法转换的值：按逐行顺序重放本批，抛出与逐行累加完全相同的错误
+                self._replay_rows(chunk)
+                raise
+
+    def _accumulate_rows(self, keys: List[Any], col_values: Dict[str, List[Any]]):
+        """逐行把一批累加到全局分组表（高基数分组时使用，循环体由 _row_kernel 生成）"""
+        columns = [col_values[col] for col in self._agg_columns]
+        self._row_kernel(keys, columns, self.groups, self._new_group_aggregates)
+
+    def _accumulate_group(self, agg_funcs: List[AggregateFunction], col_values: Dict[str, List[Any]],
+                          positions):
+        """把一批中属于同一分组的行（行号列表或连续的 range）累加到该分组的聚合函数"""
+        n = len(positions)
+        if n == 1:
+            # ★ 本批只出现一次的分组（高基数分组的常态）：直接逐值累加，免去整批中间结构的固定开销
+            i = positions[0]
+            for agg_func, column in zip(agg_funcs, self._spec_columns):
+                agg_func.accumulate(1 if column == "*" else col_values[column][i])
+            return
+
+        # ★ 同一分组内同一列只收集一次，同列的聚合函数共享中间结果
+        batches = {}
+        for agg_func, column, kind in zip(agg_funcs, self._spec_columns, self._spec_kinds):
+            if kind == "count_star":
+                # ★ COUNT(*) 只需计数：直接加上本组行数，不构造值列表
+                agg_func.count_all += n
+                agg_func.count += n
+                agg_func.has_values = True
+                continue
+
+            batch = batches.get(column)
+            if batch is None:
+                if column == "*":
+                    # 其他函数作用于 * 时每行传入非NULL值1
+                    values = [1] * n
                 else:
-                    # 普通聚合函数：从行中提取列值
-                    column_value = row.get(agg_func.column)
-                    agg_func.accumulate(column_value)
+                    values = _gather(col_values[column], positions)
+                batch = batches[column] = _ColumnBatch(values)
+            agg_func._batch_kernel(agg_func, batch)
+
+    def _group_keys_of(self, chunk: List[Dict[str, Any]]) -> List[Any]:
+        """
+        ★ 新增：按列计算一批行的分组键
+
+        单列分组直接用列值作键；多列分组由预先构造的 itemgetter 直接取出元组。
+        两种键的相等与哈希语义和原先的逐行元组键一致。
+        """
+        if not self.group_keys:
+            # ★ 无GROUP BY：全局聚合，使用空元组作为唯一分组
+            return [()] * len(chunk)
+        try:
+            return list(map(self._group_key_getter, chunk))
+        except KeyError:
+            # 个别行缺少分组列：按 row.get 语义补 NULL
+            return [self._group_key(row) for row in chunk]
+
+    def _group_key(self, row: Dict[str, Any]) -> Any:
+        """计算一行的分组键（与 _group_keys_of 的键形式相同）"""
+        if not self.group_keys:
+            return ()
+        if len(self.group_keys) == 1:
+            return row.get(self.group_keys[0])
+        return tuple(row.get(col) for col in self.group_keys)
+
+    def _new_group_aggregates(self) -> List[AggregateFunction]:
+        """为一个新分组创建聚合函数（顺序与 _agg_specs 一致）"""
+        return [AggregateFunction(func_name, column, alias) for alias, func_name, column in self._agg_specs]
+
+    def _replay_rows(self, rows: List[Dict[str, Any]]):
+        """用临时聚合状态逐行逐函数重放，用于复现逐行累加时的第一个错误"""
+        probes = {}
+        for row in rows:
+            group_key = self._group_key(row)
+            agg_funcs = probes.get(group_key)
+            if agg_funcs is None:
+                agg_funcs = probes[group_key] = self._new_group_aggregates()
+            for agg_func in agg_funcs:
+                agg_func.accumulate(1 if agg_func.column == "*" else row.get(agg_func.column))
 
     def _generate_results(self) -> Iterator[Dict[str, Any]]:
         """生成聚合结果行"""
         for group_key, agg_funcs in self.groups.items():
-            result_row = {}
+            yield self._result_row(group_key, agg_funcs)
+
+    def _result_row(self, group_key: Any, agg_funcs: List[AggregateFunction]) -> Dict[str, Any]:
+        """由分组键和该组的聚合函数生成一行结果"""
+        result_row = {}
 
-            # ★ 添加分组键到结果
+        # ★ 添加分组键到结果
+        if len(self.group_keys) == 1:
+            result_row[self.group_keys[0]] = group_key
+        else:
             for i, key_col in enumerate(self.group_keys):
                 if i < len(group_key):
                     result_row[key_col] = group_key[i]
 
-            # ★ 添加聚合结果到结果
-            for alias, agg_func in agg_funcs.items():
-                result_row[alias] = agg_func.get_result()
+        # ★ 添加聚合结果到结果
+        for alias, agg_func in zip(self._aliases, agg_funcs):
+            result_row[alias] = agg_func.get_result()
 
-            yield result_row
+        return result_row
 
 
 # ==================== 测试代码 ====================
@@ -366,6 +901,19 @@ def test_group_aggregate_operator():
     assert results3[0]["dept"] == "Engineering", f"应该是Engineering: {results3[0]}"
     print("✓ HAVING过滤验证通过")
 
+    # 测试4: 已排序输入的流式聚合
+    print("\n4. 测试流式聚合(pre_sorted):")
+    plan4 = dict(plan1, pre_sorted=True)
+    sorted_data = sorted(test_data, key=lambda r: r["dept"])
+
+    operator4 = GroupAggregateOperator(plan4)
+    results4 = list(operator4.execute(iter(sorted_data)))
+
+    print(f"流式聚合结果: {results4}")
+    assert results4 == list(GroupAggregateOperator(plan1).execute(iter(sorted_data))), "流式聚合结果应与哈希聚合一致"
+    assert not operator4.groups, "流式聚合不应保留分组哈希表"
+    print("✓ 流式聚合验证通过")
+
 
 if __name__ == "__main__":
     test_aggregate_functions()
@@ -19,6 +19,9 @@ sys_columns: 存储列的详细信息
 sys_indexes: 存储索引信息
 - index_id(INT), table_id(INT), index_name(VARCHAR), column_name(VARCHAR), index_type(VARCHAR)
 
+sys_counters: 存储ID分配器（★ 新增）
+- name(VARCHAR), value(INT)，目前有 next_table_id / next_index_id 两行
+
 【设计原则】
 - 系统表本身也通过StorageEngine存储，确保一致性
 - 内存缓存常用元数据，提升查询性能
@@ -26,17 +29,32 @@ sys_indexes: 存储索引信息
 """
 
 import time
-from typing import Dict, List, Optional, Any, Tuple
-from dataclasses import dataclass
+import atexit
+import logging
+import sys
+import weakref
+from types import MappingProxyType
+from typing import Dict, List, Optional, Any, Tuple, ClassVar, Mapping
+from dataclasses import dataclass, field
 
+log = logging.getLogger(__name__)
 
-@dataclass
+
+@dataclass(slots=True)
 class TableMetadata:
-    """表元数据"""
+    """表元数据（row_count 随DML变化，不冻结）"""
     table_id: int
     table_name: str
     created_time: int
     row_count: int = 0
+    _created_time_str: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    # ★ 新增：创建时间的格式化字符串，建表后不变，首次访问时计算并缓存
+    @property
+    def created_time_str(self) -> str:
+        if self._created_time_str is None:
+            self._created_time_str = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.created_time))
+        return self._created_time_str
 
 
 @dataclass
@@ -49,7 +67,7 @@ class ConstraintFlags:
     default_value: Any = None
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class ColumnMetadata:
     """列元数据"""
     table_id: int
@@ -61,10 +79,10 @@ class ColumnMetadata:
 
     def __post_init__(self):
         if self.constraints is None:
-            self.constraints = ConstraintFlags()
+            object.__setattr__(self, "constraints", ConstraintFlags())
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class IndexMetadata:
     """索引元数据"""
     index_id: int
@@ -81,6 +99,11 @@ class CatalogManager:
     SYS_TABLES = "sys_tables"
     SYS_COLUMNS = "sys_columns"
     SYS_INDEXES = "sys_indexes"
+    SYS_COUNTERS = "sys_counters"
+    SYS_FOREIGN_KEYS = "sys_foreign_keys"  # 由 ConstraintManager 创建与维护
+    # ★ 新增：需要从用户表列表中排除的系统表名
+    _SYS_TABLE_NAMES: ClassVar[frozenset] = frozenset({SYS_TABLES, SYS_COLUMNS, SYS_INDEXES,
+                                                      SYS_COUNTERS, SYS_FOREIGN_KEYS})
 
     def __init__(self, storage_engine):
         self.storage_engine = storage_engine
@@ -88,11 +111,34 @@ class CatalogManager:
         # 内存缓存
         self.table_cache: Dict[str, TableMetadata] = {}
         self.column_cache: Dict[int, List[ColumnMetadata]] = {}
+        # ★ 新增：table_id -> {列名: ColumnMetadata}，列查找走哈希而非线性扫描
+        self.column_by_name: Dict[int, Dict[str, ColumnMetadata]] = {}
         self.index_cache: Dict[int, List[IndexMetadata]] = {}
+        # ★ 新增：table_id -> 表名 反向索引，与 table_cache 同步维护
+        self.id_to_name: Dict[int, str] = {}
+        # ★ 新增：table_id -> sys_tables 中该行的位置 (page_id, slot_id)
+        self._sys_tables_pk_index: Dict[int, Tuple[int, int]] = {}
 
         # ID分配器
         self.next_table_id = 1
         self.next_index_id = 1
+        # ★ 新增：sys_counters 中各计数器行的位置 (page_id, slot_id)
+        self._counter_rids: Dict[str, Tuple[int, int]] = {}
+
+        # ★ 新增：目录版本号，表结构变化（注册/移除表、注册索引）时单调递增
+        self.version = 0
+
+        # ★ 新增：行数统计写回延迟，只在内存中标脏，flush() 时批量写回 sys_tables
+        self._dirty_tables: set = set()
+
+        # ★ 新增：数据库统计缓存，按 (目录版本, 行数版本) 判断是否过期
+        self._row_count_version = 0
+        self._stats_cache: Optional[Dict[str, Any]] = None
+        self._stats_cache_key: Optional[Tuple[int, int]] = None
+
+        # ★ 新增：表schema信息缓存（只读视图），目录版本变化时整体失效
+        self._schema_info_cache: Dict[str, Mapping[str, Any]] = {}
+        self._schema_info_version = -1
 
         # 初始化系统目录
         self._initialize_system_catalog()
@@ -104,6 +150,11 @@ class CatalogManager:
         self.constraint_mgr = ConstraintManager(storage_engine, self)
         self.constraint_validator = ConstraintValidator(storage_engine, self, self.constraint_mgr)
 
+        # 存储引擎关闭前、进程退出时写回未落盘的行数统计
+        # ★ 修复：退出钩子在模块级只注册一次，这里只登记实例；引擎关闭后即注销
+        storage_engine.add_close_callback(self._on_storage_close)
+        _LIVE_CATALOGS.add(self)
+
         print("CatalogManager初始化完成")
 
 
@@ -144,22 +195,38 @@ class CatalogManager:
                 {"name": "index_type", "type": "VARCHAR", "max_length": 20}
             ])
 
+        if self.SYS_COUNTERS not in existing_tables:
+            print("创建系统表: sys_counters")
+            self.storage_engine.create_table(self.SYS_COUNTERS, [
+                {"name": "name", "type": "VARCHAR", "max_length": 32},
+                {"name": "value", "type": "INT"}
+            ])
+
     def _load_catalog_cache(self):
         """从系统表加载元数据到内存缓存"""
-        print("加载系统目录到缓存...")
+        log.info("加载系统目录到缓存...")
+
+        # ★ 新增：ID分配器直接从 sys_counters 读取
+        counters = {}
+        for rid, row in self.storage_engine.seq_scan_with_rid(self.SYS_COUNTERS):
+            counters[row['name']] = row['value']
+            self._counter_rids[row['name']] = rid
 
         # 加载表信息
-        for row in self.storage_engine.seq_scan(self.SYS_TABLES):
+        for rid, row in self.storage_engine.seq_scan_with_rid(self.SYS_TABLES):
             table_meta = TableMetadata(
                 table_id=row['table_id'],
-                table_name=row['table_name'],
+                table_name=sys.intern(row['table_name']),  # ★ 修改：驻留表名，字典查找可按身份命中
                 created_time=row['created_time'],
                 row_count=row['row_count']
             )
             self.table_cache[table_meta.table_name] = table_meta
-            self.next_table_id = max(self.next_table_id, table_meta.table_id + 1)
+            self.id_to_name[table_meta.table_id] = table_meta.table_name
+            self._sys_tables_pk_index[table_meta.table_id] = rid
 
-        # 加载列信息时处理约束
+        # 加载列信息时处理约束（★ 修改：单遍扫描，按序到达的列直接追加，只对乱序的表排序）
+        column_cache = self.column_cache
+        unsorted_tables = set()
         for row in self.storage_engine.seq_scan(self.SYS_COLUMNS):
             table_id = row['table_id']
 
@@ -177,41 +244,45 @@ class CatalogManager:
                 default_value=default_val
             )
 
-            col_meta = ColumnMetadata(
-                table_id=table_id,
-                column_name=row['column_name'],
-                column_type=row['column_type'],
-                max_length=row['max_length'],
-                ordinal_position=row['ordinal_position'],
-                constraints=constraints
-            )
+            ordinal = row['ordinal_position']
+            col_meta = ColumnMetadata(table_id, row['column_name'], row['column_type'],
+                                      row['max_length'], ordinal, constraints)
 
-            if table_id not in self.column_cache:
-                self.column_cache[table_id] = []
-            self.column_cache[table_id].append(col_meta)
+            cols = column_cache.get(table_id)
+            if cols is None:
+                cols = column_cache[table_id] = []
+            # register_table 按 ordinal 0..n-1 顺序写入，正常情况下恰好对齐
+            if ordinal != len(cols):
+                unsorted_tables.add(table_id)
+            cols.append(col_meta)
 
-        # 对列按ordinal_position排序
-        for cols in self.column_cache.values():
-            cols.sort(key=lambda c: c.ordinal_position)
+        for table_id, cols in column_cache.items():
+            if table_id in unsorted_tables:
+                cols.sort(key=lambda c: c.ordinal_position)
+            self.column_by_name[table_id] = self._index_columns(cols)
 
         # 加载索引信息
+        index_cache = self.index_cache
         for row in self.storage_engine.seq_scan(self.SYS_INDEXES):
             table_id = row['table_id']
-            idx_meta = IndexMetadata(
-                index_id=row['index_id'],
-                table_id=table_id,
-                index_name=row['index_name'],
-                column_name=row['column_name'],
-                index_type=row['index_type']
-            )
+            idx_meta = IndexMetadata(row['index_id'], table_id, row['index_name'],
+                                     row['column_name'], row['index_type'])
+
+            idxs = index_cache.get(table_id)
+            if idxs is None:
+                idxs = index_cache[table_id] = []
+            idxs.append(idx_meta)
 
-            if table_id not in self.index_cache:
-                self.index_cache[table_id] = []
-            self.index_cache[table_id].append(idx_meta)
-            self.next_index_id = max(self.next_index_id, idx_meta.index_id + 1)
+        # 计数器缺失（旧版本建立的目录）或落后于已有ID时，以现有最大ID为准
+        max_table_id = max(self.id_to_name, default=0)
+        max_index_id = max((idx.index_id for idxs in index_cache.values() for idx in idxs), default=0)
+        self.next_table_id = max(counters.get("next_table_id", 1), max_table_id + 1)
+        self.next_index_id = max(counters.get("next_index_id", 1), max_index_id + 1)
 
-        print(
-            f"缓存加载完成: {len(self.table_cache)}表, {sum(len(cols) for cols in self.column_cache.values())}列, {sum(len(idxs) for idxs in self.index_cache.values())}索引")
+        if log.isEnabledFor(logging.INFO):
+            log.info("缓存加载完成: %d表, %d列, %d索引", len(self.table_cache),
+                     sum(len(cols) for cols in self.column_cache.values()),
+                     sum(len(idxs) for idxs in self.index_cache.values()))
 
     def register_table(self, table_name: str, columns: List[Dict[str, Any]]) -> int:
         """
@@ -227,22 +298,22 @@ class CatalogManager:
         if table_name in self.table_cache:
             raise ValueError(f"表已存在: {table_name}")
 
+        # ★ 新增：驻留表名，之后以同一对象作键的查找只需比较身份
+        table_name = sys.intern(table_name)
+
         # 分配table_id
         table_id = self.next_table_id
         self.next_table_id += 1
+        self._save_counter("next_table_id", self.next_table_id)
 
         current_time = int(time.time())
 
         # 插入sys_tables
-        table_row = {
-            "table_id": table_id,
-            "table_name": table_name,
-            "created_time": current_time,
-            "row_count": 0
-        }
-        self.storage_engine.insert_row(self.SYS_TABLES, table_row)
-
-        # 插入sys_columns时处理约束
+        table_meta = TableMetadata(table_id, table_name, current_time, 0)
+        self._upsert_sys_tables_row(table_meta)
+
+        # 插入sys_columns时处理约束（★ 修改：收集后批量写入）
+        col_rows = []
         for ordinal, col_def in enumerate(columns):
             # 处理约束信息
             constraints_info = col_def.get("constraints", {})
@@ -260,21 +331,21 @@ class CatalogManager:
             if constraint_flags.has_default: flags_int |= 4
             if constraint_flags.primary_key: flags_int |= 8
 
-            col_row = {
-                "table_id": table_id,
-                "column_name": col_def["name"],
-                "column_type": col_def["type"],
-                "max_length": col_def.get("max_length"),
-                "ordinal_position": ordinal,
-                "constraint_flags": flags_int,
-                "default_value": str(
-                    constraint_flags.default_value) if constraint_flags.default_value is not None else None
-            }
-            self.storage_engine.insert_row(self.SYS_COLUMNS, col_row)
+            # ★ 修改：按 sys_columns 列序直接给出元组，省去行字典
+            col_rows.append((
+                table_id,
+                col_def["name"],
+                col_def["type"],
+                col_def.get("max_length"),
+                ordinal,
+                flags_int,
+                str(constraint_flags.default_value) if constraint_flags.default_value is not None else None
+            ))
+        self.storage_engine.insert_rows(self.SYS_COLUMNS, col_rows)
 
         # 更新缓存
-        table_meta = TableMetadata(table_id, table_name, current_time, 0)
         self.table_cache[table_name] = table_meta
+        self.id_to_name[table_id] = table_name
 
         col_metas = []
         for ordinal, col_def in enumerate(columns):
@@ -298,8 +369,10 @@ class CatalogManager:
             col_metas.append(col_meta)
 
         self.column_cache[table_id] = col_metas
+        self.column_by_name[table_id] = self._index_columns(col_metas)
+        self.version += 1
 
-        print(f"注册表到系统目录: {table_name} (table_id={table_id})")
+        log.info("注册表到系统目录: %s (table_id=%s)", table_name, table_id)
         return table_id
 
     def unregister_table(self, table_name: str) -> bool:
@@ -315,39 +388,43 @@ class CatalogManager:
         if table_name not in self.table_cache:
             return False
 
+        self.flush()
+
         table_meta = self.table_cache[table_name]
         table_id = table_meta.table_id
 
         # 从系统表删除记录
-        self.storage_engine.delete_where(
-            self.SYS_TABLES,
-            lambda row: row['table_id'] == table_id
-        )
-
-        self.storage_engine.delete_where(
-            self.SYS_COLUMNS,
-            lambda row: row['table_id'] == table_id
-        )
-
-        self.storage_engine.delete_where(
-            self.SYS_INDEXES,
-            lambda row: row['table_id'] == table_id
-        )
+        self.storage_engine.delete_by(self.SYS_TABLES, "table_id", table_id)
+        self.storage_engine.delete_by(self.SYS_COLUMNS, "table_id", table_id)
+        self.storage_engine.delete_by(self.SYS_INDEXES, "table_id", table_id)
 
         # 清理缓存
         del self.table_cache[table_name]
+        self.id_to_name.pop(table_id, None)
+        self._sys_tables_pk_index.pop(table_id, None)
         if table_id in self.column_cache:
             del self.column_cache[table_id]
+        self.column_by_name.pop(table_id, None)
         if table_id in self.index_cache:
             del self.index_cache[table_id]
+        self.version += 1
 
-        print(f"从系统目录移除表: {table_name}")
+        log.info("从系统目录移除表: %s", table_name)
         return True
 
     def get_table_metadata(self, table_name: str) -> Optional[TableMetadata]:
         """获取表元数据"""
         return self.table_cache.get(table_name)
 
+    def get_tables_metadata(self, table_names) -> Dict[str, Optional[TableMetadata]]:
+        """★ 新增：一次获取多张表的元数据 {表名: 元数据或None}"""
+        table_cache = self.table_cache
+        return {name: table_cache.get(name) for name in table_names}
+
+    def get_table_name_by_id(self, table_id: int) -> Optional[str]:
+        """根据table_id获取表名"""
+        return self.id_to_name.get(table_id)
+
     def get_table_columns(self, table_name: str) -> List[ColumnMetadata]:
         """获取表的列信息"""
         table_meta = self.get_table_metadata(table_name)
@@ -370,16 +447,26 @@ class CatalogManager:
 
     def column_exists(self, table_name: str, column_name: str) -> bool:
         """检查列是否存在"""
-        columns = self.get_table_columns(table_name)
-        return any(col.column_name == column_name for col in columns)
+        table_meta = self.table_cache.get(table_name)
+        if not table_meta:
+            return False
+        return column_name in self.column_by_name.get(table_meta.table_id, {})
 
     def get_column_type(self, table_name: str, column_name: str) -> Optional[str]:
         """获取列的数据类型"""
-        columns = self.get_table_columns(table_name)
-        for col in columns:
-            if col.column_name == column_name:
-                return col.column_type
-        return None
+        table_meta = self.table_cache.get(table_name)
+        if not table_meta:
+            return None
+        col = self.column_by_name.get(table_meta.table_id, {}).get(column_name)
+        return col.column_type if col else None
+
+    @staticmethod
+    def _index_columns(cols: List[ColumnMetadata]) -> Dict[str, ColumnMetadata]:
+        """按列名建立查找字典（同名列保留位置靠前的一个，与原线性查找一致）"""
+        by_name = {}
+        for col in cols:
+            by_name.setdefault(col.column_name, col)
+        return by_name
 
     def register_index(self, table_name: str, index_name: str, column_name: str, index_type: str = "ordered") -> int:
         """
@@ -404,15 +491,10 @@ class CatalogManager:
         # 分配index_id
         index_id = self.next_index_id
         self.next_index_id += 1
+        self._save_counter("next_index_id", self.next_index_id)
 
-        # 插入sys_indexes
-        index_row = {
-            "index_id": index_id,
-            "table_id": table_meta.table_id,
-            "index_name": index_name,
-            "column_name": column_name,
-            "index_type": index_type
-        }
+        # 插入sys_indexes（按列序：index_id, table_id, index_name, column_name, index_type）
+        index_row = (index_id, table_meta.table_id, index_name, column_name, index_type)
         self.storage_engine.insert_row(self.SYS_INDEXES, index_row)
 
         # 更新缓存
@@ -427,8 +509,9 @@ class CatalogManager:
         if table_meta.table_id not in self.index_cache:
             self.index_cache[table_meta.table_id] = []
         self.index_cache[table_meta.table_id].append(index_meta)
+        self.version += 1
 
-        print(f"注册索引到系统目录: {index_name} on {table_name}.{column_name}")
+        log.info("注册索引到系统目录: %s on %s.%s", index_name, table_name, column_name)
         return index_id
 
     def update_table_row_count(self, table_name: str, delta: int):
@@ -439,58 +522,122 @@ class CatalogManager:
 
         # 更新缓存
         table_meta.row_count += delta
+        self._row_count_version += 1
 
-        # 更新系统表(简化实现：全量更新)
-        self.storage_engine.delete_where(
-            self.SYS_TABLES,
-            lambda row: row['table_id'] == table_meta.table_id
-        )
+        # 只标脏，由 flush() 批量写回系统表
+        self._dirty_tables.add(table_name)
 
-        table_row = {
-            "table_id": table_meta.table_id,
-            "table_name": table_meta.table_name,
-            "created_time": table_meta.created_time,
-            "row_count": table_meta.row_count
-        }
-        self.storage_engine.insert_row(self.SYS_TABLES, table_row)
+    def _on_storage_close(self):
+        """存储引擎关闭前写回行数统计，并退出进程退出时的兜底写回"""
+        _LIVE_CATALOGS.discard(self)
+        self.flush()
+
+    def flush(self):
+        """将标脏的行数统计写回 sys_tables（★ 新增）"""
+        if not self._dirty_tables:
+            return
+
+        dirty_metas = [self.table_cache[name] for name in self._dirty_tables if name in self.table_cache]
+        self._dirty_tables.clear()
+
+        for meta in dirty_metas:
+            self._upsert_sys_tables_row(meta)
+
+    def _upsert_sys_tables_row(self, table_meta: TableMetadata):
+        """按 table_id 写入 sys_tables 行：已知位置时原地更新，否则删除旧行后插入（★ 新增）"""
+        # 按 sys_tables 列序：table_id, table_name, created_time, row_count
+        table_row = (table_meta.table_id, table_meta.table_name, table_meta.created_time, table_meta.row_count)
+
+        rid = self._sys_tables_pk_index.get(table_meta.table_id)
+        if rid is not None and self.storage_engine.update_row(self.SYS_TABLES, rid, table_row):
+            return
+
+        table_id = table_meta.table_id
+        if rid is not None:
+            self.storage_engine.delete_by(self.SYS_TABLES, "table_id", table_id)
+        self._sys_tables_pk_index.pop(table_id, None)
+        if self.storage_engine.insert_row(self.SYS_TABLES, table_row):
+            self._sys_tables_pk_index[table_id] = self.storage_engine.last_insert_rid
+
+    def _save_counter(self, name: str, value: int):
+        """写回 sys_counters 中的一个计数器：已知位置时原地更新，否则插入（★ 新增）"""
+        row = (name, value)
+        rid = self._counter_rids.get(name)
+        if rid is not None and self.storage_engine.update_row(self.SYS_COUNTERS, rid, row):
+            return
+
+        if rid is not None:
+            self.storage_engine.delete_by(self.SYS_COUNTERS, "name", name)
+        self._counter_rids.pop(name, None)
+        if self.storage_engine.insert_row(self.SYS_COUNTERS, row):
+            self._counter_rids[name] = self.storage_engine.last_insert_rid
 
     def list_all_tables(self) -> List[str]:
-        """列出所有用户表(排除系统表)"""
-        system_tables = {self.SYS_TABLES, self.SYS_COLUMNS, self.SYS_INDEXES}
-        return [name for name in self.table_cache.keys() if name not in system_tables]
+        """列出所有用户表(排除系统表)，保持注册顺序"""
+        table_cache = self.table_cache
+        # 系统表通常不会进入 table_cache，此时直接整体复制键列表
+        if self._SYS_TABLE_NAMES.isdisjoint(table_cache):
+            return list(table_cache)
+        system_tables = self._SYS_TABLE_NAMES
+        return [name for name in table_cache if name not in system_tables]
+
+    def list_all_tables_with_columns(self) -> Dict[str, List[ColumnMetadata]]:
+        """★ 新增：一次性列出所有用户表及其列信息 {表名: [ColumnMetadata, ...]}"""
+        system_tables = self._SYS_TABLE_NAMES
+        column_cache = self.column_cache
+        return {name: column_cache.get(meta.table_id, [])
+                for name, meta in self.table_cache.items() if name not in system_tables}
+
+    def get_schema_info(self, table_name: str) -> Optional[Mapping[str, Any]]:
+        """
+        获取表的完整schema信息
 
-    def get_schema_info(self, table_name: str) -> Dict[str, Any]:
-        """获取表的完整schema信息"""
+        ★ 修改：结果按表缓存为只读视图（列、索引为只读映射组成的元组），
+        目录版本变化时重建；仅行数变化时复用列、索引部分重新生成外层视图。
+        """
         table_meta = self.get_table_metadata(table_name)
         if not table_meta:
             return None
 
-        columns = self.get_table_columns(table_name)
-        indexes = self.get_table_indexes(table_name)
+        if self._schema_info_version != self.version:
+            self._schema_info_cache.clear()
+            self._schema_info_version = self.version
 
-        return {
-            "table_name": table_meta.table_name,
-            "table_id": table_meta.table_id,
-            "created_time": table_meta.created_time,
-            "row_count": table_meta.row_count,
-            "columns": [
-                {
+        schema = self._schema_info_cache.get(table_name)
+        if schema is not None and schema["row_count"] == table_meta.row_count:
+            return schema
+
+        if schema is not None:
+            columns, indexes = schema["columns"], schema["indexes"]
+        else:
+            columns = tuple(
+                MappingProxyType({
                     "name": col.column_name,
                     "type": col.column_type,
                     "max_length": col.max_length,
                     "position": col.ordinal_position
-                }
-                for col in columns
-            ],
-            "indexes": [
-                {
+                })
+                for col in self.get_table_columns(table_name)
+            )
+            indexes = tuple(
+                MappingProxyType({
                     "name": idx.index_name,
                     "column": idx.column_name,
                     "type": idx.index_type
-                }
-                for idx in indexes
-            ]
-        }
+                })
+                for idx in self.get_table_indexes(table_name)
+            )
+
+        schema = self._schema_info_cache[table_name] = MappingProxyType({
+            "table_name": table_meta.table_name,
+            "table_id": table_meta.table_id,
+            "created_time": table_meta.created_time,
+            "created_time_str": table_meta.created_time_str,
+            "row_count": table_meta.row_count,
+            "columns": columns,
+            "indexes": indexes
+        })
+        return schema
 
     # ★ 新增：约束管理方法（在CatalogManager类内部）
     def add_foreign_key(self, table_name: str, column_name: str, ref_table_name: str, ref_column_name: str,
@@ -499,6 +646,10 @@ class CatalogManager:
         return self.constraint_mgr.add_foreign_key(table_name, column_name, ref_table_name, ref_column_name,
                                                    constraint_name)
 
+    def add_foreign_keys_bulk(self, specs: List[Dict[str, Any]]) -> List[int]:
+        """★ 新增：批量添加外键约束（一次写入系统表）"""
+        return self.constraint_mgr.add_foreign_keys_bulk(specs)
+
     def get_table_foreign_keys(self, table_name: str):
         """获取表的外键约束"""
         return self.constraint_mgr.get_table_foreign_keys(table_name)
@@ -514,24 +665,52 @@ class CatalogManager:
         elif operation == "DELETE":
             self.constraint_validator.validate_delete_referenced_keys(table_name, row_data)
 
+    def validate_foreign_key_constraints_batch(self, table_name: str, rows: List[Dict[str, Any]]):
+        """★ 新增：批量验证插入行的外键约束"""
+        self.constraint_validator.validate_insert_foreign_keys_batch(table_name, rows)
+
 
     def get_database_stats(self) -> Dict[str, Any]:
-        """获取数据库统计信息"""
-        user_tables = self.list_all_tables()
-        total_rows = sum(meta.row_count for meta in self.table_cache.values()
-                         if meta.table_name in user_tables)
-        total_indexes = sum(len(idxs) for table_id, idxs in self.index_cache.items()
-                            if any(self.table_cache[name].table_id == table_id
-                                   for name in user_tables if name in self.table_cache))
-
-        return {
-            "total_tables": len(user_tables),
-            "total_rows": total_rows,
-            "total_indexes": total_indexes,
-            "system_tables": 3,  # sys_tables, sys_columns, sys_indexes
-            "next_table_id": self.next_table_id,
-            "next_index_id": self.next_index_id
-        }
+        """获取数据库统计信息（★ 修改：目录与行数均未变化时直接返回缓存结果）"""
+        self.flush()
+        cache_key = (self.version, self._row_count_version)
+        if self._stats_cache is None or self._stats_cache_key != cache_key:
+            user_tables = set(self.list_all_tables())
+            total_rows = sum(self.table_cache[name].row_count for name in user_tables)
+            id_to_name = self.id_to_name
+            total_indexes = sum(len(idxs) for table_id, idxs in self.index_cache.items()
+                                if id_to_name.get(table_id) in user_tables)
+
+            self._stats_cache = {
+                "total_tables": len(user_tables),
+                "total_rows": total_rows,
+                "total_indexes": total_indexes,
+                # ★ 修复：按实际存在的系统表计数，不再写死
+                "system_tables": len(self._SYS_TABLE_NAMES.intersection(self.storage_engine.list_tables())),
+                "next_table_id": self.next_table_id,
+                "next_index_id": self.next_index_id
+            }
+            self._stats_cache_key = cache_key
+
+        return dict(self._stats_cache)
+
+
+# ★ 修改：仍在使用中的目录管理器（弱引用，不阻止回收）
+_LIVE_CATALOGS: "weakref.WeakSet[CatalogManager]" = weakref.WeakSet()
+
+
+def _flush_catalogs_at_exit():
+    """进程退出时把未关闭存储引擎的目录管理器的行数统计写回并刷盘"""
+    for catalog in list(_LIVE_CATALOGS):
+        try:
+            catalog.flush()
+            # 只写回缓冲池的页面不会落盘，这里一并刷出脏页
+            catalog.storage_engine.flush_all()
+        except Exception as e:
+            print(f"退出时写回目录统计失败: {e}")
+
+
+atexit.register(_flush_catalogs_at_exit)
 
 
 # ==================== 测试代码 ====================
@@ -582,6 +761,7 @@ def test_catalog_manager():
     # 查询表信息
     print(f"   students表存在: {catalog.table_exists('students')}")
     print(f"   nonexistent表存在: {catalog.table_exists('nonexistent')}")
+    print(f"   table_id={table_id1}对应表名: {catalog.get_table_name_by_id(table_id1)}")
 
     # 查询列信息
     student_cols = catalog.get_table_columns("students")
@@ -648,6 +828,7 @@ def test_catalog_manager():
     success2 = catalog.unregister_table("courses")
     print(f"   删除students: {success1}")
     print(f"   删除courses: {success2}")
+    print(f"   table_id={table_id1}对应表名: {catalog.get_table_name_by_id(table_id1)}")
 
     final_stats = catalog.get_database_stats()
     print(f"   清理后统计: {final_stats}")
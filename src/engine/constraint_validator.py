@@ -5,9 +5,12 @@
 实现外键约束的RESTRICT语义校验
 """
 
-from typing import Dict, Any, List, Optional
+import logging
+from typing import Dict, Any, List, Optional, Tuple
 from .constraints import ForeignKeyConstraint
 
+log = logging.getLogger(__name__)
+
 
 class ForeignKeyValidationError(Exception):
     """外键校验错误"""
@@ -27,6 +30,69 @@ class ConstraintValidator:
         self.catalog_mgr = catalog_mgr
         self.constraint_mgr = constraint_mgr
 
+        # ★ 新增：外键列值索引 {(table_id, column): {value: 出现次数}}
+        # 首次校验某列时顺序扫描一次建立，之后随存储层写入增量维护
+        self._fk_value_index: Dict[Tuple[int, str], Dict[Any, int]] = {}
+        # 表名 -> 该表上已建立索引的 [(key, column)]，供写入回调定位
+        self._fk_index_by_table: Dict[str, List[Tuple[Tuple[int, str], str]]] = {}
+        # ★ 修改：只关注已建立值索引的表（传入的字典随索引建立/丢弃持续变化），其余表写入不解码、不回调
+        storage_engine.add_write_listener(self._on_table_write, self._fk_index_by_table)
+
+        # ★ 新增：按表名缓存外键列表，目录或外键版本变化时整体失效
+        self._fk_cache: Dict[str, List[ForeignKeyConstraint]] = {}
+        self._fk_cache_version: Optional[Tuple[int, int]] = None
+        # ★ 新增：有外键的表 / 被外键引用的表，随缓存一起重建；不在其中的表直接跳过校验
+        self._tables_with_fks: set = set()
+        self._tables_referenced: set = set()
+        # ★ 新增：被引用列 -> 引用它的外键 {(ref_table_id, ref_column): [fk]}，同样随缓存重建
+        self._ref_by_col: Dict[Tuple[int, str], List[ForeignKeyConstraint]] = {}
+        # ★ 新增：按表名缓存的 INSERT 外键校验函数（运行时生成，列名与父表值索引直接绑定）
+        self._insert_validators: Dict[str, Any] = {}
+
+    def invalidate(self, table_name: str = None):
+        """清除外键列表缓存；不指定表名时全部清除"""
+        if table_name is None:
+            self._fk_cache.clear()
+            self._insert_validators.clear()
+            self._fk_cache_version = None  # 下次访问时重建表集合
+        else:
+            self._fk_cache.pop(table_name, None)
+            self._insert_validators.pop(table_name, None)
+
+    def _check_fk_cache_version(self):
+        """表结构或外键定义变化后清空外键列表缓存"""
+        version = (self.catalog_mgr.version, self.constraint_mgr.version)
+        if version != self._fk_cache_version:
+            self.invalidate()
+            self._rebuild_fk_table_sets()
+            self._fk_cache_version = version
+
+    def _rebuild_fk_table_sets(self):
+        """按当前外键定义重建 _tables_with_fks / _tables_referenced / _ref_by_col"""
+        get_name = self.catalog_mgr.get_table_name_by_id
+        self._tables_with_fks = set()
+        self._tables_referenced = set()
+        self._ref_by_col = {}
+        for table_id, fks in self.constraint_mgr.fk_cache.items():
+            if not fks:
+                continue
+            name = get_name(table_id)
+            if name:
+                self._tables_with_fks.add(name)
+            for fk in fks:
+                ref_name = get_name(fk.ref_table_id)
+                if ref_name:
+                    self._tables_referenced.add(ref_name)
+                self._ref_by_col.setdefault((fk.ref_table_id, fk.ref_column_name), []).append(fk)
+
+    def _get_fks_cached(self, table_name: str) -> List[ForeignKeyConstraint]:
+        """获取表自身的外键约束（带缓存）"""
+        self._check_fk_cache_version()
+        fks = self._fk_cache.get(table_name)
+        if fks is None:
+            fks = self._fk_cache[table_name] = list(self.constraint_mgr.get_table_foreign_keys(table_name))
+        return fks
+
     def validate_insert_foreign_keys(self, table_name: str, row_data: Dict[str, Any]):
         """
         验证插入操作的外键约束
@@ -38,8 +104,21 @@ class ConstraintValidator:
         Raises:
             ForeignKeyValidationError: 外键约束违反
         """
+        # ★ 新增：没有相关外键的表直接返回
+        self._check_fk_cache_version()
+        if table_name not in self._tables_with_fks:
+            return
+
+        # ★ 新增：优先使用为该表生成的专用校验函数
+        validator = self._insert_validators.get(table_name)
+        if validator is None:
+            validator = self._compile_insert_validator(table_name)
+        if validator is not None:
+            validator(row_data)
+            return
+
         # 获取表的所有外键约束
-        foreign_keys = self.constraint_mgr.get_table_foreign_keys(table_name)
+        foreign_keys = self._get_fks_cached(table_name)
 
         for fk in foreign_keys:
             child_value = row_data.get(fk.column_name)
@@ -58,6 +137,93 @@ class ConstraintValidator:
                     column=fk.column_name
                 )
 
+    def validate_insert_foreign_keys_batch(self, table_name: str, rows: List[Dict[str, Any]]):
+        """
+        批量验证插入操作的外键约束（★ 新增）
+
+        每个外键先用集合差一次性求出父表中缺失的值，只有存在缺失时才回到行序
+        定位第一条违规记录，报错内容与逐行校验相同。父表视图为批量插入之前的状态，
+        同一批内新插入的行不参与父键匹配。
+
+        Args:
+            table_name: 要插入的表名
+            rows: 插入的行数据列表
+
+        Raises:
+            ForeignKeyValidationError: 外键约束违反
+        """
+        self._check_fk_cache_version()
+        if table_name not in self._tables_with_fks or not rows:
+            return
+
+        for fk in self._get_fks_cached(table_name):
+            column_name = fk.column_name
+            try:
+                parent_index = self._get_value_index(fk.ref_table_id, fk.ref_column_name)
+            except Exception as e:
+                log.exception("检查父键存在性失败: %s", e)
+                parent_index = None
+            if parent_index is None:
+                parent_index = {}
+
+            child_values = {row.get(column_name) for row in rows}
+            child_values.discard(None)
+            missing = child_values - parent_index.keys()
+            if not missing:
+                continue
+
+            for row in rows:
+                child_value = row.get(column_name)
+                if child_value is not None and child_value in missing:
+                    ref_table_name = self._get_table_name_by_id(fk.ref_table_id)
+                    raise ForeignKeyValidationError(
+                        f"外键约束违反: 在父表 '{ref_table_name}.{fk.ref_column_name}' 中未找到值 '{child_value}'",
+                        constraint_name=fk.constraint_name,
+                        table=table_name,
+                        column=column_name
+                    )
+
+    def _compile_insert_validator(self, table_name: str):
+        """
+        为表生成 INSERT 外键校验函数并缓存（★ 新增）
+
+        生成的函数逐个外键取列值、直接在父表值索引里判断是否存在，
+        与通用循环语义一致。父表值索引无法建立时返回 None，由调用方走通用循环。
+        """
+        foreign_keys = self._get_fks_cached(table_name)
+        try:
+            indexes = [self._get_value_index(fk.ref_table_id, fk.ref_column_name) for fk in foreign_keys]
+        except Exception as e:
+            log.exception("生成外键校验函数失败: %s", e)
+            return None
+        if any(index is None for index in indexes):
+            return None
+
+        def fail(i, value):
+            fk = foreign_keys[i]
+            ref_table_name = self._get_table_name_by_id(fk.ref_table_id)
+            raise ForeignKeyValidationError(
+                f"外键约束违反: 在父表 '{ref_table_name}.{fk.ref_column_name}' 中未找到值 '{value}'",
+                constraint_name=fk.constraint_name,
+                table=table_name,
+                column=fk.column_name
+            )
+
+        params = "".join(f"idx{i}, " for i in range(len(foreign_keys)))
+        lines = [f"def _make({params}fail):",
+                 "    def _validate(row_data):",
+                 "        get = row_data.get"]
+        for i, fk in enumerate(foreign_keys):
+            lines += [f"        v = get({fk.column_name!r})",
+                      f"        if v is not None and v not in idx{i}:",
+                      f"            fail({i}, v)"]
+        lines.append("    return _validate")
+
+        namespace = {}
+        exec("\n".join(lines), namespace)
+        validator = self._insert_validators[table_name] = namespace["_make"](*indexes, fail)
+        return validator
+
     def validate_update_foreign_keys(self, table_name: str, old_row: Dict[str, Any], new_row: Dict[str, Any]):
         """
         验证更新操作的外键约束
@@ -70,8 +236,13 @@ class ConstraintValidator:
         Raises:
             ForeignKeyValidationError: 外键约束违反
         """
+        # ★ 新增：没有相关外键的表直接返回
+        self._check_fk_cache_version()
+        if table_name not in self._tables_with_fks:
+            return
+
         # 获取表的所有外键约束
-        foreign_keys = self.constraint_mgr.get_table_foreign_keys(table_name)
+        foreign_keys = self._get_fks_cached(table_name)
 
         for fk in foreign_keys:
             old_value = old_row.get(fk.column_name)
@@ -106,25 +277,30 @@ class ConstraintValidator:
         Raises:
             ForeignKeyValidationError: 存在引用，不允许删除
         """
-        # 获取所有引用此表的外键约束
-        referencing_fks = self.constraint_mgr.get_referencing_foreign_keys(table_name)
+        # ★ 新增：没有相关外键的表直接返回
+        self._check_fk_cache_version()
+        if table_name not in self._tables_referenced:
+            return
 
-        for fk in referencing_fks:
-            ref_value = row_data.get(fk.ref_column_name)
+        # ★ 修改：按被删除行的列逐个探测引用它的外键，不再遍历该表的全部引用外键
+        table_id = self.catalog_mgr.get_table_metadata(table_name).table_id
+        ref_by_col = self._ref_by_col
 
+        for column, ref_value in row_data.items():
             # 如果被删除的值为NULL，无需检查引用
             if ref_value is None:
                 continue
 
-            # 检查是否有子表记录引用此值
-            if self._child_key_exists(fk, ref_value):
-                child_table_name = self._get_table_name_by_id(fk.table_id)
-                raise ForeignKeyValidationError(
-                    f"外键约束违反: 无法删除记录，子表 '{child_table_name}.{fk.column_name}' 中存在引用值 '{ref_value}'",
-                    constraint_name=fk.constraint_name,
-                    table=table_name,
-                    column=fk.ref_column_name
-                )
+            for fk in ref_by_col.get((table_id, column), ()):
+                # 检查是否有子表记录引用此值
+                if self._child_key_exists(fk, ref_value):
+                    child_table_name = self._get_table_name_by_id(fk.table_id)
+                    raise ForeignKeyValidationError(
+                        f"外键约束违反: 无法删除记录，子表 '{child_table_name}.{fk.column_name}' 中存在引用值 '{ref_value}'",
+                        constraint_name=fk.constraint_name,
+                        table=table_name,
+                        column=fk.ref_column_name
+                    )
 
     def validate_update_referenced_keys(self, table_name: str, old_row: Dict[str, Any], new_row: Dict[str, Any]):
         """
@@ -138,81 +314,117 @@ class ConstraintValidator:
         Raises:
             ForeignKeyValidationError: 存在引用，不允许更新被引用的键
         """
-        # 获取所有引用此表的外键约束
-        referencing_fks = self.constraint_mgr.get_referencing_foreign_keys(table_name)
-
-        for fk in referencing_fks:
-            old_value = old_row.get(fk.ref_column_name)
-            new_value = new_row.get(fk.ref_column_name)
+        # ★ 新增：没有相关外键的表直接返回
+        self._check_fk_cache_version()
+        if table_name not in self._tables_referenced:
+            return
 
-            # 如果被引用的列值没有变化，跳过检查
-            if old_value == new_value:
-                continue
+        # ★ 修改：只检查值发生变化的列上的引用外键
+        table_id = self.catalog_mgr.get_table_metadata(table_name).table_id
+        ref_by_col = self._ref_by_col
 
+        for column, old_value in old_row.items():
             # 如果原值为NULL，无需检查引用
             if old_value is None:
                 continue
 
-            # 检查是否有子表记录引用原值
-            if self._child_key_exists(fk, old_value):
-                child_table_name = self._get_table_name_by_id(fk.table_id)
-                raise ForeignKeyValidationError(
-                    f"外键约束违反: 无法更新被引用键，子表 '{child_table_name}.{fk.column_name}' 中存在引用值 '{old_value}'",
-                    constraint_name=fk.constraint_name,
-                    table=table_name,
-                    column=fk.ref_column_name
-                )
+            fks = ref_by_col.get((table_id, column))
+            if not fks:
+                continue
+
+            # 如果被引用的列值没有变化，跳过检查
+            if old_value == new_row.get(column):
+                continue
+
+            for fk in fks:
+                # 检查是否有子表记录引用原值
+                if self._child_key_exists(fk, old_value):
+                    child_table_name = self._get_table_name_by_id(fk.table_id)
+                    raise ForeignKeyValidationError(
+                        f"外键约束违反: 无法更新被引用键，子表 '{child_table_name}.{fk.column_name}' 中存在引用值 '{old_value}'",
+                        constraint_name=fk.constraint_name,
+                        table=table_name,
+                        column=fk.ref_column_name
+                    )
 
     def _parent_key_exists(self, fk: ForeignKeyConstraint, value: Any) -> bool:
         """检查父表中是否存在指定值"""
         try:
-            ref_table_name = self._get_table_name_by_id(fk.ref_table_id)
-            if not ref_table_name:
-                return False
-
-            # 在父表中查找匹配值
-            for row in self.storage_engine.seq_scan(ref_table_name):
-                if row.get(fk.ref_column_name) == value:
-                    return True
-
-            return False
+            index = self._get_value_index(fk.ref_table_id, fk.ref_column_name)
+            return index is not None and value in index
 
         except Exception as e:
-            print(f"检查父键存在性失败: {e}")
+            log.exception("检查父键存在性失败: %s", e)
             return False
 
     def _child_key_exists(self, fk: ForeignKeyConstraint, value: Any) -> bool:
         """检查子表中是否存在引用指定值的记录"""
         try:
-            child_table_name = self._get_table_name_by_id(fk.table_id)
-            if not child_table_name:
-                return False
-
-            # 在子表中查找引用此值的记录
-            for row in self.storage_engine.seq_scan(child_table_name):
-                if row.get(fk.column_name) == value:
-                    return True
-
-            return False
+            index = self._get_value_index(fk.table_id, fk.column_name)
+            return index is not None and value in index
 
         except Exception as e:
-            print(f"检查子键存在性失败: {e}")
+            log.exception("检查子键存在性失败: %s", e)
             return False
 
+    def _get_value_index(self, table_id: int, column_name: str) -> Optional[Dict[Any, int]]:
+        """
+        获取 (table_id, column) 的值索引（★ 新增）
+
+        首次访问时顺序扫描一次该表建立 {value: 出现次数}，
+        之后由 _on_table_write 随插入/删除增量维护。表不存在时返回 None。
+        """
+        key = (table_id, column_name)
+        index = self._fk_value_index.get(key)
+        if index is not None:
+            return index
+
+        table_name = self._get_table_name_by_id(table_id)
+        if not table_name:
+            return None
+
+        index = {}
+        for row in self.storage_engine.seq_scan(table_name):
+            value = row.get(column_name)
+            if value is not None:
+                index[value] = index.get(value, 0) + 1
+
+        self._fk_value_index[key] = index
+        self._fk_index_by_table.setdefault(table_name, []).append((key, column_name))
+        return index
+
+    def _on_table_write(self, table_name: str, old_row: Optional[Dict[str, Any]],
+                        new_row: Optional[Dict[str, Any]]):
+        """存储层写入回调：增量维护该表上已建立的值索引"""
+        entries = self._fk_index_by_table.get(table_name)
+        if not entries:
+            return
+
+        # 删表：丢弃该表的全部索引，下次访问时重建
+        if old_row is None and new_row is None:
+            for key, _ in self._fk_index_by_table.pop(table_name):
+                self._fk_value_index.pop(key, None)
+            self._insert_validators.clear()  # 生成的校验函数绑定了被丢弃的索引
+            return
+
+        for key, column_name in entries:
+            index = self._fk_value_index[key]
+            if old_row is not None:
+                value = old_row.get(column_name)
+                if value is not None:
+                    count = index.get(value, 0) - 1
+                    if count > 0:
+                        index[value] = count
+                    else:
+                        index.pop(value, None)
+            if new_row is not None:
+                value = new_row.get(column_name)
+                if value is not None:
+                    index[value] = index.get(value, 0) + 1
+
     def _get_table_name_by_id(self, table_id: int) -> Optional[str]:
         """根据table_id获取表名"""
-        for table_name in self.catalog_mgr.list_all_tables():
-            meta = self.catalog_mgr.get_table_metadata(table_name)
-            if meta and meta.table_id == table_id:
-                return table_name
-
-        # 检查系统表
-        for table_name in [self.catalog_mgr.SYS_TABLES, self.catalog_mgr.SYS_COLUMNS, self.catalog_mgr.SYS_INDEXES]:
-            meta = self.catalog_mgr.get_table_metadata(table_name)
-            if meta and meta.table_id == table_id:
-                return table_name
-
-        return None
+        return self.catalog_mgr.get_table_name_by_id(table_id)
 
     def get_constraint_info(self, table_name: str) -> Dict[str, Any]:
         """获取表的约束信息汇总"""
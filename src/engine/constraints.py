@@ -5,7 +5,7 @@
 负责外键约束的存储、查询和管理
 """
 
-from typing import List, Dict, Optional, Any
+from typing import List, Dict, Optional, Any, Tuple
 from dataclasses import dataclass
 
 
@@ -32,8 +32,15 @@ class ConstraintManager:
 
         # 外键缓存
         self.fk_cache: Dict[int, List[ForeignKeyConstraint]] = {}
+        # ★ 新增：反向索引 {父表ID: [引用它的外键]}，与 fk_cache 同步维护
+        self.fk_by_ref: Dict[int, List[ForeignKeyConstraint]] = {}
+        # ★ 新增：外键在 sys_foreign_keys 中的位置 {fk_id: (page_id, slot_id)}，删除时免扫描
+        self._fk_rids: Dict[int, Tuple[int, int]] = {}
         self.next_fk_id = 1
 
+        # ★ 新增：外键版本号，添加/删除外键时单调递增，供校验器判断缓存是否失效
+        self.version = 0
+
         # 初始化外键系统表
         self._initialize_fk_table()
         self._load_fk_cache()
@@ -56,7 +63,7 @@ class ConstraintManager:
     def _load_fk_cache(self):
         """从系统表加载外键到缓存"""
         try:
-            for row in self.storage_engine.seq_scan(self.SYS_FOREIGN_KEYS):
+            for rid, row in self.storage_engine.seq_scan_with_rid(self.SYS_FOREIGN_KEYS):
                 fk = ForeignKeyConstraint(
                     fk_id=row['fk_id'],
                     table_id=row['table_id'],
@@ -69,6 +76,8 @@ class ConstraintManager:
                 if fk.table_id not in self.fk_cache:
                     self.fk_cache[fk.table_id] = []
                 self.fk_cache[fk.table_id].append(fk)
+                self.fk_by_ref.setdefault(fk.ref_table_id, []).append(fk)
+                self._fk_rids[fk.fk_id] = rid
 
                 self.next_fk_id = max(self.next_fk_id, fk.fk_id + 1)
 
@@ -94,19 +103,97 @@ class ConstraintManager:
         Raises:
             ValueError: 表或列不存在
         """
+        tables = self._resolve_tables((table_name, ref_table_name))
+        fk = self._build_foreign_key(table_name, column_name, ref_table_name, ref_column_name,
+                                     constraint_name, tables)
+
+        # 插入系统表
+        if self.storage_engine.insert_row(self.SYS_FOREIGN_KEYS, self._fk_to_row(fk)):
+            self._fk_rids[fk.fk_id] = self.storage_engine.last_insert_rid
+
+        # 更新缓存
+        self._cache_foreign_key(fk)
+        self.version += 1
+
+        print(f"添加外键约束: {fk.constraint_name}")
+        return fk.fk_id
+
+    def add_foreign_keys_bulk(self, specs: List[Dict[str, Any]]) -> List[int]:
+        """
+        批量添加外键约束（★ 新增）
+
+        先逐条校验并构造全部外键，再用一次 insert_rows 写入系统表；
+        任一条校验失败时不写入任何外键。
+
+        Args:
+            specs: [{"table_name", "column_name", "ref_table_name", "ref_column_name",
+                     "constraint_name"(可选)}, ...]
+
+        Returns:
+            外键ID列表（与 specs 顺序一致）
+
+        Raises:
+            ValueError: 表或列不存在
+        """
+        # ★ 新增：涉及的表只查一次元数据与列名字典，之后逐条校验都走缓存
+        tables = self._resolve_tables({name for spec in specs
+                                       for name in (spec["table_name"], spec["ref_table_name"])})
+
+        next_fk_id = self.next_fk_id
+        try:
+            fks = [
+                self._build_foreign_key(spec["table_name"], spec["column_name"],
+                                        spec["ref_table_name"], spec["ref_column_name"],
+                                        spec.get("constraint_name"), tables)
+                for spec in specs
+            ]
+        except ValueError:
+            self.next_fk_id = next_fk_id  # 回收已分配的ID
+            raise
+
+        if not fks:
+            return []
+
+        self.storage_engine.insert_rows(self.SYS_FOREIGN_KEYS, [self._fk_to_row(fk) for fk in fks])
+        for fk, rid in zip(fks, self.storage_engine.last_insert_rids):
+            self._fk_rids[fk.fk_id] = rid
+
+        for fk in fks:
+            self._cache_foreign_key(fk)
+            print(f"添加外键约束: {fk.constraint_name}")
+        self.version += 1
+
+        return [fk.fk_id for fk in fks]
+
+    def _resolve_tables(self, table_names) -> Dict[str, Optional[Tuple[Any, Dict[str, Any]]]]:
+        """一次取出各表的 (元数据, 列名字典)；表不存在时为 None"""
+        metas = self.catalog_mgr.get_tables_metadata(table_names)
+        column_by_name = self.catalog_mgr.column_by_name
+        return {
+            name: (meta, column_by_name.get(meta.table_id, {})) if meta else None
+            for name, meta in metas.items()
+        }
+
+    def _build_foreign_key(self, table_name: str, column_name: str,
+                           ref_table_name: str, ref_column_name: str,
+                           constraint_name: str,
+                           tables: Dict[str, Optional[Tuple[Any, Dict[str, Any]]]]) -> ForeignKeyConstraint:
+        """按 _resolve_tables 的结果校验表和列并分配外键ID，构造外键对象（不写入系统表和缓存）"""
         # 验证表和列存在性
-        table_meta = self.catalog_mgr.get_table_metadata(table_name)
-        if not table_meta:
+        child = tables.get(table_name)
+        if not child:
             raise ValueError(f"子表不存在: {table_name}")
+        table_meta, columns = child
 
-        ref_table_meta = self.catalog_mgr.get_table_metadata(ref_table_name)
-        if not ref_table_meta:
+        parent = tables.get(ref_table_name)
+        if not parent:
             raise ValueError(f"父表不存在: {ref_table_name}")
+        ref_table_meta, ref_columns = parent
 
-        if not self.catalog_mgr.column_exists(table_name, column_name):
+        if column_name not in columns:
             raise ValueError(f"子表列不存在: {table_name}.{column_name}")
 
-        if not self.catalog_mgr.column_exists(ref_table_name, ref_column_name):
+        if ref_column_name not in ref_columns:
             raise ValueError(f"父表列不存在: {ref_table_name}.{ref_column_name}")
 
         # 生成约束名
@@ -117,8 +204,7 @@ class ConstraintManager:
         fk_id = self.next_fk_id
         self.next_fk_id += 1
 
-        # 创建外键对象
-        fk = ForeignKeyConstraint(
+        return ForeignKeyConstraint(
             fk_id=fk_id,
             table_id=table_meta.table_id,
             column_name=column_name,
@@ -127,8 +213,10 @@ class ConstraintManager:
             constraint_name=constraint_name
         )
 
-        # 插入系统表
-        fk_row = {
+    @staticmethod
+    def _fk_to_row(fk: ForeignKeyConstraint) -> Dict[str, Any]:
+        """外键对象 -> sys_foreign_keys 行"""
+        return {
             "fk_id": fk.fk_id,
             "table_id": fk.table_id,
             "column_name": fk.column_name,
@@ -136,15 +224,13 @@ class ConstraintManager:
             "ref_column_name": fk.ref_column_name,
             "constraint_name": fk.constraint_name
         }
-        self.storage_engine.insert_row(self.SYS_FOREIGN_KEYS, fk_row)
 
-        # 更新缓存
+    def _cache_foreign_key(self, fk: ForeignKeyConstraint):
+        """把外键加入 fk_cache 与反向索引"""
         if fk.table_id not in self.fk_cache:
             self.fk_cache[fk.table_id] = []
         self.fk_cache[fk.table_id].append(fk)
-
-        print(f"添加外键约束: {constraint_name}")
-        return fk_id
+        self.fk_by_ref.setdefault(fk.ref_table_id, []).append(fk)
 
     def get_table_foreign_keys(self, table_name: str) -> List[ForeignKeyConstraint]:
         """获取表的所有外键约束"""
@@ -160,13 +246,8 @@ class ConstraintManager:
         if not ref_table_meta:
             return []
 
-        referencing_fks = []
-        for fks in self.fk_cache.values():
-            for fk in fks:
-                if fk.ref_table_id == ref_table_meta.table_id:
-                    referencing_fks.append(fk)
-
-        return referencing_fks
+        # ★ 修改：直接查反向索引，不再遍历全部外键
+        return list(self.fk_by_ref.get(ref_table_meta.table_id, ()))
 
     def drop_table_foreign_keys(self, table_name: str) -> int:
         """删除表的所有外键约束"""
@@ -176,14 +257,21 @@ class ConstraintManager:
 
         table_id = table_meta.table_id
 
-        # 从系统表删除
-        deleted_count = self.storage_engine.delete_where(
-            self.SYS_FOREIGN_KEYS,
-            lambda row: row['table_id'] == table_id
-        )
+        # ★ 修改：按缓存中记录的位置删除系统表行；位置不全时退回按 table_id 扫描删除
+        fks = self.fk_cache.pop(table_id, [])
+        rids = [self._fk_rids.pop(fk.fk_id, None) for fk in fks]
+        if None in rids:
+            deleted_count = self.storage_engine.delete_by(self.SYS_FOREIGN_KEYS, "table_id", table_id)
+        else:
+            deleted_count = self.storage_engine.delete_rows(self.SYS_FOREIGN_KEYS, rids)
 
         # 清理缓存
-        if table_id in self.fk_cache:
-            del self.fk_cache[table_id]
+        for fk in fks:
+            refs = self.fk_by_ref.get(fk.ref_table_id)
+            if refs is not None:
+                refs.remove(fk)
+                if not refs:
+                    del self.fk_by_ref[fk.ref_table_id]
+        self.version += 1
 
         return deleted_count
\ No newline at end of file
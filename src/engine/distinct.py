@@ -15,7 +15,7 @@ DISTINCT去重算子 - S5组件
 输出：去重后的结果流
 
 【去重策略】
-- 计算行的哈希值进行去重
+- 将参与去重的列值规范化为元组，直接放入集合判重（★ 修改：不再逐行计算MD5）
 - 支持所有数据类型的组合
 - NULL值参与去重计算
 - 保持第一次出现的行
@@ -39,11 +39,33 @@ DistinctOperator
 """
 
 import hashlib
+import itertools
 import json
-from typing import Dict, List, Any, Iterator, Set
+from typing import Dict, List, Any, Iterator
 from abc import ABC, abstractmethod
 
 
+# ★ 新增：去重键的值规范化，等价规则与 _normalize_for_hash 保持一致
+# （字符串忽略首尾空白、布尔值不等于数字、NaN 之间视为相同、其他类型按 类型名+字符串 比较）
+_NAN_KEY = ("NaN",)
+_BOOL_KEYS = {True: ("BOOL", True), False: ("BOOL", False)}
+# 整行去重时，列集合与首行不同的行的键前缀，保证不与按列取值的键相撞
+_MIXED_COLUMNS = object()
+
+
+def _canonical_value(value: Any) -> Any:
+    """把单个列值转换为可放入集合的去重键分量"""
+    if value is None or value.__class__ is int:
+        return value
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, bool):
+        return _BOOL_KEYS[value]
+    if isinstance(value, (int, float)):
+        return value if value == value else _NAN_KEY
+    return ("OBJ", type(value).__name__, str(value))
+
+
 class Operator(ABC):
     """算子基类（为了独立性重新定义）"""
     
@@ -72,7 +94,9 @@ class DistinctOperator(Operator):
     def __init__(self, plan: Dict[str, Any], catalog_mgr=None):
         super().__init__(plan, catalog_mgr)
         self.distinct_columns = plan.get('columns')  # None表示对所有列去重
-        
+        # ★ 新增：参与去重的列（元组），None 表示按整行去重
+        self._key_cols = tuple(self.distinct_columns) if self.distinct_columns else None
+
     def execute(self, storage_engine) -> Iterator[Dict[str, Any]]:
         """执行去重操作"""
         if not self.children:
@@ -80,19 +104,47 @@ class DistinctOperator(Operator):
         
         # 获取子算子的结果
         child_results = self.children[0].execute(storage_engine)
-        
-        # 使用哈希集合进行去重
-        seen_hashes: Set[str] = set()
-        
-        for row in child_results:
-            # 计算行的哈希值
-            row_hash = self._compute_row_hash(row)
-            
-            # 如果未见过此哈希值，输出行并记录
-            if row_hash not in seen_hashes:
-                seen_hashes.add(row_hash)
+
+        # ★ 修改：以规范化后的列值元组作为去重键，直接交给集合判重（不再计算MD5）
+        yield from self._dedup(child_results, self._key_cols)
+
+    @staticmethod
+    def _dedup(rows: Iterator[Dict[str, Any]], key_cols) -> Iterator[Dict[str, Any]]:
+        """
+        按 key_cols 的列值去重，保留第一次出现的行（★ 新增）
+
+        key_cols 为 None 时按整行去重：列顺序只在首行排序一次，
+        之后列集合与首行相同的行按该顺序直接取值；列集合不同的行退回逐行排序的整行键。
+        """
+        rows = iter(rows)
+        full_row = key_cols is None
+        if full_row:
+            first_row = next(rows, None)
+            if first_row is None:
+                return
+            key_cols = tuple(sorted(first_row))
+            key_names = frozenset(key_cols)
+            rows = itertools.chain((first_row,), rows)
+
+        seen: set = set()
+        canonical = _canonical_value
+
+        for row in rows:
+            if full_row and row.keys() != key_names:
+                key = (_MIXED_COLUMNS, DistinctOperator._row_key(row))
+            else:
+                key = tuple([canonical(row.get(col)) for col in key_cols])
+
+            # 如果未见过此键，输出行并记录
+            if key not in seen:
+                seen.add(key)
                 yield row
-    
+
+    @staticmethod
+    def _row_key(row: Dict[str, Any]) -> tuple:
+        """整行去重键：按列名排序的 (列名, 规范化值) 元组"""
+        return tuple([(key, _canonical_value(value)) for key, value in sorted(row.items())])
+
     def _compute_row_hash(self, row: Dict[str, Any]) -> str:
         """
         计算行的哈希值
@@ -164,37 +216,43 @@ class DistinctProjectOperator(Operator):
         self.columns = plan.get('columns', [])
         if not self.columns:
             raise ValueError("DistinctProject算子需要指定列")
-    
+        # ★ 新增：投影列（去重后的元组）；含 * 时为 None，按整行去重
+        self._cols = None if '*' in self.columns else tuple(dict.fromkeys(self.columns))
+
     def execute(self, storage_engine) -> Iterator[Dict[str, Any]]:
         """执行投影+去重操作"""
         if not self.children:
             raise RuntimeError("DistinctProject算子需要子算子")
         
         child_results = self.children[0].execute(storage_engine)
-        seen_hashes: Set[str] = set()
-        
+
+        cols = self._cols
+        if cols is None:
+            # 含 * 时各行列集合可能不同：先投影，再按整行去重
+            yield from DistinctOperator._dedup(self._project(child_results), None)
+            return
+
+        # ★ 修改：投影与去重合并——直接由输入行取键，只为首次出现的行构造输出字典
+        seen: set = set()
+        canonical = _canonical_value
+
         for row in child_results:
-            # 先投影
+            key = tuple([canonical(row.get(col)) for col in cols])
+            if key not in seen:
+                seen.add(key)
+                yield {col: row.get(col) for col in cols}
+
+    def _project(self, rows: Iterator[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """按 columns 投影每一行"""
+        for row in rows:
             projected_row = {}
             for col in self.columns:
                 if col == '*':
-                    # SELECT DISTINCT * 
+                    # SELECT DISTINCT *
                     projected_row.update(row)
                 else:
                     projected_row[col] = row.get(col)
-            
-            # 再去重
-            row_hash = self._compute_projected_hash(projected_row)
-            
-            if row_hash not in seen_hashes:
-                seen_hashes.add(row_hash)
-                yield projected_row
-    
-    def _compute_projected_hash(self, projected_row: Dict[str, Any]) -> str:
-        """计算投影后行的哈希值"""
-        # 复用DistinctOperator的哈希逻辑
-        distinct_op = DistinctOperator({})
-        return distinct_op._normalize_for_hash(projected_row)
+            yield projected_row
 
 
 def test_distinct_operator():
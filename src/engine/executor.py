@@ -114,19 +114,23 @@ class CreateTableOperator(Operator):
             if self.catalog_mgr:
                 self.catalog_mgr.register_table(table_name, normalized)
 
-            # ★ 修复：处理外键约束 - 正确访问对象属性
-            for fk_constraint in table_constraints:
+            # ★ 修改：表上的全部外键约束一次性校验并写入系统表
+            if table_constraints:
                 try:
-                    self.catalog_mgr.add_foreign_key(
-                        table_name=table_name,
-                        column_name=fk_constraint.column_name,  # ★ 修复：对象属性访问
-                        ref_table_name=fk_constraint.ref_table,  # ★ 修复：对象属性访问
-                        ref_column_name=fk_constraint.ref_column,  # ★ 修复：对象属性访问
-                        constraint_name=fk_constraint.constraint_name  # ★ 修复：对象属性访问
-                    )
-                    print(f"★ 外键约束已添加: {fk_constraint.constraint_name or 'auto_generated'}")
+                    self.catalog_mgr.add_foreign_keys_bulk([
+                        {
+                            "table_name": table_name,
+                            "column_name": fk_constraint.column_name,
+                            "ref_table_name": fk_constraint.ref_table,
+                            "ref_column_name": fk_constraint.ref_column,
+                            "constraint_name": fk_constraint.constraint_name
+                        }
+                        for fk_constraint in table_constraints
+                    ])
                 except Exception as e:
                     raise ExecutionError(f"外键约束创建失败: {e}")
+                for fk_constraint in table_constraints:
+                    print(f"★ 外键约束已添加: {fk_constraint.constraint_name or 'auto_generated'}")
             yield {"status": "success", "message": f"表 {table_name} 创建成功"}
         except Exception as e:
             raise ExecutionError(f"CREATE TABLE失败: {e}")
@@ -413,6 +417,26 @@ class ProjectOperator(Operator):
         self.columns = plan.get('columns', [])
         if not self.columns:
             raise ExecutionError("Project: 缺少投影列")
+        # ★ 新增：投影列在构造时解析一次 —— None 表示 *，否则为 (输出列名, 来源列名)
+        self._targets = [self._resolve_target(col_spec) for col_spec in self.columns]
+
+    @staticmethod
+    def _resolve_target(col_spec):
+        if col_spec == '*':
+            # SELECT * 展开所有列
+            return None
+        if isinstance(col_spec, str):
+            # 简单列名
+            return col_spec, col_spec
+        if isinstance(col_spec, dict):
+            # ★ 新增：支持别名格式 {"name": "id", "alias": "user_id"}
+            if "alias" in col_spec:
+                return col_spec["alias"], col_spec["name"]
+            # 无别名的字典格式
+            col_name = col_spec.get("name", col_spec)
+            return col_name, col_name
+        # 兜底：当作列名处理
+        return str(col_spec), str(col_spec)
 
     def execute(self, storage_engine) -> Iterator[Dict[str, Any]]:
         """执行投影操作（★ 支持别名处理）"""
@@ -422,29 +446,20 @@ class ProjectOperator(Operator):
         # 获取子算子的结果
         child_results = self.children[0].execute(storage_engine)
 
+        targets = self._targets
+        if targets == [None]:
+            # ★ 新增：纯 SELECT * —— 子算子每行都是新解码的字典，直接传递，不再复制一份
+            yield from child_results
+            return
+
         # 投影指定列
         for row in child_results:
             projected_row = {}
-            for col_spec in self.columns:
-                if col_spec == '*':
-                    # SELECT * 展开所有列
+            for target in targets:
+                if target is None:
                     projected_row.update(row)
-                elif isinstance(col_spec, str):
-                    # 简单列名
-                    projected_row[col_spec] = row.get(col_spec)
-                elif isinstance(col_spec, dict):
-                    # ★ 新增：支持别名格式 {"name": "id", "alias": "user_id"}
-                    if "alias" in col_spec:
-                        col_name = col_spec["name"]
-                        alias = col_spec["alias"]
-                        projected_row[alias] = row.get(col_name)
-                    else:
-                        # 无别名的字典格式
-                        col_name = col_spec.get("name", col_spec)
-                        projected_row[col_name] = row.get(col_name)
                 else:
-                    # 兜底：当作列名处理
-                    projected_row[str(col_spec)] = row.get(str(col_spec))
+                    projected_row[target[0]] = row.get(target[1])
 
             yield projected_row
 
@@ -779,27 +794,42 @@ class AlterTableOperator(Operator):
         tmp = f"__alter_tmp_{src_table}"
         # 1) 建临时表（按新列定义）
         storage_engine.create_table(tmp, target_cols)
-        # 2) 复制并映射
-        for row in storage_engine.seq_scan(src_table):
-            storage_engine.insert_row(tmp, row_mapper(row))
+        # 2) 复制并映射（★ 修改：批量写入，每页只取出/写回一次）
+        rows = [row_mapper(row) for row in storage_engine.seq_scan(src_table)]
+        try:
+            copied = storage_engine.insert_rows(tmp, rows)
+        except ValueError:
+            storage_engine.drop_table(tmp)
+            raise
+        # ★ 修复：删除任何表之前先确认行数一致，避免少搬的行随源表一起丢失
+        if copied != len(rows):
+            storage_engine.drop_table(tmp)
+            raise ExecutionError(f"ALTER TABLE: 复制到临时表的行数不符 ({copied}/{len(rows)})，"
+                                 f"表 {src_table} 未修改")
         # 3) 删除目标表（如果目标名与源相同则先删源）
         if dest_table == src_table:
             storage_engine.drop_table(src_table)
             # 重新创建 dest_table
             storage_engine.create_table(dest_table, target_cols)
             # 从 tmp 回填到 dest
-            for row in storage_engine.seq_scan(tmp):
-                storage_engine.insert_row(dest_table, row)
+            self._copy_back(storage_engine, tmp, dest_table, copied)
             # 清理 tmp
             storage_engine.drop_table(tmp)
         else:
             # 目标不同名（RENAME）
             storage_engine.create_table(dest_table, target_cols)
-            for row in storage_engine.seq_scan(tmp):
-                storage_engine.insert_row(dest_table, row)
+            self._copy_back(storage_engine, tmp, dest_table, copied)
             storage_engine.drop_table(tmp)
             storage_engine.drop_table(src_table)
 
+    @staticmethod
+    def _copy_back(storage_engine, tmp: str, dest_table: str, expected: int):
+        """★ 新增：临时表 -> 目标表；行数不符时保留临时表（数据仍可从中恢复）"""
+        copied = storage_engine.insert_rows(dest_table, storage_engine.seq_scan(tmp))
+        if copied != expected:
+            raise ExecutionError(f"ALTER TABLE: 回填到 {dest_table} 的行数不符 ({copied}/{expected})，"
+                                 f"原数据保留在临时表 {tmp} 中")
+
     def _sync_row_count(self, table: str, storage_engine):
         cnt = 0
         for _ in storage_engine.seq_scan(table):
@@ -5,7 +5,7 @@ SQL词法分析器
 
 import re
 from enum import Enum
-from typing import List, Tuple, NamedTuple
+from typing import List, Tuple, NamedTuple, Iterator, Iterable
 
 class TokenType(Enum):
     """Token种别码 - 符合任务书要求"""
@@ -39,6 +39,12 @@ class SqlError(Exception):
         self.hint = hint
         super().__init__(f"{error_type} at line {line}, col {col}: {hint}")
 
+# ★ 新增：热点字符扫描交给C实现的正则引擎（标识符/数字不含换行，列号按长度推进）
+_WHITESPACE_RE = re.compile(r'\s+')
+_IDENTIFIER_RE = re.compile(r'[^\W\d]\w*')
+_NUMBER_RE = re.compile(r'\d+(?:\.\d+)?')
+
+
 class Lexer:
     """SQL词法分析器"""
 
@@ -54,6 +60,9 @@ class Lexer:
         'TO','MODIFY','CHAR','CHANGE','DEFAULT','CONSTRAINT'
     }
 
+    # ★ 新增：关键字查找表（全大写/全小写写法直接命中，值为规范的大写关键字）
+    _KEYWORD_LOOKUP = {variant: kw for kw in KEYWORDS for variant in (kw, kw.lower())}
+
     # 操作符
     OPERATORS = {
         '=', '!=', '<>', '<', '>', '<=', '>=', '+', '-', '*', '/', '%', '||'
@@ -71,19 +80,30 @@ class Lexer:
         self.col = 1
         self.tokens = []
 
-    def tokenize(self, sql_text: str) -> List[Token]:
+    def tokenize(self, sql_text: str, start_line: int = 1) -> List[Token]:
         """
         词法分析主函数
         Args:
             sql_text: SQL语句文本
+            start_line: 文本首行在源文件中的行号（★ 新增：脚本分段词法分析时保持真实行号）
         Returns:
             Token列表
         Raises:
             SqlError: 词法错误
         """
+        tokens = list(self.iter_tokens(sql_text, start_line))
+        self.tokens = tokens
+        return tokens
+
+    def iter_tokens(self, sql_text: str, start_line: int = 1) -> Iterator[Token]:
+        """
+        ★ 新增：惰性词法分析，逐个产出Token（以EOF结尾），不物化整个Token列表
+        Raises:
+            SqlError: 词法错误（在迭代到出错位置时抛出）
+        """
         self.text = sql_text
         self.pos = 0
-        self.line = 1
+        self.line = start_line
         self.col = 1
         self.tokens = []
 
@@ -99,17 +119,11 @@ class Lexer:
             start_line = self.line
             start_col = self.col
 
-            # 尝试匹配各种Token
-            if self._match_string():
-                continue
-            elif self._match_number():
-                continue
-            elif self._match_identifier_or_keyword():
-                continue
-            elif self._match_operator():
-                continue
-            elif self._match_delimiter():
-                continue
+            # 尝试匹配各种Token（_match_* 每次只追加一个Token，取出后立即产出）
+            if (self._match_string() or self._match_number() or
+                    self._match_identifier_or_keyword() or self._match_operator() or
+                    self._match_delimiter()):
+                yield self.tokens.pop()
             else:
                 # 非法字符
                 char = self.text[self.pos]
@@ -117,8 +131,36 @@ class Lexer:
                              f"Unexpected character '{char}'")
 
         # 添加EOF标记
-        self.tokens.append(Token(TokenType.EOF, "", self.line, self.col))
-        return self.tokens
+        yield Token(TokenType.EOF, "", self.line, self.col)
+
+    def tokenize_stream(self, sql_text: str, start_line: int = 1) -> Iterator[List[Token]]:
+        """
+        ★ 新增：对多语句脚本只做一次词法分析，按 ';' 切分为逐条语句的Token列表
+        Args:
+            sql_text: 包含多条SQL语句的文本
+            start_line: 文本首行在源文件中的行号
+        Yields:
+            每条语句的Token列表（以 ';' 结尾，并追加EOF标记）
+        Raises:
+            SqlError: 词法错误
+        """
+        tokens = self.tokenize(sql_text, start_line)
+        stmt = []
+        for token in tokens:
+            if token.type == TokenType.EOF:
+                break
+            stmt.append(token)
+            if token.type == TokenType.DELIMITER and token.lexeme == ';':
+                stmt.append(Token(TokenType.EOF, "", token.line, token.col + 1))
+                yield stmt
+                stmt = []
+
+        # 末尾语句缺少分号时自动补齐（与交互模式一致）
+        if stmt:
+            last = tokens[-1]
+            stmt.append(Token(TokenType.DELIMITER, ";", last.line, last.col))
+            stmt.append(Token(TokenType.EOF, "", last.line, last.col))
+            yield stmt
 
     def _current_char(self) -> str:
         """获取当前字符"""
@@ -147,9 +189,17 @@ class Lexer:
         return '\0'
 
     def _skip_whitespace(self):
-        """跳过空白字符"""
-        while self.pos < len(self.text) and self.text[self.pos].isspace():
-            self._advance()
+        """跳过空白字符（★ 整段由正则匹配，一次性更新行列号）"""
+        m = _WHITESPACE_RE.match(self.text, self.pos)
+        if m:
+            ws = m.group()
+            self.pos = m.end()
+            newlines = ws.count('\n')
+            if newlines:
+                self.line += newlines
+                self.col = len(ws) - ws.rfind('\n')
+            else:
+                self.col += len(ws)
 
     def _match_comment(self) -> bool:
         """匹配注释"""
@@ -214,48 +264,40 @@ class Lexer:
                      f"Unterminated string literal")
 
     def _match_number(self) -> bool:
-        """匹配数字常量"""
-        if not self._current_char().isdigit():
+        """匹配数字常量（★ 正则一次匹配整数/小数部分）"""
+        m = _NUMBER_RE.match(self.text, self.pos)
+        if not m:
             return False
 
-        start_line = self.line
-        start_col = self.col
-        value = ""
-
-        # 整数部分
-        while self.pos < len(self.text) and self._current_char().isdigit():
-            value += self._advance()
-
-        # 小数部分
-        if self._current_char() == '.' and self._peek_char().isdigit():
-            value += self._advance()  # .
-            while self.pos < len(self.text) and self._current_char().isdigit():
-                value += self._advance()
-
-        self.tokens.append(Token(TokenType.NUMBER, value, start_line, start_col))
+        value = m.group()
+        self.tokens.append(Token(TokenType.NUMBER, value, self.line, self.col))
+        self.pos = m.end()
+        self.col += len(value)
         return True
 
     def _match_identifier_or_keyword(self) -> bool:
-        """匹配标识符或关键字"""
-        if not (self._current_char().isalpha() or self._current_char() == '_'):
+        """匹配标识符或关键字（★ 正则一次匹配整个标识符）"""
+        m = _IDENTIFIER_RE.match(self.text, self.pos)
+        if not m:
             return False
 
-        start_line = self.line
+        value = m.group()
         start_col = self.col
-        value = ""
+        self.pos = m.end()
+        self.col += len(value)
 
-        while (self.pos < len(self.text) and
-               (self._current_char().isalnum() or self._current_char() == '_')):
-            value += self._advance()
+        # 判断是关键字还是标识符（★ 一次字典查找；ASCII 全大写/全小写无需再 upper()）
+        keyword = self._KEYWORD_LOOKUP.get(value)
+        if keyword is None and not (value.isascii() and (value.isupper() or value.islower())):
+            keyword = self._KEYWORD_LOOKUP.get(value.upper())
 
-        # 判断是关键字还是标识符
-        if value.upper() in self.KEYWORDS:
+        if keyword is not None:
             token_type = TokenType.KEYWORD
-            value = value.upper()  # 关键字统一大写
+            value = keyword  # 关键字统一大写
         else:
             token_type = TokenType.IDENTIFIER
 
-        self.tokens.append(Token(token_type, value, start_line, start_col))
+        self.tokens.append(Token(token_type, value, self.line, start_col))
         return True
 
     def _match_operator(self) -> bool:
@@ -291,20 +333,42 @@ class Lexer:
             return True
         return False
 
+_TOKEN_HEADER = ("=== Token Stream ===",
+                 f"{'Type':<12} {'Lexeme':<15} {'Line':<4} {'Col':<4}",
+                 "-" * 40)
+
+
+def _format_token_line(token: Token) -> str:
+    return f"{token.type.value:<12} {token.lexeme:<15} {token.line:<4} {token.col:<4}"
+
+
 def format_tokens(tokens: List[Token]) -> str:
     """格式化Token输出"""
-    result = []
-    result.append("=== Token Stream ===")
-    result.append(f"{'Type':<12} {'Lexeme':<15} {'Line':<4} {'Col':<4}")
-    result.append("-" * 40)
+    result = list(_TOKEN_HEADER)
 
     for token in tokens:
         if token.type == TokenType.EOF:
             break
-        result.append(f"{token.type.value:<12} {token.lexeme:<15} {token.line:<4} {token.col:<4}")
+        result.append(_format_token_line(token))
 
     return "\n".join(result)
 
+
+def format_tokens_to(stream, tokens: Iterable[Token]) -> int:
+    """
+    ★ 新增：逐行把Token写入流（可直接接 Lexer.iter_tokens，无需先物化列表）
+    Returns:
+        写出的Token数（不含EOF）
+    """
+    stream.write("\n".join(_TOKEN_HEADER) + "\n")
+    count = 0
+    for token in tokens:
+        if token.type == TokenType.EOF:
+            break
+        stream.write(_format_token_line(token) + "\n")
+        count += 1
+    return count
+
 # 测试函数
 def test_lexer():
     """测试词法分析器"""
@@ -319,13 +319,23 @@ class Parser:
     def __init__(self):
         self.tokens: List[Token] = []
         self.current = 0
+        self.lexer = Lexer()  # ★ 新增：词法分析器随Parser复用
+
+    def reset(self):
+        """★ 新增：清空上一次解析的状态，便于同一个Parser重复使用"""
+        self.tokens = []
+        self.current = 0
 
     def parse(self, sql_text: str) -> ASTNode:
         """解析SQL语句生成AST"""
+        self.reset()
         # 先进行词法分析
-        lexer = Lexer()
-        self.tokens = lexer.tokenize(sql_text)
-        self.current = 0
+        return self.parse_tokens(self.lexer.tokenize(sql_text))
+
+    def parse_tokens(self, tokens: List[Token]) -> ASTNode:
+        """★ 新增：直接解析已完成词法分析的Token列表（跳过重复词法分析）"""
+        self.reset()
+        self.tokens = tokens
 
         # 解析语句
         try:
@@ -42,6 +42,12 @@ import json
 from typing import Dict, List, Optional, Any, Union
 from pathlib import Path
 
+# ★ 新增：可选依赖 orjson（更快的JSON编码），未安装时回退到标准库 json
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # 导入依赖
 if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -74,10 +80,24 @@ class ExecutionPlan:
 
     def __init__(self, plan_dict: Dict[str, Any]):
         self.plan = plan_dict
+        # ★ 新增：序列化结果缓存（计划生成后视为只读，缓存的计划重复展示时不再遍历）
+        self._json_cache: Dict[Optional[int], str] = {}
+        self._tree_text: Optional[str] = None
 
     def to_json(self, indent: int = 2) -> str:
         """转换为JSON字符串"""
-        return json.dumps(self.plan, indent=indent, ensure_ascii=False)
+        text = self._json_cache.get(indent)
+        if text is None:
+            if orjson is not None and indent == 2:
+                # orjson 的 OPT_INDENT_2 与 json.dumps(indent=2) 排版一致；无法编码时回退
+                try:
+                    text = orjson.dumps(self.plan, option=orjson.OPT_INDENT_2).decode('utf-8')
+                except TypeError:
+                    text = None
+            if text is None:
+                text = json.dumps(self.plan, indent=indent, ensure_ascii=False)
+            self._json_cache[indent] = text
+        return text
 
     def to_dict(self) -> Dict[str, Any]:
         """获取计划字典"""
@@ -91,9 +111,10 @@ class ExecutionPlan:
 class Planner:
     """执行计划生成器"""
 
-    def __init__(self, catalog: Catalog = None):
+    def __init__(self, catalog: Catalog = None, parser: Parser = None):
         self.catalog = catalog if catalog else Catalog()
         self.semantic_analyzer = SemanticAnalyzer(self.catalog)
+        self.parser = parser if parser else Parser()  # ★ 新增：复用Parser实例（可由调用方共享传入）
 
     def plan(self, sql_text: str) -> ExecutionPlan:
         """
@@ -107,8 +128,7 @@ class Planner:
         """
         try:
             # 1. 语法分析
-            parser = Parser()
-            ast = parser.parse(sql_text)
+            ast = self.parser.parse(sql_text)
 
             # 2. 语义分析（可选，用于验证）
             # semantic_result = self.semantic_analyzer.analyze(ast)
@@ -123,6 +143,15 @@ class Planner:
         except Exception as e:
             raise PlanError(0, 0, f"Plan generation error: {str(e)}")
 
+    def plan_from_ast(self, ast: ASTNode) -> ExecutionPlan:
+        """★ 新增：根据已解析好的AST生成执行计划（跳过重复的词法/语法分析）"""
+        try:
+            return ExecutionPlan(self._generate_plan(ast))
+        except (ParseError, SemanticError) as e:
+            raise PlanError(e.line, e.col, f"Cannot generate plan: {e.hint}")
+        except Exception as e:
+            raise PlanError(0, 0, f"Plan generation error: {str(e)}")
+
     def _generate_plan(self, ast: ASTNode) -> Dict[str, Any]:
         """根据AST生成执行计划"""
         if isinstance(ast, CreateTableNode):
@@ -882,6 +911,11 @@ class Planner:
 
 def format_execution_plan(plan: ExecutionPlan, indent: int = 0) -> str:
     """格式化执行计划为树形字符串"""
+    if indent == 0:
+        # ★ 新增：顶层树形文本缓存在计划对象上
+        if plan._tree_text is None:
+            plan._tree_text = _format_plan_dict(plan.to_dict(), 0)
+        return plan._tree_text
     plan_dict = plan.to_dict()
     return _format_plan_dict(plan_dict, indent)
 
@@ -91,7 +91,7 @@ class Catalog:
         if self.table_exists(name):
             raise ValueError(f"Table '{name}' already exists")
 
-        self.tables[name.lower()] = TableInfo(name, columns)
+        self.tables[sys.intern(name.lower())] = TableInfo(name, columns)  # ★ 修改：驻留键
 
     def table_exists(self, name: str) -> bool:
         """检查表是否存在"""
@@ -108,6 +108,10 @@ class Catalog:
             return True
         return False
 
+    def clear(self) -> None:
+        """★ 新增：原地清空所有表信息（SemanticAnalyzer/Planner 持有的是同一引用，无需重建）"""
+        self.tables.clear()
+
     def list_tables(self) -> List[str]:
         """列出所有表名"""
         return [table.name for table in self.tables.values()]
@@ -5,13 +5,16 @@ BufferPool - 页面缓冲池
 
 【功能说明】
 - 在FileManager之上提供页面缓存层
-- 支持LRU(最近最少使用)和FIFO(先进先出)替换策略
+- 支持LRU(最近最少使用)、LRU2(young/old分区LRU)和FIFO(先进先出)替换策略
 - 跟踪缓存命中率和页面淘汰日志
 - 管理脏页(修改过的页面)的刷盘
 
 【设计原理】
 - 缓存热点页面在内存中，减少磁盘I/O
 - 使用OrderedDict实现LRU，普通dict+队列实现FIFO
+- LRU2: 仿InnoDB的young/old两段链表，新页面先进入old区，在old区驻留超过
+  时间窗口后再次被访问才晋升到young区；淘汰优先取old区最久未用页面，
+  顺序扫描只访问一次的页面不会挤掉热点页面(如系统目录页)
 - 脏页延迟写入，提高性能
 - 详细统计信息便于性能分析
 
@@ -46,6 +49,10 @@ class EvictionEvent:
 class BufferPool:
     """页面缓冲池"""
 
+    # ★ 新增：LRU2 参数 —— young区占容量比例、old区晋升前需驻留的时间(秒)
+    LRU2_YOUNG_RATIO = 5 / 8
+    LRU2_OLD_BLOCK_TIME = 1.0
+
     def __init__(self, file_manager: FileManager, capacity: int = 64, policy: str = "LRU"):
         """
         初始化缓冲池
@@ -53,13 +60,13 @@ class BufferPool:
         Args:
             file_manager: 文件管理器
             capacity: 缓存页面数量
-            policy: 替换策略 "LRU" 或 "FIFO"
+            policy: 替换策略 "LRU"、"LRU2" 或 "FIFO"
         """
         if capacity <= 0:
             raise ValueError("缓存容量必须大于0")
 
-        if policy not in ["LRU", "FIFO"]:
-            raise ValueError("替换策略必须是 'LRU' 或 'FIFO'")
+        if policy not in ["LRU", "LRU2", "FIFO"]:
+            raise ValueError("替换策略必须是 'LRU'、'LRU2' 或 'FIFO'")
 
         self.file_manager = file_manager
         self.capacity = capacity
@@ -68,6 +75,11 @@ class BufferPool:
         # 缓存存储
         if policy == "LRU":
             self.cache = OrderedDict()  # (table, page_id) -> SlottedPage
+        elif policy == "LRU2":
+            self.cache = {}  # (table, page_id) -> SlottedPage
+            self.young = OrderedDict()  # 热点区: key -> None，末尾为最近使用
+            self.old = OrderedDict()  # 冷区: key -> 进入old区的时间，末尾为最新进入
+            self.young_capacity = max(1, int(capacity * self.LRU2_YOUNG_RATIO))
         else:  # FIFO
             self.cache = {}  # (table, page_id) -> SlottedPage
             self.fifo_queue = deque()  # 记录插入顺序
@@ -107,6 +119,8 @@ class BufferPool:
             # LRU: 移动到末尾表示最近使用
             if self.policy == "LRU":
                 self.cache.move_to_end(cache_key)
+            elif self.policy == "LRU2":
+                self._touch_lru2(cache_key)
 
             return self.cache[cache_key]
 
@@ -147,6 +161,10 @@ class BufferPool:
         if self.policy == "LRU":
             self.cache[cache_key] = page
             self.cache.move_to_end(cache_key)  # 标记为最近使用
+        elif self.policy == "LRU2":
+            if cache_key not in self.cache:
+                self.old[cache_key] = time.monotonic()  # 新页面进入old区头部
+            self.cache[cache_key] = page
         else:  # FIFO
             if cache_key not in self.cache:
                 self.fifo_queue.append(cache_key)
@@ -161,6 +179,11 @@ class BufferPool:
         if self.policy == "LRU":
             # OrderedDict: 第一个是最久未使用的
             evict_key, evict_page = self.cache.popitem(last=False)
+        elif self.policy == "LRU2":
+            # 优先淘汰old区最久的页面，old区为空时才动young区
+            region = self.old if self.old else self.young
+            evict_key, _ = region.popitem(last=False)
+            evict_page = self.cache.pop(evict_key)
         else:  # FIFO
             # 从队列头部取出最早进入的页面
             evict_key = self.fifo_queue.popleft()
@@ -181,6 +204,24 @@ class BufferPool:
 
         print(f"淘汰页面: {table_name}.{page_id} ({'脏页' if was_dirty else '干净页'})")
 
+    def _touch_lru2(self, cache_key: Tuple[str, int]) -> None:
+        """LRU2命中：young区内移到最近端；old区页面驻留超过时间窗口才晋升到young区"""
+        if cache_key in self.young:
+            self.young.move_to_end(cache_key)
+            return
+
+        now = time.monotonic()
+        if now - self.old[cache_key] < self.LRU2_OLD_BLOCK_TIME:
+            return  # 短时间内的相关访问(如同一次扫描)不算热点
+
+        del self.old[cache_key]
+        self.young[cache_key] = None
+
+        # young区超额时，最久未用的页面降级到old区头部
+        if len(self.young) > self.young_capacity:
+            demoted, _ = self.young.popitem(last=False)
+            self.old[demoted] = now
+
     def flush_dirty_pages(self, table_name: str = None) -> int:
         """
         刷新脏页到磁盘
@@ -242,6 +283,9 @@ class BufferPool:
             key_table, key_page_id = cache_key
             page = self.cache.pop(cache_key)
             was_dirty = cache_key in self.dirty_pages
+            if self.policy == "LRU2":
+                self.young.pop(cache_key, None)
+                self.old.pop(cache_key, None)
 
             # 如果是脏页，写回磁盘
             if was_dirty:
@@ -299,6 +343,9 @@ class BufferPool:
         self.cache.clear()
         if self.policy == "FIFO":
             self.fifo_queue.clear()
+        elif self.policy == "LRU2":
+            self.young.clear()
+            self.old.clear()
         self.dirty_pages.clear()
 
         self.evictions += evicted_count
@@ -429,12 +476,14 @@ def test_replacement_policies():
 
         return stats
 
-    # 对比两种策略
+    # 对比三种策略
     lru_stats = test_policy("LRU")
+    lru2_stats = test_policy("LRU2")
     fifo_stats = test_policy("FIFO")
 
     print(f"\n--- 策略对比结果 ---")
     print(f"LRU  - 命中率: {lru_stats['hit_ratio_pct']}%, 淘汰次数: {lru_stats['evictions']}")
+    print(f"LRU2 - 命中率: {lru2_stats['hit_ratio_pct']}%, 淘汰次数: {lru2_stats['evictions']}")
     print(f"FIFO - 命中率: {fifo_stats['hit_ratio_pct']}%, 淘汰次数: {fifo_stats['evictions']}")
 
 
@@ -172,6 +172,42 @@ class SlottedPage:
         if not is_deleted:
             self._set_slot_info(slot_id, offset, length, True)
 
+    def update(self, slot_id: int, record: bytes) -> bool:
+        """
+        原地更新记录（★ 新增），槽ID保持不变
+
+        新记录不长于原记录时直接覆盖原数据区；否则在空闲空间写入新数据并改指槽。
+
+        Args:
+            slot_id: 槽ID
+            record: 新的记录数据
+
+        Returns:
+            是否更新成功（记录已删除或页面空间不足时返回False）
+        """
+        if len(record) == 0:
+            raise ValueError("记录不能为空")
+
+        offset, length, is_deleted = self._get_slot_info(slot_id)
+        if is_deleted:
+            return False
+
+        record_len = len(record)
+        if record_len <= length:
+            self.data[offset:offset + record_len] = record
+            self._set_slot_info(slot_id, offset, record_len, False)
+            return True
+
+        if self.get_free_space() < record_len:
+            return False
+
+        data_start, slot_count, flags = self._get_header_info()
+        new_data_start = data_start - record_len
+        self.data[new_data_start:new_data_start + record_len] = record
+        self._set_slot_info(slot_id, new_data_start, record_len, False)
+        self._set_header_info(new_data_start, slot_count, flags)
+        return True
+
     def is_deleted(self, slot_id: int) -> bool:
         """检查记录是否已删除"""
         try:
@@ -377,6 +413,33 @@ def test_edge_cases():
         print(f"正确: 检测到页面ID不匹配 - {e}")
 
 
+def test_update():
+    """测试原地更新"""
+    print("\n=== 测试5: 原地更新 ===")
+
+    page = SlottedPage(500)
+    slot_a = page.insert(b"Alice")
+    slot_b = page.insert(b"Bob")
+
+    # 等长/更短记录覆盖原数据区
+    assert page.update(slot_a, b"Alize")
+    assert page.update(slot_b, b"Bo")
+    # 更长记录写入空闲空间，槽ID不变
+    assert page.update(slot_a, b"Alice Cooper")
+    assert page.read(slot_a) == b"Alice Cooper"
+    assert page.read(slot_b) == b"Bo"
+    assert page.get_slot_count() == 2
+
+    # 已删除记录不可更新
+    page.delete(slot_b)
+    assert not page.update(slot_b, b"Bob")
+
+    # 空间不足时拒绝更新，原记录保持不变
+    assert not page.update(slot_a, b"x" * PAGE_SIZE)
+    assert page.read(slot_a) == b"Alice Cooper"
+    print(f"原地更新测试通过: {page}")
+
+
 def run_all_tests():
     """运行所有测试"""
     print("SlottedPage 全功能测试")
@@ -386,6 +449,7 @@ def run_all_tests():
     test_serialization()
     test_capacity_limits()
     test_edge_cases()
+    test_update()
 
     print("\n" + "=" * 50)
     print("所有测试完成!")
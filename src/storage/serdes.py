@@ -23,7 +23,7 @@ NULL位图: 每列1位，1表示NULL，0表示有值
 
 import struct
 import math
-from typing import Dict, List, Any, Tuple, Optional
+from typing import Dict, List, Any, Tuple, Optional, Sequence, Union
 
 
 class ColumnType:
@@ -103,7 +103,40 @@ class RecordEncoder:
                 offsets.append(current_offset)
                 current_offset += len(encoded_value)
 
-        # 3. 组装最终字节数据
+        return self._assemble(null_bitmap, offsets, data_parts)
+
+    def encode_values(self, values: Sequence[Any]) -> bytes:
+        """
+        按列序编码行数据为字节（★ 新增，调用方已知列顺序时省去构造行字典）
+
+        Args:
+            values: 与列定义一一对应的值序列
+
+        Returns:
+            编码后的字节数据
+        """
+        if len(values) != self.column_count:
+            raise ValueError(f"列数不匹配: 期望{self.column_count}, 得到{len(values)}")
+
+        null_bitmap = bytearray(self.null_bitmap_size)
+        data_parts = []
+        offsets = []
+        current_offset = self.header_size
+
+        for i, (col, value) in enumerate(zip(self.columns, values)):
+            if value is None:
+                null_bitmap[i // 8] |= (1 << (i % 8))
+                offsets.append(0)
+            else:
+                encoded_value = self._encode_value(col, value)
+                data_parts.append(encoded_value)
+                offsets.append(current_offset)
+                current_offset += len(encoded_value)
+
+        return self._assemble(null_bitmap, offsets, data_parts)
+
+    def _assemble(self, null_bitmap: bytearray, offsets: List[int], data_parts: List[bytes]) -> bytes:
+        """组装最终字节数据: NULL位图 + 列偏移表 + 数据区"""
         result = bytearray()
 
         # NULL位图
@@ -204,6 +237,31 @@ class RecordDecoder:
 
         return row_data
 
+    def decode_column(self, record_bytes: bytes, col_index: int) -> Any:
+        """
+        只解码记录中的一列（★ 新增），按列过滤时无需构造整行字典
+
+        Args:
+            record_bytes: 编码的字节数据
+            col_index: 列序号
+
+        Returns:
+            该列的值（NULL 返回 None）
+        """
+        if len(record_bytes) < self.header_size:
+            raise ValueError("记录数据太短")
+
+        if record_bytes[col_index // 8] & (1 << (col_index % 8)):
+            return None
+
+        offset_pos = self.null_bitmap_size + col_index * 2
+        data_offset = struct.unpack('<H', record_bytes[offset_pos:offset_pos + 2])[0]
+        col = self.columns[col_index]
+        if data_offset == 0:
+            raise ValueError(f"列{col.name}偏移为0但不是NULL")
+
+        return self._decode_value(col, record_bytes, data_offset)
+
     def _decode_value(self, col: ColumnDef, record_bytes: bytes, offset: int) -> Any:
         """解码单个值"""
         if col.type == ColumnType.INT:
@@ -241,8 +299,10 @@ class TableSchema:
         self.encoder = RecordEncoder(columns)
         self.decoder = RecordDecoder(columns)
 
-    def encode_row(self, row_data: Dict[str, Any]) -> bytes:
-        """编码行数据"""
+    def encode_row(self, row_data: Union[Dict[str, Any], Tuple[Any, ...]]) -> bytes:
+        """编码行数据（★ 修改：也接受按列序排列的元组）"""
+        if type(row_data) is tuple:
+            return self.encoder.encode_values(row_data)
         return self.encoder.encode(row_data)
 
     def decode_row(self, record_bytes: bytes) -> Dict[str, Any]:
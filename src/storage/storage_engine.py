@@ -15,16 +15,22 @@ SQL编译器 → StorageEngine → BufferPool → FileManager → SlottedPage 
 【关键接口】
 - create_table(name, columns): 创建表
 - insert_row(table, row_data): 插入记录
+- insert_rows(table, rows): 批量插入记录
 - seq_scan(table): 全表扫描迭代器
+- seq_scan_with_rid(table): 带记录位置的全表扫描
+- update_row(table, rid, row): 按位置原地更新
 - delete_where(table, predicate): 按条件删除
+- delete_by(table, column, value): 按列等值删除
+- delete_rows(table, rids): 按位置删除
 """
 
 import os
 import json
 import time
-from typing import Dict, List, Any, Iterator, Callable, Optional, Tuple
+from typing import Dict, List, Any, Container, Iterable, Iterator, Callable, Optional, Tuple, Union
 from storage.file_manager import FileManager
 from storage.buffer import BufferPool
+from storage.page import PAGE_SIZE, HEADER_SIZE, SLOT_SIZE
 from storage.serdes import TableSchema, ColumnDef, ColumnType
 
 
@@ -85,7 +91,7 @@ class StorageEngine:
         Args:
             data_dir: 数据目录
             buffer_capacity: 缓冲池容量(页数)
-            buffer_policy: 缓冲池策略(LRU/FIFO)
+            buffer_policy: 缓冲池策略(LRU/LRU2/FIFO)
         """
         self.data_dir = data_dir
 
@@ -97,6 +103,18 @@ class StorageEngine:
         self.tables: Dict[str, TableInfo] = {}
         self.metadata_file = os.path.join(data_dir, "tables_metadata.json")
 
+        # ★ 新增：写入监听器 callback(table_name, old_row, new_row)
+        # 插入时 old_row=None，删除时 new_row=None，删表时两者皆为 None
+        # 每项为 (回调, 关注的表名集合或None)，None 表示关注所有表
+        self._write_listeners: List[Tuple[Callable[[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None],
+                                          Optional[Container[str]]]] = []
+        # ★ 新增：最近一次 insert_row 成功写入的位置 (page_id, slot_id)
+        self.last_insert_rid: Optional[Tuple[int, int]] = None
+        # ★ 新增：最近一次 insert_rows 写入的各行位置，与输入行顺序一致
+        self.last_insert_rids: List[Tuple[int, int]] = []
+        # ★ 新增：关闭前回调（如目录管理器写回延迟的统计信息）
+        self._close_callbacks: List[Callable[[], None]] = []
+
         # 加载已有表的元数据
         self._load_metadata()
 
@@ -127,6 +145,37 @@ class StorageEngine:
         with open(self.metadata_file, 'w', encoding='utf-8') as f:
             json.dump(metadata, f, ensure_ascii=False, indent=2)
 
+    def add_write_listener(self, callback: Callable[[str, Optional[Dict[str, Any]], Optional[Dict[str, Any]]], None],
+                           tables: Optional[Container[str]] = None) -> None:
+        """
+        注册写入监听器（★ 新增）
+
+        每条记录被插入/删除/更新、或整张表被删除后回调一次，
+        供上层（如外键校验器）增量维护内存索引。
+
+        tables 为监听器关注的表名容器（可由调用方持续增删，如 dict/set），
+        只有其中的表才会解码行并回调；不关注的表写入时没有额外开销。None 表示关注所有表。
+        """
+        self._write_listeners.append((callback, tables))
+
+    def _is_watched(self, table_name: str) -> bool:
+        """是否有写入监听器关注该表"""
+        for _, tables in self._write_listeners:
+            if tables is None or table_name in tables:
+                return True
+        return False
+
+    def add_close_callback(self, callback: Callable[[], None]) -> None:
+        """注册关闭前回调（★ 新增），在 close() 刷盘之前依次调用"""
+        self._close_callbacks.append(callback)
+
+    def _notify_write(self, table_name: str, old_row: Optional[Dict[str, Any]],
+                      new_row: Optional[Dict[str, Any]]) -> None:
+        """通知关注该表的写入监听器"""
+        for callback, tables in self._write_listeners:
+            if tables is None or table_name in tables:
+                callback(table_name, old_row, new_row)
+
     def create_table(self, table_name: str, columns: List[Dict[str, Any]]) -> None:
         """
         创建表
@@ -194,17 +243,19 @@ class StorageEngine:
             # 删除元数据
             del self.tables[table_name]
             self._save_metadata()
+            if self._is_watched(table_name):
+                self._notify_write(table_name, None, None)
             print(f"删除表成功: {table_name}")
 
         return success
 
-    def insert_row(self, table_name: str, row_data: Dict[str, Any]) -> bool:
+    def insert_row(self, table_name: str, row_data: Union[Dict[str, Any], Tuple[Any, ...]]) -> bool:
         """
         插入记录
 
         Args:
             table_name: 表名
-            row_data: 行数据字典
+            row_data: 行数据字典，或按表列序排列的值元组
 
         Returns:
             是否插入成功
@@ -237,12 +288,15 @@ class StorageEngine:
                 if slot_id != -1:
                     # 插入成功，写回缓冲池(标记脏页)
                     self.buffer_pool.put_page(table_name, page, mark_dirty=True)
+                    self.last_insert_rid = (page_id, slot_id)
 
                     # 更新表统计
                     table_info.total_rows += 1
                     table_info.last_modified = time.time()
                     self._save_metadata()
 
+                    if self._is_watched(table_name):
+                        self._notify_write(table_name, None, table_info.schema.decode_row(record_bytes))
                     return True
 
             except Exception as e:
@@ -257,6 +311,7 @@ class StorageEngine:
             slot_id = new_page.insert(record_bytes)
             if slot_id != -1:
                 self.buffer_pool.put_page(table_name, new_page, mark_dirty=True)
+                self.last_insert_rid = (new_page_id, slot_id)
 
                 # 更新表统计
                 table_info.total_rows += 1
@@ -264,6 +319,8 @@ class StorageEngine:
                 table_info.last_modified = time.time()
                 self._save_metadata()
 
+                if self._is_watched(table_name):
+                    self._notify_write(table_name, None, table_info.schema.decode_row(record_bytes))
                 return True
 
         except Exception as e:
@@ -272,6 +329,97 @@ class StorageEngine:
 
         return False
 
+    def insert_rows(self, table_name: str, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        批量插入记录（★ 新增）
+
+        所有行先完成编码，再按页顺序填充：每个页面只取出/写回缓冲池一次，
+        表统计与元数据文件在整批结束后只更新一次。
+
+        Args:
+            table_name: 表名
+            rows: 行数据字典（或按列序排列的值元组）的可迭代对象
+
+        Returns:
+            成功插入的行数
+
+        Raises:
+            ValueError: 表不存在、数据格式错误或记录超过单页容量（此时不会写入任何行）
+        """
+        if table_name not in self.tables:
+            raise ValueError(f"表不存在: {table_name}")
+
+        table_info = self.tables[table_name]
+
+        # 编码行数据
+        try:
+            records = [table_info.schema.encode_row(row_data) for row_data in rows]
+        except ValueError as e:
+            raise ValueError(f"数据编码失败: {e}")
+
+        # ★ 修复：空页也放不下的记录在写入前报错，不能让其后的行被悄悄丢弃
+        max_len = PAGE_SIZE - HEADER_SIZE - SLOT_SIZE
+        for i, record_bytes in enumerate(records):
+            if len(record_bytes) > max_len:
+                raise ValueError(f"第{i + 1}行记录过大: {len(record_bytes)}字节，单页最多{max_len}字节")
+
+        total = len(records)
+        inserted = 0
+        rids = self.last_insert_rids = []
+
+        # 先填充现有数据页
+        for page_id in self.file_manager.get_all_page_ids(table_name):
+            if inserted == total:
+                break
+            try:
+                page = self.buffer_pool.get_page(table_name, page_id)
+                start = inserted
+                while inserted < total:
+                    slot_id = page.insert(records[inserted])
+                    if slot_id == -1:
+                        break
+                    rids.append((page_id, slot_id))
+                    inserted += 1
+                if inserted > start:
+                    self.buffer_pool.put_page(table_name, page, mark_dirty=True)
+            except Exception as e:
+                print(f"插入记录到页面{page_id}失败: {e}")
+                continue
+
+        # 现有页面都满，按需分配新页面
+        while inserted < total:
+            try:
+                new_page_id = self.file_manager.allocate_new_page(table_name)
+                new_page = self.buffer_pool.get_page(table_name, new_page_id)
+
+                start = inserted
+                while inserted < total:
+                    slot_id = new_page.insert(records[inserted])
+                    if slot_id == -1:
+                        break
+                    rids.append((new_page_id, slot_id))
+                    inserted += 1
+                if inserted == start:
+                    break  # 空页也放不下这条记录
+                self.buffer_pool.put_page(table_name, new_page, mark_dirty=True)
+                table_info.total_pages += 1
+            except Exception as e:
+                print(f"分配新页面插入失败: {e}")
+                break
+
+        # 更新表统计
+        if inserted:
+            table_info.total_rows += inserted
+            table_info.last_modified = time.time()
+            self._save_metadata()
+
+            if self._is_watched(table_name):
+                decode_row = table_info.schema.decode_row
+                for record_bytes in records[:inserted]:
+                    self._notify_write(table_name, None, decode_row(record_bytes))
+
+        return inserted
+
     def seq_scan(self, table_name: str) -> Iterator[Dict[str, Any]]:
         """
         全表顺序扫描
@@ -311,6 +459,81 @@ class StorageEngine:
                 print(f"扫描页面失败 {table_name}.{page_id}: {e}")
                 continue
 
+    def seq_scan_with_rid(self, table_name: str) -> Iterator[Tuple[Tuple[int, int], Dict[str, Any]]]:
+        """
+        全表顺序扫描，同时给出每条记录的位置（★ 新增）
+
+        Yields:
+            ((page_id, slot_id), 行数据字典)
+
+        Raises:
+            ValueError: 表不存在
+        """
+        if table_name not in self.tables:
+            raise ValueError(f"表不存在: {table_name}")
+
+        table_info = self.tables[table_name]
+
+        for page_id in self.file_manager.get_all_page_ids(table_name):
+            try:
+                page = self.buffer_pool.get_page(table_name, page_id)
+                for slot_id, record_bytes in page.get_all_records():
+                    try:
+                        yield (page_id, slot_id), table_info.schema.decode_row(record_bytes)
+                    except Exception as e:
+                        print(f"解码记录失败 {table_name}.{page_id}.{slot_id}: {e}")
+                        continue
+
+            except Exception as e:
+                print(f"扫描页面失败 {table_name}.{page_id}: {e}")
+                continue
+
+    def update_row(self, table_name: str, rid: Tuple[int, int], new_row: Dict[str, Any]) -> bool:
+        """
+        按位置原地更新单条记录（★ 新增），记录位置保持不变
+
+        Args:
+            table_name: 表名
+            rid: 记录位置 (page_id, slot_id)
+            new_row: 新的行数据（字典或按列序排列的值元组）
+
+        Returns:
+            是否更新成功（记录不存在/已删除或页面空间不足时返回False）
+
+        Raises:
+            ValueError: 表不存在或数据格式错误
+        """
+        if table_name not in self.tables:
+            raise ValueError(f"表不存在: {table_name}")
+
+        table_info = self.tables[table_name]
+
+        try:
+            record_bytes = table_info.schema.encode_row(new_row)
+        except ValueError as e:
+            raise ValueError(f"数据编码失败: {e}")
+
+        page_id, slot_id = rid
+        notify = self._is_watched(table_name)
+        try:
+            page = self.buffer_pool.get_page(table_name, page_id)
+            if page.is_deleted(slot_id):
+                return False
+            old_bytes = page.read(slot_id) if notify else None
+            if not page.update(slot_id, record_bytes):
+                return False
+        except Exception as e:
+            print(f"更新记录失败 {table_name}.{page_id}.{slot_id}: {e}")
+            return False
+
+        self.buffer_pool.put_page(table_name, page, mark_dirty=True)
+        table_info.last_modified = time.time()
+
+        if notify:
+            decode_row = table_info.schema.decode_row
+            self._notify_write(table_name, decode_row(old_bytes), decode_row(record_bytes))
+        return True
+
     def delete_where(self, table_name: str, predicate: Callable[[Dict[str, Any]], bool]) -> int:
         """
         按条件删除记录
@@ -331,6 +554,7 @@ class StorageEngine:
         table_info = self.tables[table_name]
         page_ids = self.file_manager.get_all_page_ids(table_name)
         deleted_count = 0
+        notify = self._is_watched(table_name)
 
         for page_id in page_ids:
             try:
@@ -352,6 +576,8 @@ class StorageEngine:
                             page.delete(slot_id)
                             deleted_count += 1
                             page_modified = True
+                            if notify:
+                                self._notify_write(table_name, row_data, None)
 
                     except Exception as e:
                         print(f"检查删除条件失败 {table_name}.{page_id}.{slot_id}: {e}")
@@ -373,6 +599,129 @@ class StorageEngine:
 
         return deleted_count
 
+    def delete_by(self, table_name: str, column: str, value: Any) -> int:
+        """
+        删除指定列等于给定值的记录（★ 新增）
+
+        与 delete_where 等价于 predicate=lambda row: row[column] == value，
+        但每条记录只解码被比较的一列，且不经过 Python 谓词调用。
+
+        Args:
+            table_name: 表名
+            column: 列名
+            value: 要匹配的值
+
+        Returns:
+            删除的记录数量
+
+        Raises:
+            ValueError: 表或列不存在
+        """
+        if table_name not in self.tables:
+            raise ValueError(f"表不存在: {table_name}")
+
+        table_info = self.tables[table_name]
+        schema = table_info.schema
+        column_names = schema.get_column_names()
+        if column not in column_names:
+            raise ValueError(f"列不存在: {table_name}.{column}")
+        col_index = column_names.index(column)
+        decode_column = schema.decoder.decode_column
+
+        deleted_count = 0
+        notify = self._is_watched(table_name)
+        for page_id in self.file_manager.get_all_page_ids(table_name):
+            try:
+                page = self.buffer_pool.get_page(table_name, page_id)
+                page_modified = False
+
+                for slot_id in range(page.get_slot_count()):
+                    if page.is_deleted(slot_id):
+                        continue
+
+                    try:
+                        record_bytes = page.read(slot_id)
+                        if decode_column(record_bytes, col_index) == value:
+                            page.delete(slot_id)
+                            deleted_count += 1
+                            page_modified = True
+                            if notify:
+                                self._notify_write(table_name, schema.decode_row(record_bytes), None)
+
+                    except Exception as e:
+                        print(f"检查删除条件失败 {table_name}.{page_id}.{slot_id}: {e}")
+                        continue
+
+                if page_modified:
+                    self.buffer_pool.put_page(table_name, page, mark_dirty=True)
+
+            except Exception as e:
+                print(f"删除操作失败 {table_name}.{page_id}: {e}")
+                continue
+
+        # 更新表统计
+        if deleted_count > 0:
+            table_info.total_rows -= deleted_count
+            table_info.last_modified = time.time()
+            self._save_metadata()
+
+        return deleted_count
+
+    def delete_rows(self, table_name: str, rids: Iterable[Tuple[int, int]]) -> int:
+        """
+        按位置删除记录（★ 新增），只访问 rids 所在的页面
+
+        Args:
+            table_name: 表名
+            rids: 记录位置 (page_id, slot_id) 的可迭代对象
+
+        Returns:
+            删除的记录数量（已删除或不存在的位置被跳过）
+
+        Raises:
+            ValueError: 表不存在
+        """
+        if table_name not in self.tables:
+            raise ValueError(f"表不存在: {table_name}")
+
+        table_info = self.tables[table_name]
+
+        slots_by_page: Dict[int, List[int]] = {}
+        for page_id, slot_id in rids:
+            slots_by_page.setdefault(page_id, []).append(slot_id)
+
+        deleted_count = 0
+        notify = self._is_watched(table_name)
+        for page_id, slot_ids in slots_by_page.items():
+            try:
+                page = self.buffer_pool.get_page(table_name, page_id)
+                page_modified = False
+
+                for slot_id in slot_ids:
+                    if slot_id >= page.get_slot_count() or page.is_deleted(slot_id):
+                        continue
+                    record_bytes = page.read(slot_id)
+                    page.delete(slot_id)
+                    deleted_count += 1
+                    page_modified = True
+                    if notify:
+                        self._notify_write(table_name, table_info.schema.decode_row(record_bytes), None)
+
+                if page_modified:
+                    self.buffer_pool.put_page(table_name, page, mark_dirty=True)
+
+            except Exception as e:
+                print(f"删除操作失败 {table_name}.{page_id}: {e}")
+                continue
+
+        # 更新表统计
+        if deleted_count > 0:
+            table_info.total_rows -= deleted_count
+            table_info.last_modified = time.time()
+            self._save_metadata()
+
+        return deleted_count
+
     def update_where(self, table_name: str, predicate: Callable[[Dict[str, Any]], bool],
                      update_func: Callable[[Dict[str, Any]], Dict[str, Any]]) -> int:
         """
@@ -395,6 +744,7 @@ class StorageEngine:
         table_info = self.tables[table_name]
         page_ids = self.file_manager.get_all_page_ids(table_name)
         updated_count = 0
+        notify = self._is_watched(table_name)
 
         for page_id in page_ids:
             try:
@@ -426,6 +776,10 @@ class StorageEngine:
                             if new_slot != -1:
                                 updated_count += 1
                                 page_modified = True
+                            if notify:
+                                self._notify_write(table_name, row_data,
+                                                   table_info.schema.decode_row(updated_bytes)
+                                                   if new_slot != -1 else None)
 
                     except Exception as e:
                         print(f"更新记录失败 {table_name}.{page_id}.{slot_id}: {e}")
@@ -477,6 +831,11 @@ class StorageEngine:
     def close(self) -> None:
         """关闭存储引擎"""
         print("关闭存储引擎...")
+        for callback in self._close_callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"关闭前回调失败: {e}")
         self.flush_all()
         self.buffer_pool.close()
         self.file_manager.close_all()
@@ -520,6 +879,10 @@ def test_storage_engine_basic():
 
     print("\n2. 插入数据:")
 
+    # 写入监听器只关注courses表，students表的写入不应触发回调
+    write_events = []
+    engine.add_write_listener(lambda table, old, new: write_events.append((table, old, new)), {"courses"})
+
     # 插入学生数据
     students_data = [
         {"id": 1, "name": "Alice", "age": 20, "email": "alice@university.edu"},
@@ -564,6 +927,35 @@ def test_storage_engine_basic():
     for row in engine.seq_scan("students"):
         print(f"     {row}")
 
+    # 按列等值删除
+    deleted_count = engine.delete_by("students", "name", "Eve")
+    print(f"   按姓名删除Eve: {deleted_count}条")
+    assert deleted_count == 1
+    assert all(row["name"] != "Eve" for row in engine.seq_scan("students"))
+
+    # 按位置删除
+    rid, first_row = next(engine.seq_scan_with_rid("students"))
+    deleted_count = engine.delete_rows("students", [rid, rid])
+    print(f"   按位置删除{first_row['name']}: {deleted_count}条")
+    assert deleted_count == 1
+    assert all(row["name"] != first_row["name"] for row in engine.seq_scan("students"))
+
+    # 批量插入中有超过单页容量的记录：整批报错，不写入任何行
+    engine.create_table("notes", [{"name": "id", "type": "INT"},
+                                  {"name": "body", "type": "VARCHAR", "max_length": 8000}])
+    try:
+        engine.insert_rows("notes", [{"id": 1, "body": "a"}, {"id": 2, "body": "x" * 5000},
+                                     {"id": 3, "body": "c"}])
+        assert False, "超大记录应报错"
+    except ValueError as e:
+        print(f"   批量插入超大记录: {e}")
+    assert not list(engine.seq_scan("notes"))
+    engine.drop_table("notes")
+
+    print(f"   写入监听器收到通知: {len(write_events)}次（仅courses表）")
+    assert [table for table, _, _ in write_events] == ["courses"] * len(courses_data)
+    assert write_events[0][2]["course_id"] == 101
+
     print("\n5. 存储引擎统计:")
     stats = engine.get_stats()
     for key, value in stats.items():
@@ -0,0 +1,114 @@
+"""
+CLI集成测试
+
+【测试范围】
+1. 计划缓存：仅字面量内空白不同的语句不能共用计划
+2. 文件模式：脚本按 ';' 切分时跳过字符串字面量内的分号，错误报告文件中的真实行号
+3. 交互模式：多行读入时 -- 注释不吞掉后续语句
+"""
+
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+# 添加src目录与项目根目录到路径
+src_dir = Path(__file__).parent.parent
+for _path in (str(src_dir), str(src_dir.parent)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from cli.minidb_cli import IntegratedMiniDBCLI, STORAGE_ENGINE_AVAILABLE, SQL_COMPILER_AVAILABLE
+
+
+@unittest.skipUnless(STORAGE_ENGINE_AVAILABLE and SQL_COMPILER_AVAILABLE, "需要完整集成环境")
+class TestCLIScripts(unittest.TestCase):
+    """CLI脚本执行测试类"""
+
+    def setUp(self):
+        self.tmp_dir = Path(tempfile.mkdtemp())
+        with redirect_stdout(io.StringIO()):
+            self.cli = IntegratedMiniDBCLI(data_dir=str(self.tmp_dir / "data"))
+
+    def tearDown(self):
+        if "storage_engine" in self.cli.__dict__:
+            with redirect_stdout(io.StringIO()):
+                self.cli.storage_engine.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _run_script(self, script: str) -> str:
+        path = self.tmp_dir / "script.sql"
+        path.write_text(script, encoding="utf-8")
+        out = io.StringIO()
+        with redirect_stdout(out):
+            self.cli.run_file(str(path))
+        return out.getvalue()
+
+    def _read_interactive(self, *lines: str) -> str:
+        with mock.patch("builtins.input", side_effect=lines):
+            return self.cli._read_sql_statement()
+
+    def _rows(self, table: str):
+        return sorted((row["id"], row["name"]) for row in self.cli.storage_engine.seq_scan(table))
+
+    def test_plan_cache_keeps_literal_whitespace(self):
+        """测试字面量内空白不同的INSERT不会命中同一缓存计划"""
+        self._run_script(
+            "CREATE TABLE t(id INT, name VARCHAR(20));\n"
+            "INSERT INTO t VALUES (2,'x  y');\n"
+            "INSERT INTO t VALUES (2,'x y');\n"
+        )
+        self.assertEqual(self._rows("t"), [(2, "x  y"), (2, "x y")])
+
+        key = IntegratedMiniDBCLI._plan_cache_key
+        self.assertNotEqual(key("INSERT INTO t VALUES (2,'x  y');"),
+                            key("INSERT INTO t VALUES (2,'x y');"))
+        # 字面量之外的空白差异仍规范化为同一个键
+        self.assertEqual(key("SELECT  *\nFROM t ;"), key("SELECT * FROM t"))
+
+    def test_script_semicolon_inside_literal(self):
+        """测试脚本中字符串字面量与注释内的 ';' 不会切断语句"""
+        out = self._run_script(
+            "CREATE TABLE t(id INT, name VARCHAR(20));\n"
+            "INSERT INTO t VALUES (1,'a;b'); -- it's; a comment\n"
+            "INSERT INTO t VALUES (2,'c\\';d');\n"
+            "DELETE FROM t WHERE name = 'a;b';\n"
+        )
+        self.assertNotIn("Unterminated", out)
+        self.assertEqual(self._rows("t"), [(2, "c';d")])
+
+        complete = self.cli._is_complete_statement
+        self.assertFalse(complete("SELECT * FROM t WHERE name = 'a;"))
+        self.assertTrue(complete("SELECT * FROM t WHERE name = 'a;b';"))
+        self.assertFalse(complete("-- note;"))
+        self.assertFalse(complete("/* note;"))
+
+    def test_script_error_reports_file_line(self):
+        """测试后续语句出错时报告的是脚本文件中的行号，而不是语句内的行号"""
+        out = self._run_script(
+            "CREATE TABLE t(id INT, name VARCHAR(20));\n"
+            "INSERT INTO t VALUES (1,'a');\n"
+            "\n"
+            "-- comment\n"
+            "SELECT * FROM t;\n"
+            "SELECT @ FROM t;\n"
+        )
+        self.assertIn("line 6", out)
+
+    def test_interactive_leading_comment(self):
+        """测试交互模式下语句前的 -- 注释行不会导致一直等待续行"""
+        self.assertTrue(self.cli._is_complete_statement("-- list users\nSELECT * FROM users;"))
+        sql = self._read_interactive("-- list users", "SELECT * FROM users;")
+        self.assertEqual(sql, "SELECT * FROM users;")
+
+    def test_interactive_trailing_comment(self):
+        """测试交互模式下 ';' 之后的 -- 注释不影响语句结束判断"""
+        sql = self._read_interactive("SELECT * FROM users; -- note")
+        self.assertEqual(sql, "SELECT * FROM users;")
+        # 注释内的 ';' 不结束语句，需继续读入
+        sql = self._read_interactive("SELECT * -- note;", "FROM users;")
+        self.assertEqual(sql, "SELECT * FROM users;")
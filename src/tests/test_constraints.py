@@ -0,0 +1,192 @@
+"""
+外键约束测试
+
+【测试范围】
+1. 外键列值索引：建立后随存储层各写入路径增量维护，与全表扫描结果一致
+2. 重复值逐条删除、UPDATE 为 NULL / 由 NULL 更新
+3. 父表删除后重建不会沿用旧索引
+4. 索引维护后外键约束仍然生效
+"""
+
+import io
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+# 添加src目录与项目根目录到路径
+src_dir = Path(__file__).parent.parent
+for _path in (str(src_dir), str(src_dir.parent)):
+    if _path not in sys.path:
+        sys.path.insert(0, _path)
+
+from storage.storage_engine import StorageEngine
+from engine.catalog_mgr import CatalogManager
+from engine.constraint_validator import ForeignKeyValidationError
+
+PARENT_COLUMNS = [
+    {"name": "id", "type": "INT"},
+    {"name": "name", "type": "VARCHAR", "max_length": 20},
+]
+CHILD_COLUMNS = [
+    {"name": "id", "type": "INT"},
+    {"name": "pid", "type": "INT"},
+]
+
+
+class TestForeignKeyValueIndex(unittest.TestCase):
+    """外键列值索引维护测试类"""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        with redirect_stdout(io.StringIO()):
+            self.storage = StorageEngine(self.tmp_dir)
+            self.catalog = CatalogManager(self.storage)
+            self._create_table("parent", PARENT_COLUMNS)
+            self._create_table("child", CHILD_COLUMNS)
+            self.catalog.constraint_mgr.add_foreign_key("child", "pid", "parent", "id")
+            self.storage.insert_rows("parent", [{"id": i, "name": f"p{i}"} for i in (1, 2, 3)])
+        self.validator = self.catalog.constraint_validator
+
+    def tearDown(self):
+        with redirect_stdout(io.StringIO()):
+            self.storage.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+    def _create_table(self, name, columns):
+        self.storage.create_table(name, columns)
+        self.catalog.register_table(name, columns)
+
+    def _key(self, table, column):
+        return self.catalog.get_table_metadata(table).table_id, column
+
+    def _build_index(self, table, column):
+        """建立值索引（首次访问时全表扫描）"""
+        return self.validator._get_value_index(*self._key(table, column))
+
+    def _assert_index(self, table, column):
+        """已建立的索引未被丢弃，且与全表扫描得到的计数一致"""
+        key = self._key(table, column)
+        self.assertIn(key, self.validator._fk_value_index)
+        expected = {}
+        for row in self.storage.seq_scan(table):
+            value = row[column]
+            if value is not None:
+                expected[value] = expected.get(value, 0) + 1
+        self.assertEqual(self.validator._fk_value_index[key], expected)
+
+    def _run(self, func, *args):
+        with redirect_stdout(io.StringIO()):
+            return func(*args)
+
+    def _rid_of(self, table, child_id):
+        return next(rid for rid, row in self.storage.seq_scan_with_rid(table) if row["id"] == child_id)
+
+    def test_index_follows_every_write_path(self):
+        """测试 insert/delete/update 各写入路径都会增量维护已建立的索引"""
+        self._build_index("parent", "id")
+        self._build_index("child", "pid")
+
+        self._run(self.storage.insert_row, "child", {"id": 1, "pid": 1})
+        self._assert_index("child", "pid")
+        self._run(self.storage.insert_rows, "child",
+                  [{"id": 2, "pid": 1}, {"id": 3, "pid": 2}, {"id": 4, "pid": None}, {"id": 5, "pid": 3}])
+        self._assert_index("child", "pid")
+
+        self._run(self.storage.update_where, "child", lambda row: row["id"] == 3,
+                  lambda row: {**row, "pid": 3})
+        self._assert_index("child", "pid")
+        self._run(self.storage.update_row, "child", self._rid_of("child", 1), {"id": 1, "pid": 2})
+        self._assert_index("child", "pid")
+
+        self._run(self.storage.delete_where, "child", lambda row: row["id"] == 5)
+        self._assert_index("child", "pid")
+        self._run(self.storage.delete_by, "child", "pid", 2)
+        self._assert_index("child", "pid")
+        self._run(self.storage.delete_rows, "child", [self._rid_of("child", 2)])
+        self._assert_index("child", "pid")
+
+        self._run(self.storage.insert_row, "parent", {"id": 4, "name": "p4"})
+        self._run(self.storage.delete_by, "parent", "id", 1)
+        self._assert_index("parent", "id")
+
+    def test_duplicates_deleted_one_at_a_time(self):
+        """测试重复值逐条删除：计数递减，删完最后一条前父行都不能删除"""
+        self._run(self.storage.insert_rows, "child", [{"id": i, "pid": 1} for i in (1, 2, 3)])
+        index = self._build_index("child", "pid")
+        self.assertEqual(index[1], 3)
+
+        for child_id, remaining in ((1, 2), (2, 1)):
+            self._run(self.storage.delete_rows, "child", [self._rid_of("child", child_id)])
+            self.assertEqual(index[1], remaining)
+            with self.assertRaises(ForeignKeyValidationError):
+                self.validator.validate_delete_referenced_keys("parent", {"id": 1, "name": "p1"})
+
+        self._run(self.storage.delete_rows, "child", [self._rid_of("child", 3)])
+        self.assertNotIn(1, index)
+        self.validator.validate_delete_referenced_keys("parent", {"id": 1, "name": "p1"})
+
+    def test_update_to_and_from_null(self):
+        """测试外键列更新为 NULL 及由 NULL 更新回非空值"""
+        self._run(self.storage.insert_rows, "child", [{"id": 1, "pid": 2}, {"id": 2, "pid": 2}])
+        self._build_index("child", "pid")
+
+        self._run(self.storage.update_row, "child", self._rid_of("child", 1), {"id": 1, "pid": None})
+        self._assert_index("child", "pid")
+        self._run(self.storage.update_where, "child", lambda row: row["id"] == 2,
+                  lambda row: {**row, "pid": None})
+        self._assert_index("child", "pid")
+        # 已无子行引用2，父行可以删除
+        self.validator.validate_delete_referenced_keys("parent", {"id": 2, "name": "p2"})
+
+        self._run(self.storage.update_row, "child", self._rid_of("child", 1), {"id": 1, "pid": 3})
+        self._assert_index("child", "pid")
+        with self.assertRaises(ForeignKeyValidationError):
+            self.validator.validate_delete_referenced_keys("parent", {"id": 3, "name": "p3"})
+
+    def test_foreign_key_errors_still_fire(self):
+        """测试索引增量维护后外键约束仍然生效"""
+        self.validator.validate_insert_foreign_keys("child", {"id": 1, "pid": 1})
+        with self.assertRaises(ForeignKeyValidationError):
+            self.validator.validate_insert_foreign_keys("child", {"id": 1, "pid": 9})
+
+        # 父表新插入的值随即可被引用，删除的值随即不可引用
+        self._run(self.storage.insert_row, "parent", {"id": 9, "name": "p9"})
+        self.validator.validate_insert_foreign_keys("child", {"id": 1, "pid": 9})
+        self.validator.validate_insert_foreign_keys_batch("child", [{"id": 1, "pid": 9}, {"id": 2, "pid": 3}])
+        self._run(self.storage.delete_by, "parent", "id", 9)
+        with self.assertRaises(ForeignKeyValidationError):
+            self.validator.validate_insert_foreign_keys("child", {"id": 1, "pid": 9})
+        with self.assertRaises(ForeignKeyValidationError):
+            self.validator.validate_insert_foreign_keys_batch("child", [{"id": 1, "pid": 1}, {"id": 2, "pid": 9}])
+        with self.assertRaises(ForeignKeyValidationError):
+            self.validator.validate_update_foreign_keys("child", {"id": 1, "pid": 1}, {"id": 1, "pid": 9})
+
+        self._run(self.storage.insert_row, "child", {"id": 1, "pid": 1})
+        with self.assertRaises(ForeignKeyValidationError):
+            self.validator.validate_update_referenced_keys("parent", {"id": 1, "name": "p1"},
+                                                           {"id": 7, "name": "p1"})
+
+    def test_drop_and_recreate_parent(self):
+        """测试父表删除后索引被丢弃，同名重建后按新数据重新建立"""
+        self._build_index("parent", "id")
+        old_key = self._key("parent", "id")
+
+        self._run(self.storage.drop_table, "parent")
+        self.assertNotIn(old_key, self.validator._fk_value_index)
+        self.assertNotIn("parent", self.validator._fk_index_by_table)
+
+        with redirect_stdout(io.StringIO()):
+            self.catalog.unregister_table("parent")
+            self._create_table("parent", PARENT_COLUMNS)
+            self.storage.insert_rows("parent", [{"id": 7, "name": "p7"}])
+
+        self.assertEqual(self._build_index("parent", "id"), {7: 1})
+        self._run(self.storage.insert_row, "parent", {"id": 8, "name": "p8"})
+        self._assert_index("parent", "id")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -22,6 +22,88 @@ from storage.storage_engine import StorageEngine
 from engine.catalog_mgr import CatalogManager
 
 
+# 测试用例表：(SQL, 描述)，模块级元组只构造一次
+S6_CASES = (
+    # 基础聚合
+    ("SELECT COUNT(*) as total FROM employees;", "全局COUNT"),
+    ("SELECT AVG(salary) as avg_sal FROM employees;", "全局AVG"),
+    ("SELECT MIN(age) as min_age, MAX(age) as max_age FROM employees;", "MIN/MAX"),
+    ("SELECT SUM(salary) as total_sal FROM employees;", "SUM"),
+
+    # 分组聚合
+    ("SELECT dept, COUNT(*) as cnt FROM employees GROUP BY dept;", "部门计数"),
+    ("SELECT dept, AVG(salary) as avg_sal FROM employees GROUP BY dept;", "部门平均薪水"),
+    ("SELECT age, COUNT(*) as cnt FROM employees GROUP BY age;", "年龄分布"),
+
+    # HAVING过滤
+    ("SELECT dept, COUNT(*) as cnt FROM employees GROUP BY dept HAVING COUNT(*) >= 3;", "HAVING计数过滤"),
+    ("SELECT dept, AVG(salary) as avg_sal FROM employees GROUP BY dept HAVING AVG(salary) > 70000;",
+     "HAVING平均值过滤"),
+)
+
+S7_CASES = (
+    # 排序测试
+    ("SELECT name, salary FROM employees ORDER BY salary DESC;", "薪水降序"),
+    ("SELECT name, dept, age FROM employees ORDER BY dept ASC, age DESC;", "多列排序"),
+    ("SELECT * FROM employees ORDER BY name ASC;", "姓名升序"),
+
+    # 分页测试
+    ("SELECT name, salary FROM employees ORDER BY salary DESC LIMIT 3;", "前3高薪"),
+    ("SELECT name, salary FROM employees ORDER BY salary DESC LIMIT 2, 3;", "第3-5高薪"),
+    ("SELECT * FROM employees ORDER BY age ASC LIMIT 5 OFFSET 2;", "跳过2人取5人"),
+
+    # 组合测试
+    ("SELECT name, age FROM employees WHERE age > 26 ORDER BY age DESC LIMIT 4;", "条件+排序+分页"),
+)
+
+PIPELINE_CASES = (
+    # 完整管线1
+    ("""
+     SELECT dept, AVG(salary) as avg_sal, COUNT(*) as cnt
+     FROM employees
+     WHERE age > 25
+     GROUP BY dept
+     HAVING COUNT(*) >= 2
+     ORDER BY avg_sal DESC LIMIT 2;
+     """, "完整管线：WHERE+GROUP BY+HAVING+ORDER BY+LIMIT"),
+
+    # 完整管线2
+    ("""
+     SELECT dept, MIN(age) as min_age, MAX(salary) as max_sal
+     FROM employees
+     WHERE salary > 60000
+     GROUP BY dept
+     HAVING MAX(salary) > 75000
+     ORDER BY min_age ASC;
+     """, "多聚合函数+条件过滤"),
+
+    # 带DISTINCT
+    ("""
+     SELECT DISTINCT dept
+     FROM employees
+     WHERE age < 30
+     ORDER BY dept ASC;
+     """, "DISTINCT+条件+排序"),
+)
+
+EDGE_CASES = (
+    # NULL值处理
+    ("SELECT COUNT(name), COUNT(*) FROM employees;", "COUNT与COUNT(*)差异"),
+
+    # 空结果集
+    ("SELECT dept, COUNT(*) FROM employees WHERE age > 100 GROUP BY dept;", "空结果集聚合"),
+
+    # 单行结果
+    ("SELECT MAX(salary) as highest FROM employees;", "单行聚合结果"),
+
+    # 大LIMIT
+    ("SELECT * FROM employees ORDER BY id LIMIT 100;", "超大LIMIT"),
+
+    # 零OFFSET
+    ("SELECT name FROM employees ORDER BY name LIMIT 3 OFFSET 0;", "零偏移"),
+)
+
+
 class S6S7IntegrationTester:
     """S6+S7集成测试器"""
 
@@ -95,6 +177,9 @@ class S6S7IntegrationTester:
         """同步存储catalog到语义catalog"""
         tables = self.catalog_manager.list_all_tables()
 
+        # 原地清空后重新登记，planner 持有的 catalog 引用保持不变
+        self.semantic_catalog.clear()
+
         for table_name in tables:
             columns = self.catalog_manager.get_table_columns(table_name)
             col_defs = []
@@ -104,10 +189,7 @@ class S6S7IntegrationTester:
                     col_def["max_length"] = col.max_length
                 col_defs.append(col_def)
 
-            try:
-                self.semantic_catalog.create_table(table_name, col_defs)
-            except:
-                pass  # 忽略重复创建
+            self.semantic_catalog.create_table(table_name, col_defs)
 
     def _execute_sql(self, sql: str, show_result: bool = False):
         """执行SQL并返回结果"""
@@ -133,135 +215,38 @@ class S6S7IntegrationTester:
             print(f"   错误: {e}")
             raise
 
-    def test_s6_aggregation(self):
-        """测试S6聚合功能"""
-        print("\n=== S6聚合功能测试 ===")
-
-        test_cases = [
-            # 基础聚合
-            ("SELECT COUNT(*) as total FROM employees;", "全局COUNT"),
-            ("SELECT AVG(salary) as avg_sal FROM employees;", "全局AVG"),
-            ("SELECT MIN(age) as min_age, MAX(age) as max_age FROM employees;", "MIN/MAX"),
-            ("SELECT SUM(salary) as total_sal FROM employees;", "SUM"),
-
-            # 分组聚合
-            ("SELECT dept, COUNT(*) as cnt FROM employees GROUP BY dept;", "部门计数"),
-            ("SELECT dept, AVG(salary) as avg_sal FROM employees GROUP BY dept;", "部门平均薪水"),
-            ("SELECT age, COUNT(*) as cnt FROM employees GROUP BY age;", "年龄分布"),
-
-            # HAVING过滤
-            ("SELECT dept, COUNT(*) as cnt FROM employees GROUP BY dept HAVING COUNT(*) >= 3;", "HAVING计数过滤"),
-            ("SELECT dept, AVG(salary) as avg_sal FROM employees GROUP BY dept HAVING AVG(salary) > 70000;",
-             "HAVING平均值过滤"),
-        ]
+    def _run_suite(self, title: str, label: str, cases, pass_msg: str = "测试通过",
+                   fail_msg: str = "测试失败", normalize: bool = False):
+        """按用例表逐条执行SQL并输出结果"""
+        print(f"\n=== {title} ===")
 
-        for i, (sql, desc) in enumerate(test_cases, 1):
-            print(f"\n[S6-{i}] {desc}")
+        for i, (sql, desc) in enumerate(cases, 1):
+            print(f"\n[{label}-{i}] {desc}")
             try:
-                results = self._execute_sql(sql, show_result=True)
-                print("✓ 测试通过")
+                if normalize:
+                    # 去除多余空白
+                    sql = ' '.join(sql.split())
+                self._execute_sql(sql, show_result=True)
+                print(f"✓ {pass_msg}")
             except Exception as e:
-                print(f"❌ 测试失败: {e}")
+                print(f"❌ {fail_msg}: {e}")
+
+    def test_s6_aggregation(self):
+        """测试S6聚合功能"""
+        self._run_suite("S6聚合功能测试", "S6", S6_CASES)
 
     def test_s7_sorting_paging(self):
         """测试S7排序分页功能"""
-        print("\n=== S7排序分页功能测试 ===")
-
-        test_cases = [
-            # 排序测试
-            ("SELECT name, salary FROM employees ORDER BY salary DESC;", "薪水降序"),
-            ("SELECT name, dept, age FROM employees ORDER BY dept ASC, age DESC;", "多列排序"),
-            ("SELECT * FROM employees ORDER BY name ASC;", "姓名升序"),
-
-            # 分页测试
-            ("SELECT name, salary FROM employees ORDER BY salary DESC LIMIT 3;", "前3高薪"),
-            ("SELECT name, salary FROM employees ORDER BY salary DESC LIMIT 2, 3;", "第3-5高薪"),
-            ("SELECT * FROM employees ORDER BY age ASC LIMIT 5 OFFSET 2;", "跳过2人取5人"),
-
-            # 组合测试
-            ("SELECT name, age FROM employees WHERE age > 26 ORDER BY age DESC LIMIT 4;", "条件+排序+分页"),
-        ]
-
-        for i, (sql, desc) in enumerate(test_cases, 1):
-            print(f"\n[S7-{i}] {desc}")
-            try:
-                results = self._execute_sql(sql, show_result=True)
-                print("✓ 测试通过")
-            except Exception as e:
-                print(f"❌ 测试失败: {e}")
+        self._run_suite("S7排序分页功能测试", "S7", S7_CASES)
 
     def test_complete_pipeline(self):
         """测试完整SQL管线"""
-        print("\n=== 完整SQL管线测试 ===")
-
-        complex_cases = [
-            # 完整管线1
-            ("""
-             SELECT dept, AVG(salary) as avg_sal, COUNT(*) as cnt
-             FROM employees
-             WHERE age > 25
-             GROUP BY dept
-             HAVING COUNT(*) >= 2
-             ORDER BY avg_sal DESC LIMIT 2;
-             """, "完整管线：WHERE+GROUP BY+HAVING+ORDER BY+LIMIT"),
-
-            # 完整管线2
-            ("""
-             SELECT dept, MIN(age) as min_age, MAX(salary) as max_sal
-             FROM employees
-             WHERE salary > 60000
-             GROUP BY dept
-             HAVING MAX(salary) > 75000
-             ORDER BY min_age ASC;
-             """, "多聚合函数+条件过滤"),
-
-            # 带DISTINCT
-            ("""
-             SELECT DISTINCT dept
-             FROM employees
-             WHERE age < 30
-             ORDER BY dept ASC;
-             """, "DISTINCT+条件+排序"),
-        ]
-
-        for i, (sql, desc) in enumerate(complex_cases, 1):
-            print(f"\n[完整-{i}] {desc}")
-            try:
-                # 去除多余空白
-                clean_sql = ' '.join(sql.split())
-                results = self._execute_sql(clean_sql, show_result=True)
-                print("✓ 完整管线测试通过")
-            except Exception as e:
-                print(f"❌ 完整管线测试失败: {e}")
+        self._run_suite("完整SQL管线测试", "完整", PIPELINE_CASES,
+                        "完整管线测试通过", "完整管线测试失败", normalize=True)
 
     def test_edge_cases(self):
         """测试边界情况"""
-        print("\n=== 边界情况测试 ===")
-
-        edge_cases = [
-            # NULL值处理
-            ("SELECT COUNT(name), COUNT(*) FROM employees;", "COUNT与COUNT(*)差异"),
-
-            # 空结果集
-            ("SELECT dept, COUNT(*) FROM employees WHERE age > 100 GROUP BY dept;", "空结果集聚合"),
-
-            # 单行结果
-            ("SELECT MAX(salary) as highest FROM employees;", "单行聚合结果"),
-
-            # 大LIMIT
-            ("SELECT * FROM employees ORDER BY id LIMIT 100;", "超大LIMIT"),
-
-            # 零OFFSET
-            ("SELECT name FROM employees ORDER BY name LIMIT 3 OFFSET 0;", "零偏移"),
-        ]
-
-        for i, (sql, desc) in enumerate(edge_cases, 1):
-            print(f"\n[边界-{i}] {desc}")
-            try:
-                results = self._execute_sql(sql, show_result=True)
-                print("✓ 边界测试通过")
-            except Exception as e:
-                print(f"❌ 边界测试失败: {e}")
+        self._run_suite("边界情况测试", "边界", EDGE_CASES, "边界测试通过", "边界测试失败")
 
     def run_all_tests(self):
         """运行所有测试"""
@@ -297,6 +297,42 @@ class TestSQLCompiler(unittest.TestCase):
         print(f"成功率: {success_count}/{len(statements)}")
         self.assertEqual(success_count, len(statements))
 
+    def test_catalog_clear_in_place(self):
+        """测试Catalog原地清空后分析器/计划器仍共享同一catalog"""
+        self.catalog.create_table("student", [{"name": "id", "type": "INT"}])
+        self.catalog.clear()
+
+        self.assertFalse(self.catalog.table_exists("student"))
+        self.assertIs(self.semantic_analyzer.catalog, self.catalog)
+        self.assertIs(self.planner.catalog, self.catalog)
+
+        # 清空后可重新登记同名表
+        self.catalog.create_table("student", [{"name": "id", "type": "INT"}])
+        self.assertTrue(self.planner.catalog.table_exists("student"))
+
+    def test_tokenize_stream_script(self):
+        """测试脚本一次词法分析后逐条解析/计划"""
+        script = """
+        CREATE TABLE student(id INT, name VARCHAR, age INT);
+        INSERT INTO student VALUES(1, 'Alice', 20);
+        SELECT id, name FROM student WHERE age > 18
+        """
+
+        statements = list(self.lexer.tokenize_stream(script))
+        self.assertEqual(len(statements), 3)
+        for tokens in statements:
+            self.assertEqual(tokens[-1].type, TokenType.EOF)
+            self.assertEqual(tokens[-2].lexeme, ";")
+
+        asts = [self.parser.parse_tokens(tokens) for tokens in statements]
+        self.assertEqual([a.__class__.__name__ for a in asts],
+                         ["CreateTableNode", "InsertNode", "SelectNode"])
+
+        self.semantic_analyzer.analyze(asts[0])
+        plan = self.planner.plan_from_ast(asts[2])
+        self.assertEqual(plan.to_dict(), self.planner.plan(
+            "SELECT id, name FROM student WHERE age > 18;").to_dict())
+
 
 def run_comprehensive_tests():
     """运行综合测试"""